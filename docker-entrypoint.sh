@@ -24,8 +24,16 @@ python manage.py collectstatic --noinput
 
 # Apply migrations
 echo "Applying database migrations..."
-python manage.py makemigrations --noinput
-python manage.py migrate --noinput
+# --fake-initial: the databases created before the migrations were committed already have the tables of
+# 0002_sync_models (see psycho/docs/models.md)
+python manage.py migrate --fake-initial --noinput
+
+# Empty the Prometheus metrics directory of the worker processes, if any (see psycho/metrics.py)
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+  echo "Resetting the metrics directory..."
+  rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"/*
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
 
 # Start the server (the CMD command from the Dockerfile)
 echo "Starting server..."
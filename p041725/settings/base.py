@@ -27,7 +27,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'psycho.metrics.MetricsMiddleware',
+    'psycho.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'psycho.instrumentation.QueryInstrumentationMiddleware',
+    'psycho.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,6 +67,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than SQLite's shared in-memory database, which fails the concurrent writes of the tests
+        # ("database table is locked") instead of waiting for the lock
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -110,6 +117,97 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Custom USER model
 AUTH_USER_MODEL = 'psycho.User'
 
+# Cache (dev): a single process, so the in-memory cache is enough for the response cache generation counters, kept
+# apart from the cached responses so that culling the responses never drops a counter
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'psycho',
+    },
+    'counters': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'psycho-counters',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 7},
+    },
+}
+
+# Psycho response cache (see psycho/cache.py)
+PSYCHO_RESPONSE_CACHE = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'COUNTERS_ALIAS': 'counters',
+    'TIMEOUT': 300,
+    'STATS_FLUSH_INTERVAL': 10,  # Seconds between two additions of a process' hit/miss counts to the counters cache
+}
+
+# Psycho SQL instrumentation (see psycho/instrumentation.py): queries per request, N+1 suspects, query budgets
+PSYCHO_QUERY_INSTRUMENTATION = {
+    'HEADERS': False,  # Expose X-DB-Query-Count, X-DB-Time-Ms... in the responses
+    'DUPLICATE_THRESHOLD': 3,  # Executions of a same query in a request reported as a N+1 suspect
+}
+
+# Psycho read replicas (see psycho/replicas.py): the safe-method requests read from a healthy replica alias of
+# DATABASES, the clients are pinned to the primary for PIN_SECONDS after a write
+DATABASE_ROUTERS = ['psycho.replicas.ReplicaRouter']
+PSYCHO_READ_REPLICAS = {
+    'ALIASES': [],  # e.g. ['replica_1', 'replica_2']
+    'PIN_SECONDS': 5,
+    'HEALTH_CHECK_INTERVAL': 10,  # Seconds between two health checks of a replica, per process
+    'MAX_LAG_SECONDS': 30,  # PostgreSQL replay lag over which a replica is left out
+    'HEADERS': False,  # Expose X-DB-Read-Alias in the responses
+}
+
+# Psycho fast read path for the list endpoints (see psycho/fastpath.py)
+PSYCHO_FAST_READ_PATH = True
+
+# Psycho number of status transitions embedded in the application payloads (see ApplicationSerializer)
+PSYCHO_EMBEDDED_STATUS_HISTORY = 5
+
+# Psycho tracking ID allocator (see psycho/tracking.py)
+PSYCHO_TRACKING_ID_ALLOCATOR = 'psycho.tracking.CounterTrackingIdAllocator'
+
+# Psycho status lookup by tracking id (see psycho/lookup.py): read-through cache of the found (TIMEOUT) and unknown
+# (NEGATIVE_TIMEOUT) tracking ids, in the response cache's CACHES alias
+PSYCHO_STATUS_LOOKUP = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    'NEGATIVE_TIMEOUT': 30,
+}
+
+# Psycho applicant profile history (see psycho/history.py): 'diff' only writes a record when a field changed, DEFER
+# coalesces the saves of a transaction into one record written on commit; 'full' is django-simple-history's default
+PSYCHO_HISTORY = {
+    'MODE': 'diff',
+    'DEFER': True,
+}
+
+# Psycho Prometheus metrics (see psycho/metrics.py), served at /metrics to the ALLOWED_IPS (None for any), with a
+# "Authorization: Bearer <TOKEN>" header when TOKEN is set
+PSYCHO_METRICS = {
+    'ENABLED': True,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+    'TOKEN': None,
+}
+
+# Psycho request profiling (see psycho/profiling.py): opt-in, for the requests sending a signed X-Profile header
+# (python manage.py profiles --token) and a SAMPLE_RATE share of the others; read with python manage.py profiles
+PSYCHO_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': BASE_DIR / 'profiles',
+    'TOKEN_MAX_AGE': 3600,
+    'MAX_PROFILES': 500,
+    'TRACEMALLOC': True,
+    'TRACEMALLOC_FRAMES': 10,
+}
+
+# Psycho estimated counts (see psycho/paginators.py): beyond THRESHOLD rows, the paginated lists and the admin report
+# an estimated count (count_is_estimate) rather than running a COUNT(*) over the table or the filtered rows
+PSYCHO_ESTIMATED_COUNTS = {
+    'THRESHOLD': 10000,
+}
+
 # For DRF API settings
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
@@ -14,5 +14,18 @@ INSTALLED_APPS += ['debug_toolbar']
 
 MIDDLEWARE.insert(0, "debug_toolbar.middleware.DebugToolbarMiddleware")
 
+PSYCHO_QUERY_INSTRUMENTATION = {**PSYCHO_QUERY_INSTRUMENTATION, 'HEADERS': True}
+
+# Local read replica: a copy of db.sqlite3 (cp db.sqlite3 db.replica.sqlite3) or a second PostgreSQL database
+# (createdb -T psycho psycho_replica), e.g. PSYCHO_REPLICA_DB=db.replica.sqlite3. Nothing replicates to it.
+if os.getenv('PSYCHO_REPLICA_DB'):
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.getenv('PSYCHO_REPLICA_DB'),
+                            'TEST': {'MIRROR': 'default'}}
+    PSYCHO_READ_REPLICAS = {**PSYCHO_READ_REPLICAS, 'ALIASES': ['replica']}
+PSYCHO_READ_REPLICAS = {**PSYCHO_READ_REPLICAS, 'HEADERS': True}
+
+# Request profiling on demand (python manage.py profiles --token), stored in BASE_DIR / 'profiles'
+PSYCHO_PROFILING = {**PSYCHO_PROFILING, 'ENABLED': True}
+
 # The Debug Toolbar is shown only if the IP address is listed in Django’s INTERNAL_IPS setting
 INTERNAL_IPS = ['127.0.0.1']
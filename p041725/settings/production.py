@@ -1,6 +1,7 @@
 import os
 from decouple import config
 from decouple import Csv
+from django.core.exceptions import ImproperlyConfigured
 from .base import *
 
 DEBUG = False
@@ -24,5 +25,80 @@ DATABASES = {
     }
 }
 
+# Connection reuse (see `python manage.py check_db` and `python manage.py benchmark_db_connections`):
+#   - pool: a psycopg connection pool per process and database, connections handed to the requests and given back
+#     at their end, checked before being handed out as CONN_HEALTH_CHECKS is on (requires psycopg 3 with
+#     psycopg-pool);
+#   - persistent: each thread keeps its connection open for DB_CONN_MAX_AGE seconds;
+#   - none: a new connection per request.
+DB_CONNECTION_MODE = config('DB_CONNECTION_MODE', default='pool')
+if DB_CONNECTION_MODE == 'pool':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', cast=int, default=2),
+            'max_size': config('DB_POOL_MAX_SIZE', cast=int, default=10),
+            # Seconds a request waits for a connection when all of them are in use before failing
+            'timeout': config('DB_POOL_TIMEOUT', cast=float, default=10),
+            # Seconds before closing an idle connection above min_size, and before replacing any connection
+            'max_idle': config('DB_POOL_MAX_IDLE', cast=float, default=300),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', cast=float, default=3600),
+        },
+    }
+elif DB_CONNECTION_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', cast=int, default=60)
+elif DB_CONNECTION_MODE != 'none':
+    raise ImproperlyConfigured(f'DB_CONNECTION_MODE must be pool, persistent or none, not "{DB_CONNECTION_MODE}".')
+
+# Read replicas (see psycho/replicas.py): DB_REPLICA_HOSTS=host1,host2 adds the aliases replica_1, replica_2...
+# reached with the primary's credentials and connection mode (one pool per replica)
+for index, host in enumerate(config('DB_REPLICA_HOSTS', cast=Csv(), default=''), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'OPTIONS': {
+            **DATABASES['default'].get('OPTIONS', {}),
+            'connect_timeout': config('DB_REPLICA_CONNECT_TIMEOUT', cast=int, default=2),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+PSYCHO_READ_REPLICAS = {
+    **PSYCHO_READ_REPLICAS,
+    'ALIASES': [alias for alias in DATABASES if alias.startswith('replica_')],
+    'PIN_SECONDS': config('DB_REPLICA_PIN_SECONDS', cast=int, default=5),
+}
+
+# Caches shared by the worker processes (see psycho/cache.py): redis, whose INCR is atomic across processes. The
+# cached responses expire; the counters (response cache generations, hit/miss counts) do not, and are kept in another
+# database. Run redis with maxmemory-policy volatile-lru (see compose.yml), which only evicts keys with an expiry
+REDIS_URL = config('REDIS_URL', default='redis://127.0.0.1:6379')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/0',
+    },
+    'counters': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
+        'TIMEOUT': None,
+    },
+}
+
+# Prometheus metrics at /metrics (see psycho/metrics.py): with several worker processes, also set the
+# PROMETHEUS_MULTIPROC_DIR environment variable of the server to an empty directory
+PSYCHO_METRICS = {
+    **PSYCHO_METRICS,
+    'ALLOWED_IPS': config('METRICS_ALLOWED_IPS', cast=Csv(), default='127.0.0.1,::1'),
+    'TOKEN': config('METRICS_TOKEN', default='') or None,
+}
+
+# Request profiling (see psycho/profiling.py), for staging: off unless PROFILING_ENABLED is set. Only the requests
+# served by the WSGI application (p041725.wsgi, one thread per process) are profiled, not those served by daphne
+PSYCHO_PROFILING = {
+    **PSYCHO_PROFILING,
+    'ENABLED': config('PROFILING_ENABLED', cast=bool, default=False),
+    'SAMPLE_RATE': config('PROFILING_SAMPLE_RATE', cast=float, default=0.0),
+    'DIRECTORY': config('PROFILING_DIRECTORY', default='/var/tmp/psycho_profiles'),
+}
+
 # Base location from which static files will be served (URL to refer to static files)
 STATIC_URL = config('STATIC_URL', default='static/')
\ No newline at end of file
@@ -19,8 +19,11 @@ from django.http import HttpResponse
 from django.urls import path, include
 from debug_toolbar.toolbar import debug_toolbar_urls
 
+from psycho.metrics import metrics_view
+
 urlpatterns = [
     path('', lambda request: HttpResponse("Benin Air Force projects!")),
     path('admin/', admin.site.urls),
     path('psycho/', include('psycho.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ] + debug_toolbar_urls()
@@ -0,0 +1,245 @@
+"""
+Bulk account provisioning.
+
+The profile create_user_account methods and the create_user command hash the password inline (PBKDF2, by design
+slow) and run a few queries per account. AccountProvisioner creates the accounts of many profiles at once:
+    - the passwords are hashed in a process pool, one worker per core;
+    - the username and email conflicts of a batch are checked with one query, the profiles fetched with one query
+      per role, and the groups (with their permissions) resolved once per provisioner;
+    - the users, their group memberships and the profile links are written with bulk queries, in one transaction per
+      batch.
+
+Usage:
+    with AccountProvisioner() as provisioner:
+        reasons = provisioner.provision([
+            {'role': 'applicant', 'email': 'jane.doe@example.com', 'username': 'jdoe', 'password': '...'},
+        ])
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from simple_history.utils import bulk_update_with_history
+
+from psycho.cache import bump_generations
+from psycho.models import AdminProfile, ApplicantProfile, HRManagerProfile, User
+
+# Role -> profile model, group and group permissions given to the account, as by the create_*_account methods
+ROLES = {
+    'applicant': {
+        'profile': ApplicantProfile,
+        'group': 'Applicant',
+        'permissions': [],
+        'superuser': False,
+    },
+    'hr_manager': {
+        'profile': HRManagerProfile,
+        'group': 'HR Manager',
+        'permissions': ['can_review_applications', 'can_manage_applicants_profiles', 'can_manage_applications'],
+        'superuser': False,
+    },
+    'admin': {
+        'profile': AdminProfile,
+        'group': 'Admin',
+        'permissions': [],
+        'superuser': True,
+    },
+}
+
+
+class RejectedAccount(Exception):
+    """
+    Raised when an account cannot be provisioned. The message is the rejection reason.
+    """
+
+
+class AccountProvisioner:
+    """
+    Create user accounts for existing profiles, matched by email, in bulk. See the module docstring.
+
+    processes is the number of password hashing workers (the number of cores by default, 1 hashes inline). Use the
+    provisioner as a context manager so that the workers are started once and stopped at the end.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = None
+        self.group_ids = {}  # Role -> group id
+
+    def __enter__(self):
+        if self.processes > 1:
+            connections.close_all()  # The forked workers must not share the database connections
+            self.pool = ProcessPoolExecutor(self.processes, initializer=django.setup)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def hash_passwords(self, passwords):
+        if self.pool is None:
+            return [make_password(password) for password in passwords]
+        chunk_size = max(1, len(passwords) // (self.processes * 4))
+        return list(self.pool.map(make_password, passwords, chunksize=chunk_size))
+
+    def get_group_id(self, role):
+        """
+        Return the id of the group of the role, creating it and granting its permissions on first use.
+        """
+        if role not in self.group_ids:
+            definition = ROLES[role]
+            group, _ = Group.objects.get_or_create(name=definition['group'])
+            if definition['permissions']:
+                group.permissions.add(*Permission.objects.filter(codename__in=definition['permissions']))
+            self.group_ids[role] = group.pk
+        return self.group_ids[role]
+
+    @staticmethod
+    def clean(row):
+        """
+        Return the normalized (role, email, username, password) of an input row.
+        """
+        if not isinstance(row, dict):
+            raise RejectedAccount(str(row))
+        role = (row.get('role') or '').strip()
+        if role not in ROLES:
+            raise RejectedAccount(f'role: "{role}" is not one of {", ".join(ROLES)}.')
+        email = User.objects.normalize_email((row.get('email') or '').strip()).lower()
+        username = User.normalize_username((row.get('username') or '').strip())
+        password = row.get('password') or ''
+        for field, value in (('email', email), ('username', username), ('password', password)):
+            if not value:
+                raise RejectedAccount(f'{field}: This field is required.')
+        return role, email, username, password
+
+    @staticmethod
+    def find_profiles(candidates):
+        """
+        Return an (role, email) to profile mapping for the candidates, with one query per role.
+        """
+        profiles = {}
+        emails_by_role = {}
+        for _, (role, email, _, _) in candidates:
+            emails_by_role.setdefault(role, set()).add(email)
+        for role, emails in emails_by_role.items():
+            for profile in ROLES[role]['profile'].objects.filter(email__in=emails):
+                profiles[(role, profile.email)] = profile
+        return profiles
+
+    @staticmethod
+    def find_conflicts(candidates):
+        """
+        Return the usernames and emails of the candidates which are already taken by a user.
+        """
+        usernames = {username for _, (_, _, username, _) in candidates}
+        emails = {email for _, (_, email, _, _) in candidates}
+        taken_usernames, taken_emails = set(), set()
+        for username, email in User.objects.filter(Q(username__in=usernames) | Q(email__in=emails)).values_list(
+                'username', 'email'):
+            taken_usernames.add(username)
+            taken_emails.add(email)
+        return taken_usernames, taken_emails
+
+    def provision(self, rows):
+        """
+        Create the accounts of a batch of rows (dicts with a role, the email of the profile, a username and a
+        password). Return the rejection reason of each row, None for the accounts created.
+        """
+        reasons = [None] * len(rows)
+        candidates = []
+        for index, row in enumerate(rows):
+            try:
+                candidates.append((index, self.clean(row)))
+            except RejectedAccount as e:
+                reasons[index] = str(e)
+
+        profiles = self.find_profiles(candidates)
+        taken_usernames, taken_emails = self.find_conflicts(candidates)
+        accepted = []
+        for index, (role, email, username, password) in candidates:
+            profile = profiles.get((role, email))
+            if profile is None:
+                reasons[index] = f'No {role} profile with this email.'
+            elif profile.user_id is not None:
+                reasons[index] = 'This profile is already linked to a user.'
+            elif username in taken_usernames:
+                reasons[index] = 'Username is already taken.'
+            elif email in taken_emails:
+                reasons[index] = 'Email is already taken.'
+            else:
+                # Later rows of the same batch conflict with this one
+                taken_usernames.add(username)
+                taken_emails.add(email)
+                accepted.append((index, role, profile, username, password))
+        if not accepted:
+            return reasons
+
+        hashes = self.hash_passwords([password for *_, password in accepted])
+        for role in {role for _, role, *_ in accepted}:
+            self.get_group_id(role)  # Outside of the transaction: a rollback must not leave a cached id behind
+
+        accounts = [(index, role, profile, self.build_user(role, profile, username, password_hash))
+                    for (index, role, profile, username, _), password_hash in zip(accepted, hashes)]
+        try:
+            with transaction.atomic():
+                self.insert(accounts)
+        except IntegrityError:
+            # A concurrent writer took one of the values: fall back to account by account inserts to isolate it.
+            for account in accounts:
+                account[3].pk = None  # Possibly set by the rolled back bulk_create
+                try:
+                    with transaction.atomic():
+                        self.insert([account])
+                except IntegrityError as e:
+                    account[2].user = None
+                    reasons[account[0]] = f'Database error while creating the account: {e}'
+        # bulk_create and bulk_update do not send the signals invalidating the response cache
+        bump_generations('global')
+        return reasons
+
+    @staticmethod
+    def build_user(role, profile, username, password_hash):
+        """
+        Build the unsaved user of a profile, as the create_*_account methods would.
+        """
+        superuser = ROLES[role]['superuser']
+        user = User(username=username, email=profile.email, first_name=profile.first_name,
+                    last_name=profile.last_name, password=password_hash, is_staff=superuser, is_superuser=superuser)
+        user.normalize_fields()
+        return user
+
+    def insert(self, accounts):
+        users = [user for *_, user in accounts]
+        User.objects.bulk_create(users)
+        if any(user.pk is None for user in users):  # The backend does not return the primary keys
+            pks = dict(User.objects.filter(username__in=[user.username for user in users]).values_list(
+                'username', 'pk'))
+            for user in users:
+                user.pk = pks[user.username]
+
+        Membership = User.groups.through
+        Membership.objects.bulk_create([
+            Membership(user_id=user.pk, group_id=self.get_group_id(role)) for _, role, _, user in accounts
+        ])
+
+        profiles_by_role = {}
+        now = timezone.now()
+        for _, role, profile, user in accounts:
+            profile.user = user
+            profile.date_updated = now  # bulk_update does not touch the auto_now fields (read by the ETags)
+            profiles_by_role.setdefault(role, []).append(profile)
+        for role, profiles in profiles_by_role.items():
+            model = ROLES[role]['profile']
+            if hasattr(model, 'history'):  # django-simple-history
+                # psycho.history: the records only show the account link as a change
+                changes = {'history_changed_fields': ['user_id']} \
+                    if hasattr(model.history.model, 'history_changed_fields') else None
+                bulk_update_with_history(profiles, model, ['user', 'date_updated'], custom_historical_attrs=changes)
+            else:
+                model.objects.bulk_update(profiles, ['user', 'date_updated'])
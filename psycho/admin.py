@@ -2,12 +2,45 @@ from django.contrib import admin
 
 from psycho.models import ApplicantProfile, User, Application, AdminProfile, HRManagerProfile, University, Review, \
     ApplicationStatusHistory
+from psycho.paginators import EstimatedCountPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin for the tables growing with the campaigns: the changelist counts with EstimatedCountPaginator (an estimate
+    beyond PSYCHO_ESTIMATED_COUNTS['THRESHOLD'] rows) and skips the second, unfiltered COUNT(*).
+    Subclasses join the related objects shown in list_display (list_select_related), pick the foreign keys with
+    autocomplete widgets rather than <select> lists of the whole table, and drill down by an indexed date.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # The autocomplete results are listed with __str__ too, from this queryset
+        queryset = super().get_queryset(request)
+        if isinstance(self.list_select_related, (list, tuple)):
+            queryset = queryset.select_related(*self.list_select_related)
+        return queryset
+
+
+@admin.register(User)
+class UserAdmin(LargeTableAdmin):
+    search_fields = ['username', 'email', 'last_name']  # For the autocomplete widgets
+
+    list_display = ['username', 'email', 'first_name', 'last_name', 'is_staff']
+
+
+@admin.register(University)
+class UniversityAdmin(admin.ModelAdmin):
+    search_fields = ['name']  # For the autocomplete widgets
 
 
 @admin.register(ApplicantProfile)
-class ApplicantAdmin(admin.ModelAdmin):
+class ApplicantAdmin(LargeTableAdmin):
     readonly_fields = ['user', 'date_registered', 'date_updated']
     search_fields = ['email', 'phone']
+    autocomplete_fields = ['university']
+    date_hierarchy = 'date_registered'  # applicant_registered_idx
 
     list_display = ['first_name', 'last_name', 'date_registered', 'date_updated']
 
@@ -18,18 +51,35 @@ class Admin(admin.ModelAdmin):
 
 
 @admin.register(Application)
-class ApplicationAdmin(admin.ModelAdmin):
-    list_display = ['applicant', 'status']
+class ApplicationAdmin(LargeTableAdmin):
+    # No substring search, which reads every row: tracking id prefixes (for the autocomplete widgets), exact emails
+    search_fields = ['tracking_id__startswith', 'applicant__email__exact']
+    autocomplete_fields = ['applicant']
+    date_hierarchy = 'date_submitted'  # application_submitted_idx
+    list_filter = ['status']  # application_status_idx
+
+    list_display = ['tracking_id', 'applicant', 'status', 'date_submitted']
+    list_select_related = ['applicant']
+
 
+@admin.register(HRManagerProfile)
+class HRManagerAdmin(admin.ModelAdmin):
+    search_fields = ['last_name', 'email']  # For the autocomplete widgets
+    autocomplete_fields = ['user']
 
-admin.site.register(User)
 
-# admin.site.register(Application)
+@admin.register(Review)
+class ReviewAdmin(LargeTableAdmin):
+    autocomplete_fields = ['application', 'author']
 
-admin.site.register(HRManagerProfile)
+    list_display = ['__str__', 'date_reviewed']
+    list_select_related = ['application__applicant', 'author']
 
-admin.site.register(University)
 
-admin.site.register(Review)
+@admin.register(ApplicationStatusHistory)
+class ApplicationStatusHistoryAdmin(LargeTableAdmin):
+    autocomplete_fields = ['application', 'changed_by']
+    date_hierarchy = 'date_changed'  # status_history_changed_idx
 
-admin.site.register(ApplicationStatusHistory)
+    list_display = ['__str__', 'date_changed']
+    list_select_related = ['application', 'changed_by']
@@ -0,0 +1,158 @@
+"""
+Native async read endpoints, served without any thread hop around the view under Daphne (ASGI).
+
+DRF views are sync only: these plain Django async views reuse the filters, the sorting, the paginators and the
+sparse fieldsets of ApplicationViewSet, fetch the rows with the async ORM and build the payloads with the fast read
+path row serializers (see psycho.fastpath), or, when the fast path is disabled or does not support a serializer,
+with the regular serializer run in a thread (SerializerFallback). The responses have the same content as their sync
+counterparts; the response cache and the conditional requests of the sync views are not applied.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework import status as drf_status
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from psycho.api.views import STATUS_HISTORY_ORDERING, ApplicationViewSet
+from psycho.fastpath import get_base_url, get_row_serializer as get_fast_row_serializer
+from psycho.fieldsets import get_fieldsets, optimize_queryset
+from psycho.lookup import lookup_status
+from psycho.models import Application, ApplicationStatusHistory
+from psycho.paginators import KeysetPagination, SafeEstimatedCountPagination
+from psycho.serializers import ApplicationSerializer, ApplicationStatusHistorySerializer
+
+APPLICATION_REQUIRED = ['status']  # Read by Application.__init__ to track the status changes
+
+
+def render(data, status=drf_status.HTTP_200_OK):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def async_api_view(view):
+    """
+    Decorator for the async read views: GET/HEAD only, the view receives a DRF Request (for its query_params) and
+    the API exceptions are rendered as by DRF.
+    """
+
+    @require_safe
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await view(Request(request), *args, **kwargs)
+        except APIException as e:
+            detail = e.detail if isinstance(e.detail, (list, dict)) else {'detail': e.detail}
+            return render(detail, status=e.status_code)
+
+    return wrapper
+
+
+class SerializerFallback:
+    """
+    Stand-in for a RowSerializer: the instances are loaded as by the sync views (see psycho.fieldsets) and serialized
+    by the regular serializer, in a thread as its fields may query.
+    """
+
+    def __init__(self, serializer_class, request):
+        self.serializer_class = serializer_class
+        self.request = request
+        self.fieldsets = get_fieldsets(request.query_params)
+
+    def get_serializer(self, **kwargs):
+        for key, fieldset in zip(('fields', 'exclude'), self.fieldsets):
+            if fieldset is not None:
+                kwargs[key] = fieldset
+        return self.serializer_class(context={'request': self.request}, **kwargs)
+
+    def values(self, queryset, *required):
+        return optimize_queryset(queryset, self.get_serializer(), required=required,
+                                 prune_columns=any(fieldset is not None for fieldset in self.fieldsets))
+
+    async def aserialize(self, rows, base_url):
+        # The hyperlinks are built from the request by the serializer
+        return await sync_to_async(lambda: self.get_serializer(instance=list(rows), many=True).data)()
+
+
+def get_row_serializer(serializer_class, request):
+    """
+    Return the row serializer of serializer_class pruned by the sparse fieldsets of the request, or a
+    SerializerFallback if the fast read path is disabled or does not support the serializer.
+    """
+    row_serializer = get_fast_row_serializer(serializer_class, request)
+    if row_serializer is None:
+        return SerializerFallback(serializer_class, request)
+    return row_serializer
+
+
+async def get_application(request, **lookup):
+    """
+    Render the application matching the lookup, as ApplicationViewSet.retrieve does.
+    """
+    row_serializer = get_row_serializer(ApplicationSerializer, request)
+    try:
+        row = await row_serializer.values(Application.objects.all(), *APPLICATION_REQUIRED).aget(**lookup)
+    except ObjectDoesNotExist:
+        return render({'detail': 'No Application matches the given query.'}, status=drf_status.HTTP_404_NOT_FOUND)
+    [data] = await row_serializer.aserialize([row], get_base_url(request))
+    return render(data)
+
+
+@async_api_view
+async def application_list(request):
+    """
+    List all applications (async version of ApplicationViewSet.list).
+    """
+    tracking_id = request.query_params.get("tracking_id")
+    if tracking_id is not None and tracking_id.strip() != '':
+        data = await sync_to_async(lookup_status)(tracking_id)
+        if data is None:
+            return render({'detail': 'No Application matches the given query.'}, status=drf_status.HTTP_404_NOT_FOUND)
+        return render(data)
+
+    row_serializer = get_row_serializer(ApplicationSerializer, request)
+    sort_by_ = ApplicationViewSet.get_ordering(request.query_params)
+    keys = [field.lstrip('-') for field in sort_by_ or Application._meta.ordering]
+    queryset = row_serializer.values(Application.objects.all(), *APPLICATION_REQUIRED, *keys, Application._meta.pk.name)
+
+    # Filters
+    queryset = ApplicationViewSet.filter_queryset(queryset, request.query_params)
+
+    # Sorting
+    if sort_by_:
+        queryset = queryset.order_by(*sort_by_)
+
+    if KeysetPagination.cursor_query_param in request.query_params:
+        paginator = KeysetPagination(ordering=sort_by_)
+    else:
+        paginator = SafeEstimatedCountPagination()
+    page = await paginator.apaginate_queryset(queryset, request=request)
+    response = paginator.get_paginated_response(await row_serializer.aserialize(page, get_base_url(request)))
+    return render(response.data)
+
+
+@async_api_view
+async def application_detail(request, pk):
+    """
+    Retrieve a specific application by its ID (async version of ApplicationViewSet.retrieve).
+    """
+    return await get_application(request, pk=pk)
+
+
+@async_api_view
+async def application_status_history(request, pk):
+    """
+    List all application status history for a specific application (async version of
+    psycho.api.views.application_status_history).
+    """
+    row_serializer = get_row_serializer(ApplicationStatusHistorySerializer, request)
+    keys = [field.lstrip('-') for field in STATUS_HISTORY_ORDERING]
+    queryset = row_serializer.values(ApplicationStatusHistory.objects.filter(application_id=pk), *keys,
+                                     ApplicationStatusHistory._meta.pk.name)
+    paginator = KeysetPagination(ordering=STATUS_HISTORY_ORDERING)
+    page = await paginator.apaginate_queryset(queryset, request=request)
+    response = paginator.get_paginated_response(await row_serializer.aserialize(page, get_base_url(request)))
+    return render(response.data)
@@ -1,6 +1,13 @@
-from django.db import transaction
-from django.db.models import Prefetch
+import csv
+import itertools
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import router, transaction
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import (
     generics,
     viewsets,
@@ -8,21 +15,134 @@ from rest_framework import (
 from rest_framework import status as drf_status
 from rest_framework.request import Request
 from rest_framework.response import Response
-from rest_framework.decorators import api_view
-
+from rest_framework.decorators import action, api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from psycho.cache import bump_generations, cache_response
+from psycho.conditional import (
+    admin_profile_timestamps,
+    applicant_timestamps,
+    application_timestamps,
+    conditional,
+    lock_admin_profile,
+    lock_applicant,
+    lock_application,
+)
+from psycho.fastpath import get_base_url, get_row_serializer
+from psycho.fieldsets import get_fieldsets, optimize_queryset
+from psycho.lookup import forget, lookup_status
+from psycho.metrics import STATUS_TRANSITIONS, count_on_commit, count_submission
 from psycho.models import (
     User,
     AdminProfile,
     ApplicantProfile,
     Application, ApplicationStatusHistory,
 )
-from psycho.paginators import SafePageNumberPagination
+from psycho.paginators import EstimatedCountPagination, KeysetPagination, SafeEstimatedCountPagination
+from psycho.plans import APPLICATION_FILTERS, APPLICATION_SORTS
+from psycho.renderers import CSVRenderer, NDJSONRenderer
+from psycho.search import search_applicants
 from psycho.serializers import (
     UserSerializer,
     AdminProfileSerializer,
     ApplicantProfileSerializer,
-    ApplicationSerializer, ApplicationStatusHistorySerializer
+    ApplicantSearchResultSerializer,
+    ApplicationSerializer, ApplicationStatusHistorySerializer, BulkStatusUpdateSerializer
 )
+from psycho.stats import StatsDelta, get_rows, get_stats
+
+
+# Status history pages, most recent first (the primary key is the tie-breaker)
+STATUS_HISTORY_ORDERING = ['-date_changed']
+
+# Exported column name -> Application lookup
+EXPORT_COLUMN_LOOKUPS = {
+    'application_id': 'application_id',
+    'tracking_id': 'tracking_id',
+    'status': 'status',
+    'date_submitted': 'date_submitted',
+    'date_updated': 'date_updated',
+    'applicant_id': 'applicant__applicant_id',
+    'first_name': 'applicant__first_name',
+    'last_name': 'applicant__last_name',
+    'date_of_birth': 'applicant__date_of_birth',
+    'gender': 'applicant__gender',
+    'email': 'applicant__email',
+    'phone': 'applicant__phone',
+    'degree': 'applicant__degree',
+    'baccalaureate_series': 'applicant__baccalaureate_series',
+    'baccalaureate_average': 'applicant__baccalaureate_average',
+    'baccalaureate_session': 'applicant__baccalaureate_session',
+    'university': 'applicant__university__name',
+    'university_field_of_study': 'applicant__university_field_of_study',
+    'university_average': 'applicant__university_average',
+}
+EXPORT_COLUMNS = list(EXPORT_COLUMN_LOOKUPS)
+EXPORT_FIELDS = list(EXPORT_COLUMN_LOOKUPS.values())
+
+
+def export_value(value):
+    """
+    Convert a database value to a JSON and CSV friendly one: dates in ISO format, UUIDs and phone numbers as strings.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class Echo:
+    """
+    File-like object whose write returns the value, to stream what csv.writer writes.
+    """
+
+    def write(self, value):
+        return value
+
+
+def batched_lines(lines, size):
+    """
+    Join the lines of a sync iterator by batches of size: one chunk of the streamed body per batch rather than per line.
+    """
+    lines = iter(lines)
+    while chunk := ''.join(itertools.islice(lines, size)):
+        yield chunk
+
+
+async def iterate_in_thread(iterator):
+    """
+    Async iterator over a sync one, each item being computed by sync_to_async: under ASGI, the rows are fetched in the
+    request's sync thread, which holds the database connection and the server-side cursor, and the event loop only
+    sends them. Given a sync iterator, Django's ASGI handler would read it whole into a list before sending anything.
+    """
+    next_item = sync_to_async(next)
+    try:
+        while (item := await next_item(iterator, None)) is not None:
+            yield item
+    finally:
+        await sync_to_async(iterator.close)()  # Release the cursor in its thread, also when the client goes away
+
+
+class SparseFieldsetsViewMixin:
+    """
+    Generic view mixin applying the ?fields= and ?exclude= sparse fieldsets (see psycho.fieldsets) to GET requests:
+    the serializer is pruned and the queryset loads only what the remaining fields need.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == 'GET':
+            kwargs['fields'], kwargs['exclude'] = get_fieldsets(self.request.query_params)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method != 'GET':
+            return queryset
+        fieldsets = get_fieldsets(self.request.query_params)
+        return optimize_queryset(queryset, self.get_serializer(),
+                                 prune_columns=any(fieldset is not None for fieldset in fieldsets))
 
 
 class UserRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
@@ -37,33 +157,87 @@ class AdminProfileListCreateView(generics.ListCreateAPIView):
     """
     View to list all admin profiles.
     """
-    queryset = AdminProfile.objects.all()
+    queryset = AdminProfile.objects.select_related('user')
     serializer_class = AdminProfileSerializer
+    pagination_class = EstimatedCountPagination
 
 
 class AdminProfileRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     """
     View to retrieve, update or delete an admin profile.
     """
-    queryset = AdminProfile.objects.all()
+    queryset = AdminProfile.objects.select_related('user')
     serializer_class = AdminProfileSerializer
 
+    @conditional(admin_profile_timestamps, lock_admin_profile)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional(admin_profile_timestamps, lock_admin_profile)
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
 
-class ApplicantProfileListCreateView(generics.ListCreateAPIView):
+
+class ApplicantProfileListCreateView(SparseFieldsetsViewMixin, generics.ListCreateAPIView):
     """
     View to list all applicants.
     """
-    queryset = ApplicantProfile.objects.all()
+    queryset = ApplicantProfile.objects.select_related('university', 'user')
     serializer_class = ApplicantProfileSerializer
+    pagination_class = EstimatedCountPagination
+
+    @cache_response('applicant-list', collection='applicants')
+    def list(self, request, *args, **kwargs):
+        # Fast path: rows built from a values() projection (see psycho.fastpath)
+        row_serializer = get_row_serializer(self.serializer_class, request)
+        if row_serializer is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(row_serializer.values(ApplicantProfile.objects.all()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page, get_base_url(request)))
+        return Response(row_serializer.serialize(queryset, get_base_url(request)))
+
+
+class ApplicantSearchView(generics.GenericAPIView):
+    """
+    View to search applicants by partial name, email, phone or tracking id, best matches first.
+    """
+    serializer_class = ApplicantSearchResultSerializer
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request: Request):
+        q = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+
+        ranked_ids = search_applicants(q, limit=max(limit, 1))
+        applicants = ApplicantProfile.objects.select_related('application').in_bulk(ranked_ids)
+        results = [applicants[pk] for pk in ranked_ids if pk in applicants]
+        serializer = self.get_serializer(results, many=True)
+        return Response({'q': q, 'results': serializer.data}, status=drf_status.HTTP_200_OK)
 
 
-class ApplicantProfileRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ApplicantProfileRetrieveUpdateDestroyView(SparseFieldsetsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     View to retrieve, update or delete an applicant.
     """
-    queryset = ApplicantProfile.objects.all()
+    queryset = ApplicantProfile.objects.select_related('university', 'user')
     serializer_class = ApplicantProfileSerializer
 
+    @conditional(applicant_timestamps, lock_applicant)
+    @cache_response('applicant-detail', detail='applicant')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional(applicant_timestamps, lock_applicant)
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
 
 class ApplicationViewSet(viewsets.ViewSet):
     """
@@ -73,66 +247,118 @@ class ApplicationViewSet(viewsets.ViewSet):
     """
 
     serializer_class = ApplicationSerializer  # This is necessary for form rendering
+    export_chunk_size = 2000
 
+    @staticmethod
+    def filter_queryset(queryset, params):
+        """
+        Apply the supported filters (psycho.plans.APPLICATION_FILTERS) found in params (query params or a dict).
+        """
+        for param, lookup in APPLICATION_FILTERS.items():
+            value = params.get(param)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
+        return queryset
+
+    @staticmethod
+    def get_ordering(params):
+        """
+        Translate the comma separated sort_by parameter into order_by lookups.
+        Only the index backed sort keys declared in psycho.plans.APPLICATION_SORTS are accepted.
+        """
+        sort_by = params.get("sort_by")
+        if not sort_by:
+            return []
+        sort_by_ = []
+        unsupported = []
+        for field in sort_by.split(","):
+            descending = field.startswith("-")
+            clean_field = field.lstrip("-")  # remove "-" before checks
+            lookup = APPLICATION_SORTS.get(clean_field.removeprefix("applicant__"))
+            if lookup is None:
+                unsupported.append(clean_field)
+            else:
+                sort_by_.append(f"-{lookup}" if descending else lookup)
+        if unsupported:
+            raise ValidationError({
+                "sort_by": f"Unsupported sort field(s): {', '.join(unsupported)}. "
+                           f"Supported fields are: {', '.join(APPLICATION_SORTS)}."
+            })
+        return sort_by_
+
+    def get_read_serializer(self, request, **kwargs):
+        """
+        Return an application serializer pruned by the sparse fieldsets of the request (see psycho.fieldsets).
+        """
+        fields, exclude = get_fieldsets(request.query_params)
+        return self.serializer_class(context={'request': request}, fields=fields, exclude=exclude, **kwargs)
+
+    @staticmethod
+    def get_read_queryset(request, serializer, required=()):
+        """
+        Return the applications queryset loading only what the serializer needs.
+        """
+        fieldsets = get_fieldsets(request.query_params)
+        required = ['status', *required]  # Read by Application.__init__ to track the status changes
+        return optimize_queryset(Application.objects.all(), serializer, required=required,
+                                 prune_columns=any(fieldset is not None for fieldset in fieldsets))
+
+    @cache_response('application-list', collection='applications')
     def list(self, request: Request):
         """
-        List all applications.
+        List all applications. With a tracking_id parameter, return the status of that application as
+        application_track does.
         """
         tracking_id = request.query_params.get("tracking_id")
-        print("Tracking_id is : ", tracking_id)
         if tracking_id is not None and tracking_id.strip() != '':
-            application = get_object_or_404(Application, tracking_id=tracking_id)
-            serialized_item = self.serializer_class(instance=application, context={'request': request})
-            return Response(serialized_item.data, status=drf_status.HTTP_200_OK)
+            # The applicants' status check: the lookup projection only, no applicant data (see psycho.lookup)
+            data = lookup_status(tracking_id)
+            if data is None:
+                raise Http404
+            return Response(data, status=drf_status.HTTP_200_OK)
+        serializer = self.get_read_serializer(request)
+
+        # The sort keys are loaded whatever the fieldsets: the keyset pagination reads them
+        sort_by_ = self.get_ordering(request.query_params)
+        keys = [field.lstrip('-') for field in sort_by_ or Application._meta.ordering]
+
+        # Fast path: rows built from a values() projection (see psycho.fastpath)
+        row_serializer = get_row_serializer(self.serializer_class, request)
+        if row_serializer is not None:
+            queryset = row_serializer.values(Application.objects.all(), *keys, Application._meta.pk.name)
+        else:
+            queryset = self.get_read_queryset(request, serializer, required=keys)
 
-        queryset = Application.objects.prefetch_related(
-            Prefetch('status_history', queryset=ApplicationStatusHistory.objects.select_related('changed_by').order_by(
-                '-date_changed')), )
         # Filters
-        status = request.query_params.get('status')
-        degree = request.query_params.get('degree')
-        baccalaureate_series = request.query_params.get('baccalaureate_series')
-
-        if status:
-            queryset = queryset.filter(status=status)
-        if degree:
-            queryset = queryset.filter(applicant__degree=degree)
-        if baccalaureate_series:
-            queryset = queryset.filter(applicant__baccalaureate_series__exact=baccalaureate_series)
+        queryset = self.filter_queryset(queryset, request.query_params)
 
         # Sorting
-        sort_by = request.query_params.get("sort_by")
-        if sort_by:
-            if isinstance(sort_by, str):
-                sort_by = sort_by.split(",")  # single sort
-            sort_by_ = []
-            for field in sort_by:
-                descending = field.startswith("-")
-                clean_field = field.lstrip("-")  # remove "-" before checks
-
-                if clean_field in ["status", "date_submitted", "date_updated"]:
-                    sort_by_.append(f"-{clean_field}" if descending else clean_field)
-                else:
-                    sort_by_.append(
-                        f"-applicant__{clean_field}" if descending else f"applicant__{clean_field}"
-                    )
-            queryset = queryset.order_by(*sort_by_)
-
+        if sort_by_:
             queryset = queryset.order_by(*sort_by_)
 
-        # Pagination
-        paginator = SafePageNumberPagination()
+        # Pagination: keyset pagination when a cursor is asked for (even empty, for the first page), page numbers
+        # otherwise to keep the page/page_size response shape for existing clients, with an estimated count on large
+        # lists (count_is_estimate).
+        if KeysetPagination.cursor_query_param in request.query_params:
+            paginator = KeysetPagination(ordering=sort_by_)
+        else:
+            paginator = SafeEstimatedCountPagination()
         paginated_queryset = paginator.paginate_queryset(queryset, request=request)
-        serialized_items = self.serializer_class(instance=paginated_queryset, many=True, context={'request': request})
+        if row_serializer is not None:
+            return paginator.get_paginated_response(row_serializer.serialize(paginated_queryset,
+                                                                             get_base_url(request)))
+        serialized_items = self.get_read_serializer(request, instance=paginated_queryset, many=True)
         # return Response(serialized_items.data, status=drf_status.HTTP_200_OK)
         return paginator.get_paginated_response(serialized_items.data)
 
+    @conditional(application_timestamps, lock_application)
+    @cache_response('application-detail', detail='application')
     def retrieve(self, request, pk):
         """
         Retrieve a specific application by its ID.
         """
-        application = get_object_or_404(Application, pk=pk)
-        serializer = self.serializer_class(instance=application, context={'request': request})
+        serializer = self.get_read_serializer(request)
+        serializer.instance = get_object_or_404(self.get_read_queryset(request, serializer), pk=pk)
         return Response(serializer.data, status=drf_status.HTTP_200_OK)
 
     def create(self, request):
@@ -140,11 +366,20 @@ class ApplicationViewSet(viewsets.ViewSet):
         Create a new application.
         """
         serializer = self.serializer_class(data=request.data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+        try:
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        except ValidationError as e:
+            count_submission('invalid', e.detail)
+            raise
+        except Exception:
+            count_submission('error')
+            raise
+        count_submission('created')
 
         return Response(serializer.data, status=drf_status.HTTP_201_CREATED)
 
+    @conditional(application_timestamps, lock_application)
     def partial_update(self, request, pk):
         """
         Partially update an existing application.
@@ -176,12 +411,148 @@ class ApplicationViewSet(viewsets.ViewSet):
 
         return Response(serializer.data, status=drf_status.HTTP_200_OK)
 
+    @action(detail=False, methods=['post'], url_path='bulk_status')
+    def bulk_status(self, request):
+        """
+        Move many applications to a target status at once.
+
+        The applications are selected either by a list of ids or by the list filters. The change is applied with a
+        single UPDATE and the matching history rows are inserted with one bulk_create, in one transaction. As
+        QuerySet.update() does not fire post_save, the history is written here rather than by the signal handler.
+        """
+        serializer = BulkStatusUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data.get('ids')
+        filters = serializer.validated_data.get('filter')
+        target_status = serializer.validated_data['status']
+        note = serializer.validated_data.get('note')
+        changed_by = request.user if request.user.is_authenticated else None
+
+        with transaction.atomic():
+            queryset = Application.objects.select_for_update()
+            if ids is not None:
+                queryset = queryset.filter(pk__in=ids)
+            else:
+                queryset = self.filter_queryset(queryset, filters)
+            rows = list(queryset.values_list('application_id', 'status', 'tracking_id'))
+            current_statuses = {pk: current for pk, current, _ in rows}
+            tracking_ids = {pk: tracking_id for pk, _, tracking_id in rows}
+
+            to_update = [pk for pk, current in current_statuses.items() if current != target_status]
+            if to_update:
+                # Nor does it update the application stats (see psycho.stats)
+                delta = StatsDelta()
+                for row in get_rows(Application.objects.filter(pk__in=to_update)):
+                    delta.remove(row)
+                    delta.add({**row, 'status': target_status})
+                delta.apply()
+
+                Application.objects.filter(pk__in=to_update).exclude(status=target_status).update(
+                    status=target_status, date_updated=timezone.now())
+                ApplicationStatusHistory.objects.bulk_create([
+                    ApplicationStatusHistory(
+                        application_id=pk,
+                        changed_by=changed_by,
+                        old_status=current_statuses[pk],
+                        new_status=target_status,
+                        note=note,
+                    )
+                    for pk in to_update
+                ])
+                # QuerySet.update() and bulk_create() do not send the signals invalidating the response cache
+                transaction.on_commit(lambda: bump_generations(
+                    'applications', *[f'application:{pk}' for pk in to_update]))
+                transaction.on_commit(lambda: forget(*[tracking_ids[pk] for pk in to_update]))
+                count_on_commit(STATUS_TRANSITIONS, len(to_update), status=target_status)
+
+        results = []
+        for pk in (ids if ids is not None else current_statuses):
+            if pk not in current_statuses:
+                results.append({'application_id': pk, 'outcome': 'not_found'})
+            elif current_statuses[pk] == target_status:
+                results.append({'application_id': pk, 'outcome': 'unchanged', 'status': target_status})
+            else:
+                results.append({'application_id': pk, 'outcome': 'updated', 'old_status': current_statuses[pk],
+                                'status': target_status})
+
+        return Response({
+            'status': target_status,
+            'updated': len(to_update),
+            'results': results,
+        }, status=drf_status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'], renderer_classes=[CSVRenderer, NDJSONRenderer])
+    def export(self, request):
+        """
+        Stream every application matching the list filters as CSV (default) or NDJSON.
+
+        Rows come from a flat values() projection over the application, applicant profile and university join,
+        read through a server-side cursor: memory stays flat whatever the number of rows. Under ASGI, the body is an
+        async iterator fetching each batch of rows in the request's sync thread (see iterate_in_thread).
+        """
+        # The database is resolved now: the rows are read while streaming, once the middlewares have returned
+        queryset = Application.objects.using(router.db_for_read(Application))
+        queryset = self.filter_queryset(queryset, request.query_params)
+        ordering = self.get_ordering(request.query_params)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        rows = (
+            [export_value(value) for value in row]
+            for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=self.export_chunk_size)
+        )
+
+        if request.accepted_renderer.format == 'ndjson':
+            lines = (json.dumps(dict(zip(EXPORT_COLUMNS, row))) + '\n' for row in rows)
+            filename = 'applications.ndjson'
+        else:
+            writer = csv.writer(Echo())
+            lines = itertools.chain([writer.writerow(EXPORT_COLUMNS)], (writer.writerow(row) for row in rows))
+            filename = 'applications.csv'
+
+        content = batched_lines(lines, self.export_chunk_size)
+        if isinstance(request._request, ASGIRequest):
+            content = iterate_in_thread(content)
+        response = StreamingHttpResponse(content, content_type=request.accepted_renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def handle_exception(self, exc):
+        if self.action == 'export':
+            # The export renderers only declare the formats: the errors are answered in JSON
+            self.request.accepted_renderer = JSONRenderer()
+            self.request.accepted_media_type = JSONRenderer.media_type
+        return super().handle_exception(exc)
+
 
 @api_view(['get'])
 def application_status_history(request, pk):
     """
-    List all application status history for a specific application.
+    List the status history of a specific application, most recent first, paginated with a date_changed cursor
+    (?cursor=, ?page_size=): the history of an application bouncing between statuses has no bound.
+    """
+    status_history = ApplicationStatusHistory.objects.filter(application_id=pk).select_related('changed_by')
+    paginator = KeysetPagination(ordering=STATUS_HISTORY_ORDERING)
+    page = paginator.paginate_queryset(status_history, request=request)
+    status_history_serializer = ApplicationStatusHistorySerializer(page, many=True)
+    return paginator.get_paginated_response(status_history_serializer.data)
+
+
+@api_view(['get'])
+def application_stats(request):
+    """
+    Applications count and mean baccalaureate average, overall and by status, degree, baccalaureate series and gender.
+    Read from the ApplicationStats counters (see psycho.stats): the cost does not depend on the number of applications.
+    """
+    return Response(get_stats(), status=drf_status.HTTP_200_OK)
+
+
+@api_view(['get'])
+def application_track(request, tracking_id):
+    """
+    Status of the application with the tracking id, for the applicants: the tracking id, status and submission and
+    update dates only, served from a read-through cache (see psycho.lookup).
     """
-    status_history = ApplicationStatusHistory.objects.filter(application_id=pk)
-    status_history_serializer = ApplicationStatusHistorySerializer(status_history, many=True)
-    return Response(status_history_serializer.data, status=drf_status.HTTP_200_OK)
+    data = lookup_status(tracking_id)
+    if data is None:
+        raise Http404
+    return Response(data, status=drf_status.HTTP_200_OK)
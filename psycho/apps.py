@@ -6,4 +6,5 @@ class PsychoConfig(AppConfig):
     name = 'psycho'
 
     def ready(self):
+        import psycho.search  # Registers psycho_fold on the SQLite connections, called by the search triggers
         import psycho.signals
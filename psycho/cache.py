@@ -0,0 +1,220 @@
+"""
+Response cache for the read endpoints, invalidated by generation counters.
+
+Each cached response is stored under a key made of the view name, the path, the normalized query parameters and the
+current value of the generation counters it depends on. Writes do not delete entries: they bump the counters (see
+psycho.signals), so that every key built afterwards differs and stale entries simply expire.
+
+Generations:
+    - "global": University and User changes (nested in every payload)
+    - "applications": any change to an Application, its ApplicantProfile or its status history
+    - "applicants": any change to an ApplicantProfile
+    - "application:<pk>", "applicant:<pk>": changes to one application or applicant profile
+
+Settings (PSYCHO_RESPONSE_CACHE): ENABLED, ALIAS (the CACHES alias of the responses), COUNTERS_ALIAS (the CACHES
+alias of the generation counters and hit/miss counts, ALIAS when None), TIMEOUT (seconds) and STATS_FLUSH_INTERVAL.
+
+The counters never expire, and one that is evicted starts again from 0, where it serves the responses cached before
+its first bumps again: they live apart from the responses, in a cache which never culls nor evicts them. As soon as
+more than one process serves requests, that cache must be shared by all of them and increment atomically: redis
+(with a maxmemory-policy sparing the keys without expiry) or memcached, not locmem nor the file based cache.
+
+A replica may replay a write up to MAX_LAG_SECONDS (PSYCHO_READ_REPLICAS) after it commits: a response read from a
+replica then would be the old data cached under the new generations, until TIMEOUT. When replicas are configured,
+mark_written remembers the bumped generations for MAX_LAG_SECONDS, and the responses read from a replica meanwhile
+are served but not cached (replica_may_fill).
+
+The hit/miss counts are kept in memory by each process and added to the counters cache every STATS_FLUSH_INTERVAL
+seconds, rather than written on every request.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status as drf_status
+from rest_framework.response import Response
+
+from psycho.replicas import get_setting as get_replicas_setting, read_alias
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'COUNTERS_ALIAS': None,
+    'TIMEOUT': 300,
+    'STATS_FLUSH_INTERVAL': 10,
+}
+KEY_PREFIX = 'psycho'
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_RESPONSE_CACHE', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_cache():
+    return caches[get_setting('ALIAS')]
+
+
+def get_counters_cache():
+    return caches[get_setting('COUNTERS_ALIAS') or get_setting('ALIAS')]
+
+
+def increment(cache, key, delta=1):
+    """
+    Increment a counter which never expires, creating it if needed.
+    """
+    try:
+        return cache.incr(key, delta)
+    except ValueError:  # The counter does not exist (yet, or anymore)
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key, delta)
+
+
+def bump_generations(*names):
+    """
+    Invalidate every cached response depending on one of the given generations.
+    """
+    cache = get_counters_cache()
+    for name in names:
+        increment(cache, f'{KEY_PREFIX}:gen:{name}')
+    mark_written(*names)
+
+
+def get_generations(names):
+    cache = get_counters_cache()
+    keys = [f'{KEY_PREFIX}:gen:{name}' for name in names]
+    values = cache.get_many(keys)
+    return [values.get(key, 0) for key in keys]
+
+
+def mark_written(*names):
+    """
+    Remember for MAX_LAG_SECONDS that the data behind the names changed, which the replicas may not have replayed yet.
+    """
+    if not get_replicas_setting('ALIASES'):
+        return
+    get_counters_cache().set_many({f'{KEY_PREFIX}:written:{name}': 1 for name in names},
+                                  timeout=get_replicas_setting('MAX_LAG_SECONDS'))
+
+
+def replica_may_fill(names):
+    """
+    Return whether the data just read may be cached: always from the primary, from a replica only when none of the
+    names was written in the last MAX_LAG_SECONDS.
+
+    Called once the data is read, so that a write committing meanwhile is seen.
+    """
+    if read_alias.get() is None:
+        return True
+    return not get_counters_cache().get_many([f'{KEY_PREFIX}:written:{name}' for name in names])
+
+
+# Hit/miss counts of this process not added to the counters cache yet
+pending_stats = Counter()
+pending_stats_lock = threading.Lock()
+last_flush = time.monotonic()
+
+
+def record(view_name, outcome):
+    global last_flush
+    with pending_stats_lock:
+        pending_stats[f'{KEY_PREFIX}:stats:{view_name}:{outcome}'] += 1
+        if time.monotonic() - last_flush < get_setting('STATS_FLUSH_INTERVAL'):
+            return
+        last_flush = time.monotonic()
+    flush_stats()
+
+
+def flush_stats():
+    """
+    Add the hit/miss counts recorded by this process to the counters cache.
+    """
+    with pending_stats_lock:
+        counts = dict(pending_stats)
+        pending_stats.clear()
+    cache = get_counters_cache()
+    for key, count in counts.items():
+        increment(cache, key, count)
+
+
+def get_stats(view_names):
+    """
+    Return {view name: (hits, misses)} for the given views, as of the last flush of each process.
+    """
+    cache = get_counters_cache()
+    keys = [f'{KEY_PREFIX}:stats:{view_name}:{outcome}' for view_name in view_names for outcome in ('hit', 'miss')]
+    values = cache.get_many(keys)
+    return {
+        view_name: (values.get(f'{KEY_PREFIX}:stats:{view_name}:hit', 0),
+                    values.get(f'{KEY_PREFIX}:stats:{view_name}:miss', 0))
+        for view_name in view_names
+    }
+
+
+def reset_stats(view_names):
+    get_counters_cache().delete_many(
+        [f'{KEY_PREFIX}:stats:{view_name}:{outcome}' for view_name in view_names for outcome in ('hit', 'miss')])
+
+
+def build_key(view_name, request, generations):
+    """
+    Build the cache key of a response from the view name, the host (which ends up in hyperlinks), the path, the
+    normalized query parameters, the generations and the database read from.
+
+    A replica may still serve the data from before the last generation bump: its responses are kept apart from the
+    primary's, which the clients pinned to the primary after a write read (see psycho.replicas).
+    """
+    params = sorted((key, value) for key, values in request.query_params.lists() for value in values
+                    if key != 'format')  # The cached data is the same whatever the renderer
+    source = (request.get_host(), request.path, params, read_alias.get())
+    digest = hashlib.sha1(repr(source).encode('utf-8')).hexdigest()
+    return f"{KEY_PREFIX}:resp:{view_name}:{'.'.join(map(str, generations))}:{digest}"
+
+
+# Views whose responses are cached, by name. Filled in by cache_response.
+CACHED_VIEWS = []
+
+
+def cache_response(view_name, collection=None, detail=None):
+    """
+    Decorator caching the data of successful responses of a DRF view method.
+
+    collection is the generation of the whole collection (list views); detail is the prefix of the per object
+    generation, "<detail>:<pk>", for views receiving a pk keyword argument.
+    """
+    CACHED_VIEWS.append(view_name)
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not get_setting('ENABLED'):
+                return method(self, request, *args, **kwargs)
+
+            names = ['global']
+            if collection:
+                names.append(collection)
+            if detail:
+                names.append(f"{detail}:{kwargs['pk']}")
+            key = build_key(view_name, request, get_generations(names))
+
+            cache = get_cache()
+            data = cache.get(key)
+            if data is not None:
+                record(view_name, 'hit')
+                response = Response(data, status=drf_status.HTTP_200_OK)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = method(self, request, *args, **kwargs)
+            record(view_name, 'miss')
+            if response.status_code == drf_status.HTTP_200_OK and replica_may_fill(names):
+                cache.set(key, response.data, timeout=get_setting('TIMEOUT'))
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,120 @@
+"""
+Conditional requests (ETag / Last-Modified) for the detail endpoints.
+
+The validators of a resource are derived from the date_updated columns of the rows making up its payload (and the
+latest status change of an application), fetched with a single narrow query. Matching If-None-Match or
+If-Modified-Since headers are answered with a 304 before the view instantiates any serializer.
+
+Updates are checked in their own transaction (optimistic concurrency): the rows making up the payload are locked
+(SELECT ... FOR UPDATE), then a stale If-Match or If-Unmodified-Since is answered with a 412. Two updates sent with the
+same ETag thus run one after the other, and the second one fails its precondition. A successful update returns the
+new ETag and Last-Modified, read after its write, for the client's next conditional update.
+"""
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date
+from django.views.decorators.http import condition
+
+from psycho.models import AdminProfile, ApplicantProfile, Application
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def application_timestamps(pk):
+    return (Application.objects.filter(pk=pk)
+            .annotate(last_status_change=Max('status_history__date_changed'))
+            .values_list('date_updated', 'applicant__date_updated', 'last_status_change')
+            .first())
+
+
+def lock_application(pk):
+    # The applicant row as well: its date_updated is part of the validators
+    list(Application.objects.select_for_update().filter(pk=pk).values_list('pk', 'applicant__pk'))
+
+
+def applicant_timestamps(pk):
+    return ApplicantProfile.objects.filter(pk=pk).values_list('date_updated').first()
+
+
+def lock_applicant(pk):
+    list(ApplicantProfile.objects.select_for_update().filter(pk=pk).values_list('pk'))
+
+
+def admin_profile_timestamps(pk):
+    return AdminProfile.objects.filter(pk=pk).values_list('date_updated').first()
+
+
+def lock_admin_profile(pk):
+    list(AdminProfile.objects.select_for_update().filter(pk=pk).values_list('pk'))
+
+
+def get_validators(timestamps_func, pk):
+    """
+    Return the (ETag, Last-Modified datetime) of the object, (None, None) if it does not exist.
+    """
+    try:
+        timestamps = timestamps_func(pk)
+    except ValidationError:  # Not a valid primary key: let the view answer
+        timestamps = None
+    if timestamps is None:
+        return None, None
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    digest = hashlib.sha1(
+        '|'.join([str(pk), *(timestamp.isoformat() for timestamp in timestamps)]).encode()).hexdigest()
+    return f'"{digest}"', max(timestamps)
+
+
+def conditional(timestamps_func, lock_func):
+    """
+    Method decorator handling conditional requests on a view method receiving a pk keyword argument.
+    timestamps_func(pk) returns the timestamps the payload depends on, or None if the object does not exist;
+    lock_func(pk) locks the rows they are read from until the end of the transaction.
+    """
+
+    def get_request_validators(request, pk):
+        # condition() asks for the ETag then for the Last-Modified: query the database once per request
+        if getattr(request, '_psycho_validators_pk', None) != pk:
+            request._psycho_validators_pk, request._psycho_validators = pk, get_validators(timestamps_func, pk)
+        return request._psycho_validators
+
+    read_condition = method_decorator(condition(
+        etag_func=lambda request, *args, pk=None, **kwargs: get_request_validators(request, pk)[0],
+        last_modified_func=lambda request, *args, pk=None, **kwargs: get_request_validators(request, pk)[1],
+    ))
+
+    def decorator(method):
+        read_method = read_condition(method)
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method in SAFE_METHODS:
+                return read_method(self, request, *args, **kwargs)
+            pk = kwargs.get('pk')
+            with transaction.atomic():
+                try:
+                    lock_func(pk)
+                except ValidationError:  # Not a valid primary key: let the view answer
+                    pass
+                etag, last_modified = get_validators(timestamps_func, pk)
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=last_modified and timegm(last_modified.utctimetuple()))
+                if response is not None:
+                    return response
+                response = method(self, request, *args, **kwargs)
+                if 200 <= response.status_code < 300:
+                    etag, last_modified = get_validators(timestamps_func, pk)  # After the write
+                    if etag is not None:
+                        response['ETag'] = etag
+                        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,256 @@
+"""
+Fast read path for the list endpoints.
+
+Serializing a page through DRF runs the field machinery for every object: attribute traversal, nested serializers,
+hyperlinks reversed one by one... RowSerializer compiles a (possibly pruned, see psycho.fieldsets) model serializer
+once into a values() projection and a row function building the same representation from the projected rows:
+hyperlinks are formatted from a URL template, strings, UUIDs, choices and primary keys are converted inline, and only
+the remaining field types (dates, decimals...) go through their DRF to_representation. The compiled row serializers
+are cached by serializer class and fieldsets; the scheme and host of the hyperlinks (the request's, see get_base_url)
+are given to each serialize call.
+
+The output is identical to the serializer's (see psycho/tests/test_fastpath.py and the check_fast_serializers
+command). Serializers using a field type or a feature the compiler does not know about are not compiled
+(get_row_serializer returns None) and the views fall back to the regular serializer. Set PSYCHO_FAST_READ_PATH to
+False to disable the fast path.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+from phonenumber_field.serializerfields import PhoneNumberField
+from rest_framework import serializers
+
+from psycho.fields import RecentRelatedField
+from psycho.fieldsets import EXCLUDE_PARAM, FIELDS_PARAM, get_fieldsets
+from psycho.metrics import TimedRepresentationMixin, timed_serialization
+
+# Reversed in place of the primary key to get the URL template of the hyperlinks
+URL_PLACEHOLDER = '00000000-0000-0000-0000-000000000000'
+STRING_FIELDS = (serializers.CharField, serializers.EmailField, PhoneNumberField)
+
+
+class Unsupported(Exception):
+    pass
+
+
+def get_converter(field):
+    """
+    Return the function converting a (not None) projected value to its representation.
+    """
+    if type(field) in STRING_FIELDS:
+        return str
+    if type(field) is serializers.UUIDField and field.uuid_format == 'hex_verbose':
+        return str
+    if type(field) is serializers.IntegerField:
+        return int
+    if type(field) is serializers.ChoiceField:
+        choices = field.choice_strings_to_values
+        return lambda value: value if value == '' else choices.get(str(value), value)
+    if isinstance(field, (serializers.DateTimeField, serializers.DateField, serializers.DecimalField,
+                          serializers.FloatField, serializers.BooleanField)):
+        return field.to_representation
+    raise Unsupported(f'{type(field).__name__} {field.field_name}')
+
+
+def overrides_representation(serializer_class):
+    """
+    Return whether the serializer class customizes Serializer.to_representation (timing it does not count).
+    """
+    for cls in serializer_class.__mro__:
+        if cls is not TimedRepresentationMixin and 'to_representation' in vars(cls):
+            return cls is not serializers.Serializer
+    return False
+
+
+class RowSerializer:
+    """
+    Read-only equivalent of a model serializer working on values() rows. It does not depend on the request: the
+    base_url the hyperlinks are made absolute with is an argument of serialize.
+    """
+
+    def __init__(self, serializer):
+        if not isinstance(serializer, serializers.ModelSerializer):
+            raise Unsupported(type(serializer).__name__)
+        self.model = serializer.Meta.model
+        self.lookups = []
+        self.reverse_relations = []  # (lookup, related objects queryset, foreign key name)
+        self.build = self.compile(serializer, self.model, prefix='')
+
+    def compile(self, serializer, model, prefix):
+        """
+        Return the function building the representation of the serializer from a row and the base URL.
+        """
+        if overrides_representation(type(serializer)):
+            raise Unsupported(f'{type(serializer).__name__}.to_representation')
+
+        steps = []
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            steps.append((field.field_name, self.compile_field(field, model, prefix)))
+
+        def build(row, base_url):
+            return {name: step(row, base_url) for name, step in steps}
+
+        return build
+
+    def add_lookup(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return lookup
+
+    def compile_field(self, field, model, prefix):
+        """
+        Return the function computing the representation of a field from a row and the base URL.
+        """
+        pk_lookup = prefix + model._meta.pk.name
+
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            if field.lookup_field != 'pk':
+                raise Unsupported(f'{field.field_name} lookup_field')
+            try:
+                template = reverse(field.view_name, kwargs={field.lookup_url_kwarg: URL_PLACEHOLDER})
+            except NoReverseMatch:
+                raise Unsupported(field.view_name)
+            url_prefix, url_suffix = template.split(URL_PLACEHOLDER)
+            lookup = self.add_lookup(pk_lookup)
+            return lambda row, base_url: f'{base_url}{url_prefix}{row[lookup]}{url_suffix}'
+
+        lookup = prefix + '__'.join(field.source_attrs)
+
+        if isinstance(field, serializers.ListSerializer):
+            raise Unsupported(f'{field.field_name} (many=True)')
+
+        if isinstance(field, serializers.Serializer):
+            related_model = model._meta.get_field(field.source).related_model
+            nested_pk_lookup = self.add_lookup(f'{lookup}__{related_model._meta.pk.name}')
+            build = self.compile(field, related_model, prefix=f'{lookup}__')
+            return lambda row, base_url: None if row[nested_pk_lookup] is None else build(row, base_url)
+
+        if isinstance(field, serializers.ManyRelatedField):
+            child = field.child_relation
+            if prefix or not isinstance(child, serializers.PrimaryKeyRelatedField) or child.pk_field:
+                raise Unsupported(field.field_name)
+            relation = model._meta.get_field(field.source)
+            if not relation.one_to_many:
+                raise Unsupported(field.field_name)
+            self.add_lookup(pk_lookup)
+            fk_name = relation.field.name
+            if isinstance(field, RecentRelatedField):
+                queryset = field.get_window_queryset(relation.related_model, fk_name)
+            else:
+                queryset = relation.related_model._default_manager.all()
+            self.reverse_relations.append((lookup, queryset, fk_name))
+            return lambda row, base_url: row[lookup]
+
+        if isinstance(field, serializers.RelatedField):
+            if field.use_pk_only_optimization():
+                if getattr(field, 'pk_field', None) or len(field.source_attrs) > 1:
+                    raise Unsupported(field.field_name)
+                self.add_lookup(lookup)
+                return lambda row, base_url: row[lookup]
+            # e.g. StringRelatedField: rebuild the related object from its columns
+            related_model = model._meta.get_field(field.source).related_model
+            attnames = [f.attname for f in related_model._meta.concrete_fields]
+            lookups = [self.add_lookup(f'{lookup}__{attname}') for attname in attnames]
+            related_pk_lookup = f'{lookup}__{related_model._meta.pk.attname}'
+            to_representation = field.to_representation
+
+            def related(row, base_url):
+                if row[related_pk_lookup] is None:
+                    return None
+                return to_representation(related_model.from_db(None, attnames, [row[key] for key in lookups]))
+
+            return related
+
+        if len(field.source_attrs) > 1 and field.default not in (serializers.empty, None):
+            raise Unsupported(f'{field.field_name} default')
+        self.add_lookup(lookup)
+        convert = get_converter(field)
+
+        def value(row, base_url):
+            raw = row[lookup]
+            return None if raw is None else convert(raw)
+
+        return value
+
+    def values(self, queryset, *required):
+        """
+        Return the values() projection of the queryset the rows are built from, plus the required lookups (e.g. the
+        ordering read by a keyset paginator).
+        """
+        return queryset.values(*dict.fromkeys([*self.lookups, *required]))
+
+    def get_reverse_relations(self, rows):
+        """
+        Yield (lookup, queryset of the (foreign key, primary key) pairs) for each reverse relation of the rows.
+        """
+        if not self.reverse_relations:
+            return
+        pks = [row[self.model._meta.pk.name] for row in rows]
+        for lookup, queryset, fk_name in self.reverse_relations:
+            yield lookup, queryset.filter(**{f'{fk_name}__in': pks}).values_list(fk_name, 'pk')
+
+    def attach(self, rows, lookup, pairs):
+        related = {row[self.model._meta.pk.name]: [] for row in rows}
+        for fk_value, pk in pairs:
+            related[fk_value].append(pk)
+        for row in rows:
+            row[lookup] = related[row[self.model._meta.pk.name]]
+
+    def serialize(self, rows, base_url):
+        """
+        Return the representations of the projected rows, fetching the reverse relations in one query each. base_url
+        is the scheme and host the hyperlinks are made absolute with (see get_base_url).
+        """
+        rows = list(rows)
+        for lookup, pairs in self.get_reverse_relations(rows):
+            self.attach(rows, lookup, list(pairs) if rows else [])
+        with timed_serialization():
+            return [self.build(row, base_url) for row in rows]
+
+    async def aserialize(self, rows, base_url):
+        """
+        serialize for the async views: the reverse relations are fetched with the async ORM.
+        """
+        rows = list(rows)
+        for lookup, pairs in self.get_reverse_relations(rows):
+            self.attach(rows, lookup, [pair async for pair in pairs] if rows else [])
+        with timed_serialization():
+            return [self.build(row, base_url) for row in rows]
+
+
+def get_base_url(request):
+    """
+    Return the scheme and host the hyperlinks of the request's responses are made absolute with, as by
+    HyperlinkedIdentityField.
+    """
+    return request.build_absolute_uri('/')[:-1]
+
+
+# Not keyed by the base URL: it comes from the Host header, and the cache would hold one entry per forged host
+@lru_cache(maxsize=256)
+def compile_row_serializer(serializer_class, fields_param, exclude_param):
+    query_params = {}
+    if fields_param is not None:
+        query_params[FIELDS_PARAM] = fields_param
+    if exclude_param is not None:
+        query_params[EXCLUDE_PARAM] = exclude_param
+    fieldsets = get_fieldsets(query_params)
+    kwargs = {key: fieldset for key, fieldset in zip(('fields', 'exclude'), fieldsets) if fieldset is not None}
+    try:
+        return RowSerializer(serializer_class(**kwargs))
+    except Unsupported:
+        return None
+
+
+def get_row_serializer(serializer_class, request):
+    """
+    Return the RowSerializer of the serializer class pruned by the sparse fieldsets of the request, or None if the fast
+    path is disabled or does not support the serializer.
+    """
+    if not getattr(settings, 'PSYCHO_FAST_READ_PATH', True):
+        return None
+    return compile_row_serializer(serializer_class, request.query_params.get(FIELDS_PARAM),
+                                  request.query_params.get(EXCLUDE_PARAM))
@@ -0,0 +1,157 @@
+"""
+Sparse fieldsets: the ?fields= and ?exclude= query parameters select the fields of a serialized payload.
+
+Both parameters are comma separated lists of field names or dotted paths into nested serializers, e.g.
+    ?fields=tracking_id,status,applicant.last_name,applicant.baccalaureate_average
+    ?exclude=status_history_ids,applicant.url
+A nested serializer given without a path (?fields=applicant) is kept (or excluded) whole.
+
+The fieldsets prune the serializer fields (SparseFieldsetsMixin), then optimize_queryset derives from the remaining
+fields the columns to load (only), the relations to join (select_related) and the ones to prefetch, so that unused
+columns and relations are never loaded.
+"""
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from psycho.fields import RecentRelatedField
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def parse_fieldset(value):
+    """
+    Parse "a,b.c,b.d" into {'a': None, 'b': {'c': None, 'd': None}}, None standing for the whole field.
+    """
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        *parents, leaf = path.split('.')
+        for name in parents:
+            if name in node and node[name] is None:  # Already asked for whole
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[leaf] = None
+    return tree
+
+
+def get_fieldsets(query_params):
+    """
+    Return the (fields, exclude) trees asked for in the query params, None when a parameter is missing.
+    """
+    return tuple(parse_fieldset(query_params[param]) if param in query_params else None
+                 for param in (FIELDS_PARAM, EXCLUDE_PARAM))
+
+
+def get_nested_serializer(serializer, name, param, path):
+    field = serializer.fields[name]
+    field = getattr(field, 'child', field)  # many=True
+    if not isinstance(field, serializers.Serializer):
+        raise ValidationError({param: f'{path}{name} is not a nested object.'})
+    return field
+
+
+def prune_fields(serializer, fields=None, exclude=None, path=''):
+    """
+    Remove from the serializer the fields not in the fields tree and the ones in the exclude tree.
+    """
+    for param, tree in ((FIELDS_PARAM, fields), (EXCLUDE_PARAM, exclude)):
+        unknown = [f'{path}{name}' for name in tree or {} if name not in serializer.fields]
+        if unknown:
+            raise ValidationError({param: f"Unknown field(s): {', '.join(unknown)}."})
+
+    if fields is not None:
+        for name in list(serializer.fields):
+            if name not in fields:
+                serializer.fields.pop(name)
+        for name, subtree in fields.items():
+            if subtree is not None:
+                prune_fields(get_nested_serializer(serializer, name, FIELDS_PARAM, path), fields=subtree,
+                             path=f'{path}{name}.')
+
+    for name, subtree in (exclude or {}).items():
+        if name not in serializer.fields:  # Already pruned by fields
+            continue
+        if subtree is None:
+            serializer.fields.pop(name)
+        else:
+            prune_fields(get_nested_serializer(serializer, name, EXCLUDE_PARAM, path), exclude=subtree,
+                         path=f'{path}{name}.')
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin accepting fields and exclude keyword arguments, trees as returned by get_fieldsets.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None or exclude is not None:
+            prune_fields(self, fields, exclude)
+
+
+def get_query_plan(serializer, prefix=''):
+    """
+    Return the (only, select_related, prefetch_related) lookups needed to serialize the fields of a model serializer.
+    """
+    only, related, prefetch = [], [], []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':  # Hyperlinked identity: the primary key is always loaded
+            continue
+        lookup = prefix + '__'.join(field.source_attrs)
+        if isinstance(field, serializers.ListSerializer):
+            prefetch.append(lookup)
+        elif isinstance(field, serializers.Serializer):
+            related.append(lookup)
+            only.append(f'{lookup}__{field.Meta.model._meta.pk.name}')
+            nested_only, nested_related, nested_prefetch = get_query_plan(field, prefix=f'{lookup}__')
+            only += nested_only
+            related += nested_related
+            prefetch += nested_prefetch
+        elif isinstance(field, RecentRelatedField):
+            relation = serializer.Meta.model._meta.get_field(field.source)
+            queryset = field.get_window_queryset(relation.related_model, relation.field.name)
+            prefetch.append(Prefetch(lookup, queryset=queryset))
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(lookup)
+        elif isinstance(field, serializers.RelatedField) and not field.use_pk_only_optimization():
+            # e.g. StringRelatedField: the whole related object, every column (a narrower lookup on the same relation,
+            # e.g. source='user.username', would otherwise restrict the columns loaded)
+            related.append(lookup)
+            related_model = serializer.Meta.model._meta.get_field(field.source_attrs[0]).related_model
+            only += [f'{lookup}__{model_field.name}' for model_field in related_model._meta.concrete_fields]
+        else:
+            if len(field.source_attrs) > 1:  # e.g. source='user.username'
+                related.append(prefix + '__'.join(field.source_attrs[:-1]))
+            only.append(lookup)
+    return only, related, prefetch
+
+
+def optimize_queryset(queryset, serializer, required=(), prune_columns=True):
+    """
+    Join, prefetch and load only what the serializer needs.
+
+    required lists extra lookups to load (e.g. the ordering fields read by a keyset paginator); prune_columns=False
+    loads every column of the queried and joined tables.
+    """
+    serializer = getattr(serializer, 'child', serializer)
+    only, related, prefetch = get_query_plan(serializer)
+    for lookup in required:
+        if '__' in lookup:
+            related.append(lookup.rpartition('__')[0])
+        only.append(lookup)
+
+    if prune_columns:  # The joins of the base queryset may target relations the fieldsets left out
+        queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*dict.fromkeys(related))
+    if prefetch:
+        queryset = queryset.prefetch_related(*dict.fromkeys(prefetch))
+    if prune_columns:
+        queryset = queryset.only(*dict.fromkeys(only))
+    return queryset
@@ -0,0 +1,244 @@
+"""
+Change history on top of django-simple-history, written only when something changed.
+
+simple-history's HistoricalRecords copies the full row into the historical table on every save: a single applicant
+submission (the create, the save(update_fields=['university']) of ApplicantProfileSerializer.create, the save of
+create_user_account) leaves up to three identical-looking snapshots. DiffHistoricalRecords, in the 'diff' mode:
+    - writes a record only when a tracked field (except the ignored_fields, e.g. the auto_now date_updated) changed
+      since the object's last record, and stores the names of the changed fields in history_changed_fields;
+    - with DEFER, coalesces the saves of an object within a transaction into one record holding its final state,
+      and writes the records of the transaction with one bulk INSERT per model once it commits. The saves made in a
+      savepoint rolled back since (an inner atomic block raising) are dropped with it.
+
+The records stay full snapshots, which simple-history's as_of(), diff_against(), revert and admin history views
+read; history_changed_fields is null on the records written by the 'full' mode, the bulk helpers of simple-history
+and the creations. The 'full' mode is simple-history's behavior. Deferred records are written after the commit: a
+rolled back transaction writes none, and a process dying in between loses them.
+
+The compact_history command applies the same rules to the existing records, and drops the old ones (retention).
+"""
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Max
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+
+DEFAULT_SETTINGS = {
+    'MODE': 'diff',
+    'DEFER': True,
+}
+
+
+# The DiffHistoricalRecords of the models, for the compact_history command
+registry = []
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_HISTORY', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def history_enabled():
+    return getattr(settings, 'SIMPLE_HISTORY_ENABLED', True)
+
+
+class HistoricalChangedFields(models.Model):
+    """
+    Base of the historical models of DiffHistoricalRecords.
+    """
+    history_changed_fields = models.JSONField(
+        null=True, blank=True, help_text="Fields changed since the previous record, null when not computed")
+
+    class Meta:
+        abstract = True
+
+
+def merge(records, key, record):
+    """
+    Make the record the pending one of its object: a creation stays a creation.
+    """
+    previous = records.pop(key, None)
+    if previous is not None and previous.history_type == '+':
+        record.history_type = '+'
+    records[key] = record
+
+
+class HistoryBatch:
+    """
+    The historical records added in a transaction at one savepoint level, between two savepoint boundaries. The saves
+    of an object replace its pending record, so that it holds the final state; its deletion gets a record of its own.
+
+    Its commit callback is registered within its savepoint: Django discards it when the savepoint is rolled back,
+    which drops the batch.
+    """
+
+    def __init__(self, savepoint_ids):
+        self.savepoint_ids = savepoint_ids
+        self.records = {}  # (DiffHistoricalRecords, object pk, deletion) -> historical record, in order
+        self.committed = False
+
+    def add(self, history, record):
+        merge(self.records, (history, getattr(record, record.instance_type._meta.pk.attname),
+                             record.history_type == '-'), record)
+
+    def commit(self):
+        self.committed = True
+
+
+def find_commit_callback(connection, func):
+    """
+    Return the entry of the on_commit callback func of the connection, None if it is not registered (or was discarded
+    with a rolled back savepoint).
+
+    Django has no public API to inspect or reorder the on_commit callbacks: this reads
+    BaseDatabaseWrapper.run_on_commit, a list of (savepoint ids, callback, robust) tuples in registration order, and
+    fails loudly on another layout (psycho/tests/test_history.py pins it).
+    """
+    for entry in connection.run_on_commit:
+        if not (isinstance(entry, tuple) and len(entry) == 3 and callable(entry[1])):
+            raise RuntimeError(f'Unexpected on_commit callback entry {entry!r}: the layout of '
+                               f'BaseDatabaseWrapper.run_on_commit changed, see psycho.history.find_commit_callback.')
+        if entry[1] == func:
+            return entry
+    return None
+
+
+class TransactionHistory:
+    """
+    The history batches of a transaction, in order, written once it commits: those of the savepoints rolled back are
+    dropped, the others merged into one record per object.
+    """
+
+    def __init__(self, using):
+        self.batches = []
+        self.pending = True
+        # Robust: a failure to write the history is logged, it does not fail the committed request
+        transaction.on_commit(self.flush, using=using, robust=True)
+
+    def get_batch(self, connection, using):
+        savepoint_ids = tuple(connection.savepoint_ids)
+        # A new batch past each savepoint boundary, so that merging the batches in order keeps the last state
+        if not self.batches or self.batches[-1].savepoint_ids != savepoint_ids:
+            batch = HistoryBatch(savepoint_ids)
+            self.batches.append(batch)
+            transaction.on_commit(batch.commit, using=using)
+            # flush runs after the commit callbacks of the batches, which tell the ones not rolled back
+            entry = find_commit_callback(connection, self.flush)
+            connection.run_on_commit.remove(entry)
+            connection.run_on_commit.append(entry)
+        return self.batches[-1]
+
+    def flush(self):
+        self.pending = False
+        records = {}
+        for batch in self.batches:
+            if batch.committed:
+                for key, record in batch.records.items():
+                    merge(records, key, record)
+        by_history = {}
+        for (history, _, _), record in records.items():
+            by_history.setdefault(history, []).append(record)
+        for history, records in by_history.items():
+            history.write(records)
+
+    def is_registered(self, connection):
+        # The on_commit callbacks of a rolled back transaction (or savepoint) are discarded without being called
+        return find_commit_callback(connection, self.flush) is not None
+
+
+def get_batch(using):
+    """
+    Return the history batch of the current transaction and savepoint on the using database (in an atomic block).
+    """
+    connection = transaction.get_connection(using)
+    history = getattr(connection, 'psycho_history', None)
+    if history is None or not history.pending or not history.is_registered(connection):
+        history = TransactionHistory(using)
+        connection.psycho_history = history
+    return history.get_batch(connection, using)
+
+
+class DiffHistoricalRecords(HistoricalRecords):
+    """
+    HistoricalRecords writing a record only on a change, at most one per object and transaction: see the module
+    docstring. ignored_fields are tracked (and stored) but a change of theirs alone does not make a record.
+    """
+
+    def __init__(self, *args, ignored_fields=(), **kwargs):
+        kwargs.setdefault('bases', (HistoricalChangedFields,))
+        super().__init__(*args, **kwargs)
+        self.ignored_fields = set(ignored_fields)
+
+    def contribute_to_class(self, cls, name):
+        super().contribute_to_class(cls, name)
+        registry.append(self)
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        if get_setting('MODE') == 'full':
+            return super().post_save(instance, created, using=using, **kwargs)
+        if not history_enabled() or hasattr(instance, 'skip_history_when_saving') or kwargs.get('raw', False):
+            return
+        self.add_record(instance, '+' if created else '~', using)
+
+    def post_delete(self, instance, using=None, **kwargs):
+        if get_setting('MODE') == 'full' or self.cascade_delete_history:
+            return super().post_delete(instance, using=using, **kwargs)
+        if history_enabled():
+            self.add_record(instance, '-', using)
+
+    def add_record(self, instance, history_type, using):
+        record = self.build_record(instance, history_type, using)
+        if get_setting('DEFER') and transaction.get_connection(using).in_atomic_block:
+            get_batch(using).add(self, record)
+        else:
+            self.write([record])
+
+    def build_record(self, instance, history_type, using):
+        """
+        Return the unsaved historical record of the instance, as create_historical_record would save it.
+        """
+        manager = getattr(instance, self.manager_name)
+        return manager.model(
+            history_date=getattr(instance, '_history_date', timezone.now()),
+            history_type=history_type,
+            history_user=self.get_history_user(instance),
+            history_change_reason=self.get_change_reason_for_object(instance, history_type, using),
+            **{field.attname: getattr(instance, field.attname) for field in self.fields_included(instance)},
+        )
+
+    def get_compared_fields(self, model):
+        """
+        Return the attnames of the tracked fields of the historical model whose changes make a record.
+        """
+        return [field.attname for field in model.tracked_fields if field.name not in self.ignored_fields]
+
+    def get_changed_fields(self, record, previous):
+        return [attname for attname in self.get_compared_fields(record.__class__)
+                if getattr(record, attname) != getattr(previous, attname)]
+
+    @staticmethod
+    def get_last_records(model, pks):
+        """
+        Return an object pk to last historical record mapping for the given object pks, with one query.
+        """
+        pk_name = model.instance_type._meta.pk.attname
+        last_ids = model.objects.filter(**{f'{pk_name}__in': pks}).values(pk_name).annotate(
+            last_id=Max('history_id')).values('last_id')
+        return {getattr(record, pk_name): record for record in model.objects.filter(history_id__in=last_ids)}
+
+    def write(self, records):
+        """
+        Save the records of the changes: the updates changing nothing since the last record are dropped.
+        """
+        model = records[0].__class__
+        pk_name = model.instance_type._meta.pk.attname
+        updated = [getattr(record, pk_name) for record in records if record.history_type == '~']
+        last_records = self.get_last_records(model, updated) if updated else {}
+        kept = []
+        for record in records:
+            previous = last_records.get(getattr(record, pk_name))
+            if record.history_type == '~' and previous is not None:
+                record.history_changed_fields = self.get_changed_fields(record, previous)
+                if not record.history_changed_fields:
+                    continue
+            kept.append(record)
+        model.objects.bulk_create(kept)
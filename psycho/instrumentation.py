@@ -0,0 +1,163 @@
+"""
+Per request SQL instrumentation: query count, total SQL time and repeated query fingerprints (N+1 suspects).
+
+A single execute wrapper (record_query) is installed on every database connection; it feeds the QueryRecorder
+instances active in the current context. The active recorders are held in a context variable, which follows the
+async views into the threads running their ORM calls. The QueryInstrumentationMiddleware records each request, logs
+the suspected N+1 queries and the query budget overruns (see QUERY_BUDGETS in psycho/urls.py), and exposes the figures
+in response headers when PSYCHO_QUERY_INSTRUMENTATION['HEADERS'] is set (development).
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('psycho.queries')
+
+DEFAULT_SETTINGS = {
+    'HEADERS': False,
+    'DUPLICATE_THRESHOLD': 3,
+}
+
+# Collapse the parts of a statement varying from one execution of the same code path to another
+IN_LIST = re.compile(r'\bIN \((%s|\?)(, ?(%s|\?))*\)', re.IGNORECASE)
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(\.\d+)?\b")
+# A multi-row INSERT (VALUES lists, or UNNEST arrays on PostgreSQL): one chunk of a bulk_create, repeated once per
+# batch of rows rather than once per object
+BULK_INSERT = re.compile(r'\bVALUES\s*\([^()]*\)\s*,\s*\(|\bFROM UNNEST\(', re.IGNORECASE)
+BUDGETED_METHODS = ('GET', 'HEAD')  # See get_query_budget
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_QUERY_INSTRUMENTATION', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def fingerprint(sql):
+    """
+    Normalize a SQL statement so that the executions of a same query with different parameters compare equal.
+    """
+    return LITERAL.sub('?', IN_LIST.sub('IN (...)', sql))
+
+
+active_recorders = ContextVar('psycho_query_recorders', default=())
+
+
+def record_query(execute, sql, params, many, context):
+    recorders = active_recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        for recorder in recorders:
+            recorder.record(sql, duration)
+
+
+def install_wrapper(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        # First, so that the wrappers pushed and popped by connection.execute_wrapper() stay last
+        connection.execute_wrappers.insert(0, record_query)
+
+
+connection_created.connect(install_wrapper, dispatch_uid='psycho_record_query')
+
+
+class QueryRecorder:
+    """
+    Context manager recording the queries executed in the current context (thread or async task).
+    """
+
+    def __init__(self, fingerprints=True):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter() if fingerprints else None  # Off when only the count and time are needed
+
+    def record(self, sql, duration):
+        self.duration += duration
+        self.count += 1
+        if self.fingerprints is not None:
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def __enter__(self):
+        for connection in connections.all(initialized_only=True):  # Connected before this module was imported
+            install_wrapper(connection)
+        self._token = active_recorders.set((*active_recorders.get(), self))
+        return self
+
+    def __exit__(self, *exc_info):
+        active_recorders.reset(self._token)
+
+    def repeated(self, threshold=None):
+        """
+        Return the (fingerprint, count) pairs executed at least threshold times, most repeated first. The chunks of a
+        bulk insert are not reported.
+        """
+        threshold = threshold or get_setting('DUPLICATE_THRESHOLD')
+        return [(sql, count) for sql, count in self.fingerprints.most_common()
+                if count >= threshold and not (sql.startswith('INSERT') and BULK_INSERT.search(sql))]
+
+
+def get_query_budget(view_name, method='GET'):
+    """
+    Return the query budget of a route (by its namespaced name, e.g. "psycho:application-list") for the request
+    method, or None. The budgets are those of the reads: the writes to a route (e.g. a POST submission to the
+    application list) have none.
+    """
+    from psycho.urls import QUERY_BUDGETS, app_name
+
+    if method not in BUDGETED_METHODS:
+        return None
+    namespace, _, name = (view_name or '').rpartition(':')
+    return QUERY_BUDGETS.get(name) if namespace == app_name else None
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Record the SQL queries of each request, warn about N+1 suspects and query budget overruns.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.process_response(request, response, recorder)
+
+    async def __acall__(self, request):
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self.process_response(request, response, recorder)
+
+    def process_response(self, request, response, recorder):
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        budget = get_query_budget(view_name, request.method)
+        repeated = recorder.repeated()
+
+        for sql, count in repeated:
+            logger.warning('%s %s: query executed %d times (N+1?): %s', request.method, request.path, count, sql)
+        if budget is not None and recorder.count > budget:
+            logger.warning('%s %s: %d queries, over the %d queries budget of %s', request.method, request.path,
+                           recorder.count, budget, view_name)
+
+        if get_setting('HEADERS'):
+            response['X-DB-Query-Count'] = str(recorder.count)
+            response['X-DB-Time-Ms'] = f'{recorder.duration * 1000:.1f}'
+            response['X-DB-Repeated-Queries'] = str(sum(count for _, count in repeated))
+            if budget is not None:
+                response['X-DB-Query-Budget'] = str(budget)
+        return response
@@ -0,0 +1,99 @@
+"""
+Status lookup by tracking id: the applicants' "where is my application" call.
+
+lookup_status returns a minimal projection of the application (LOOKUP_FIELDS: no applicant data) read with one query
+on the unique tracking_id index, through a read-through cache:
+    - found applications are cached for TIMEOUT seconds, and forgotten once a save or deletion of the application
+      commits (see psycho.signals; the bulk writers forget the tracking ids they touch);
+    - unknown tracking ids are cached as such for NEGATIVE_TIMEOUT seconds, so that probing them does not reach the
+      database; the creation of an application forgets its tracking id as well. Values which cannot be tracking ids
+      (too long) are answered without the cache nor the database.
+
+The entries are kept per database read from, as the response cache does (see psycho.cache.build_key): a replica
+still missing a change cannot serve it to the clients pinned to the primary. Nor is a lookup read from a replica
+within MAX_LAG_SECONDS of a write of the application cached (see psycho.cache.replica_may_fill): it would be the
+status from before the write, served until TIMEOUT after forget ran.
+
+Settings (PSYCHO_STATUS_LOOKUP): ENABLED, TIMEOUT and NEGATIVE_TIMEOUT (seconds). The cache is the one of the
+response cache (PSYCHO_RESPONSE_CACHE['ALIAS']).
+"""
+import hashlib
+
+from django.conf import settings
+
+from psycho.cache import CACHED_VIEWS, KEY_PREFIX, get_cache, mark_written, record, replica_may_fill
+from psycho.models import Application
+from psycho.replicas import get_setting as get_replicas_setting, read_alias
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    'NEGATIVE_TIMEOUT': 30,
+}
+LOOKUP_FIELDS = ['tracking_id', 'status', 'date_submitted', 'date_updated']
+VIEW_NAME = 'application-track'  # Name of the hit/miss counters (see the response_cache_stats command)
+NOT_FOUND = 0  # Cached for the unknown tracking ids: cache.get() returns None on a miss
+
+MAX_LENGTH = Application._meta.get_field('tracking_id').max_length
+
+CACHED_VIEWS.append(VIEW_NAME)
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_STATUS_LOOKUP', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_digest(tracking_id):
+    # Hashed: the tracking ids hold accented letters and the probed values anything, which memcached keys cannot
+    return hashlib.sha1(tracking_id.encode('utf-8')).hexdigest()
+
+
+def build_key(tracking_id, alias):
+    return f'{KEY_PREFIX}:track:{alias or "default"}:{get_digest(tracking_id)}'
+
+
+def fetch_status(tracking_id):
+    """
+    Return the LOOKUP_FIELDS of the application with the tracking id, JSON ready, or None.
+    """
+    row = Application.objects.filter(tracking_id=tracking_id).values(*LOOKUP_FIELDS).first()
+    if row is None:
+        return None
+    return {**row, 'date_submitted': row['date_submitted'].isoformat(), 'date_updated': row['date_updated'].isoformat()}
+
+
+def lookup_status(tracking_id):
+    """
+    Return the LOOKUP_FIELDS of the application with the tracking id, or None: see the module docstring.
+    """
+    if len(tracking_id) > MAX_LENGTH:
+        return None
+    if not get_setting('ENABLED'):
+        return fetch_status(tracking_id)
+
+    cache = get_cache()
+    key = build_key(tracking_id, read_alias.get())
+    data = cache.get(key)
+    if data is not None:
+        record(VIEW_NAME, 'hit')
+        return data or None
+
+    data = fetch_status(tracking_id)
+    record(VIEW_NAME, 'miss')
+    if not replica_may_fill([f'track:{get_digest(tracking_id)}']):
+        return data
+    if data is None:
+        cache.set(key, NOT_FOUND, timeout=get_setting('NEGATIVE_TIMEOUT'))
+    else:
+        cache.set(key, data, timeout=get_setting('TIMEOUT'))
+    return data
+
+
+def forget(*tracking_ids):
+    """
+    Drop the cached lookups of the tracking ids, whatever the database they were read from.
+    """
+    tracking_ids = [tracking_id for tracking_id in tracking_ids if tracking_id]
+    aliases = [None, *get_replicas_setting('ALIASES')]
+    get_cache().delete_many([build_key(tracking_id, alias) for tracking_id in tracking_ids for alias in aliases])
+    mark_written(*[f'track:{get_digest(tracking_id)}' for tracking_id in tracking_ids])
@@ -0,0 +1,164 @@
+import copy
+import statistics
+import threading
+import time
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from django.test.utils import override_settings
+
+from psycho.management.commands.check_query_budgets import sample_requests
+
+MODES = ('none', 'persistent', 'pool')
+
+
+def pool_is_available():
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return is_psycopg3
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the request latency of the API with the three connection modes of the production settings
+    (DB_CONNECTION_MODE): a new connection per request (none), persistent connections (persistent) and a psycopg
+    connection pool (pool, PostgreSQL with psycopg 3 only).
+
+    The requests are those of check_query_budgets, sent in process by concurrent clients with the response cache and
+    the read replicas disabled. As a server would, each client releases its connection at the end of every request
+    (closed, kept or given back to the pool depending on the mode). Run it against the production database server:
+    connection setup is mostly network round trips and authentication, which a local SQLite file does not have.
+
+    Usage: python manage.py benchmark_db_connections [--threads 8] [--requests 100] [--modes none,persistent,pool]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=100, help='Number of requests per client.')
+        parser.add_argument('--modes', type=str, default=','.join(MODES),
+                            help='Comma separated connection modes to compare.')
+
+    def handle(self, *args, **options):
+        threads, count = options['threads'], options['requests']
+        if threads < 1 or count < 1:
+            raise CommandError('--threads and --requests must be positive integers.')
+        modes = [mode for mode in options['modes'].split(',') if mode]
+        if unknown := set(modes) - set(MODES):
+            raise CommandError(f'Unknown mode(s): {", ".join(sorted(unknown))}. Choose among {", ".join(MODES)}.')
+        if 'pool' in modes and not pool_is_available():
+            self.stdout.write(self.style.WARNING('Skipping the pool mode: it requires PostgreSQL with psycopg 3 and '
+                                                 'psycopg-pool.'))
+            modes.remove('pool')
+
+        urls = [url for _, url in sample_requests()]
+        settings_dict = connections.settings[DEFAULT_DB_ALIAS]
+        original = copy.deepcopy(settings_dict)
+        pool_options = original.get('OPTIONS', {}).get('pool')
+        if not isinstance(pool_options, dict):
+            pool_options = {'min_size': 2, 'max_size': threads}
+
+        results = {}
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver'], PSYCHO_RESPONSE_CACHE={'ENABLED': False},
+                                   PSYCHO_READ_REPLICAS={'ALIASES': []}):
+                Client().get(urls[0])  # Warm up the URL resolver, the serializers...
+                for mode in modes:
+                    self.configure(settings_dict, original, mode, pool_options)
+                    results[mode] = self.run(urls, threads, count)
+                    self.write_result(mode, *results[mode])
+        finally:
+            connection.close()
+            if getattr(connection, 'pool', None) is not None:
+                connection.close_pool()
+            settings_dict.clear()
+            settings_dict.update(original)
+
+        if 'none' in results:
+            baseline = results['none'][1]
+            for mode in modes:
+                if mode != 'none':
+                    self.stdout.write(f'{mode}: p50 {baseline / results[mode][1]:.2f}x faster than none')
+        self.stdout.write(self.style.SUCCESS('✅ Benchmark done.'))
+
+    @staticmethod
+    def configure(settings_dict, original, mode, pool_options):
+        """
+        Switch the default database to a connection mode. The connections of every thread share the settings dict.
+        """
+        connection.close()
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
+        settings_dict.clear()
+        settings_dict.update(copy.deepcopy(original))
+        settings_dict['OPTIONS'].pop('pool', None)
+        settings_dict['CONN_MAX_AGE'] = 0
+        if mode == 'persistent':
+            settings_dict['CONN_MAX_AGE'] = None
+        elif mode == 'pool':
+            settings_dict['OPTIONS']['pool'] = dict(pool_options)
+
+    @staticmethod
+    def run(urls, threads, count):
+        """
+        Return the throughput, the median, 95th and 99th percentile latencies and the number of connections opened.
+        """
+        latencies, errors = [], []
+        lock = threading.Lock()
+        opened = [0]
+
+        def on_connection_created(sender, connection, **kwargs):
+            with lock:
+                opened[0] += 1
+
+        def worker(offset):
+            client = Client()
+            local_latencies = []
+            try:
+                for index in range(count):
+                    url = urls[(offset + index) % len(urls)]
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    local_latencies.append(time.perf_counter() - started)
+                    if response.status_code != 200:
+                        errors.append(f'{url}: HTTP {response.status_code}')
+                    # The test client skips it: close, keep or give back the connection as the server would
+                    close_old_connections()
+            except Exception as e:
+                errors.append(repr(e))
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+
+        connection_created.connect(on_connection_created)
+        started = time.perf_counter()
+        try:
+            workers = [threading.Thread(target=worker, args=(offset,)) for offset in range(threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        finally:
+            connection_created.disconnect(on_connection_created)
+        elapsed = time.perf_counter() - started
+
+        if errors:
+            raise CommandError(f'{len(errors)} request(s) failed, e.g. {errors[0]}')
+        pool = getattr(connection, 'pool', None)
+        if pool is not None:
+            # connection_created is sent for every connection taken from the pool
+            opened[0] = pool.get_stats().get('connections_num', 0)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return len(latencies) / elapsed, percentiles[49], percentiles[94], percentiles[98], opened[0]
+
+    def write_result(self, mode, rps, p50, p95, p99, opened):
+        self.stdout.write(f'{mode:<10} {rps:7.1f} req/s p50 {p50 * 1000:6.1f} ms p95 {p95 * 1000:6.1f} ms '
+                          f'p99 {p99 * 1000:6.1f} ms, {opened} connection(s) opened')
@@ -0,0 +1,85 @@
+import datetime
+import statistics
+import threading
+import time
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from psycho.models import ApplicantProfile, TrackingIdCounter
+from psycho.tracking import get_tracking_id_allocator
+
+
+class Command(BaseCommand):
+    help = """
+    Stress and benchmark the configured tracking ID allocator.
+
+    Several threads allocate tracking IDs concurrently for the same (hot) prefix, whose counter is first moved to
+    the given occupancy. The command fails if two allocations returned the same tracking ID, and reports the
+    allocation latency percentiles.
+
+    Usage: python manage.py benchmark_tracking_ids [--threads 8] [--count 200] [--occupancy 900]
+    """
+
+    prefix = 'ZZ-010100-'  # The prefix of the fake applicant below
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of concurrent threads.')
+        parser.add_argument('--count', type=int, default=200, help='Number of allocations per thread.')
+        parser.add_argument('--occupancy', type=int, default=900,
+                            help='Number of suffixes already taken for the prefix before the run.')
+
+    def handle(self, *args, **options):
+        threads, count, occupancy = options['threads'], options['count'], options['occupancy']
+        allocator = get_tracking_id_allocator()
+        first_value = getattr(allocator, 'first_value', 100)
+        if first_value + occupancy + threads * count - 1 > getattr(allocator, 'max_value', 9999):
+            raise CommandError('The run would exhaust the prefix: lower --occupancy, --threads or --count.')
+
+        TrackingIdCounter.objects.filter(prefix=self.prefix).delete()
+        if occupancy:
+            TrackingIdCounter.objects.create(prefix=self.prefix, last_value=first_value + occupancy - 1)
+
+        applicant = ApplicantProfile(last_name='ZZ', date_of_birth=datetime.date(2000, 1, 1))  # Never saved
+
+        allocated, latencies, errors = [], [], []
+        lock = threading.Lock()
+
+        def worker():
+            local_ids, local_latencies = [], []
+            try:
+                for _ in range(count):
+                    started = time.perf_counter()
+                    local_ids.append(allocator.allocate(applicant))
+                    local_latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+            with lock:
+                allocated.extend(local_ids)
+                latencies.extend(local_latencies)
+
+        self.stdout.write(f'Allocating {threads} x {count} tracking IDs on prefix {self.prefix} '
+                          f'with {occupancy} suffixes taken ...')
+        started = time.perf_counter()
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        TrackingIdCounter.objects.filter(prefix=self.prefix).delete()
+
+        if errors:
+            raise CommandError(f'{len(errors)} thread(s) failed, first error: {errors[0]!r}')
+        duplicates = len(allocated) - len(set(allocated))
+        if duplicates:
+            raise CommandError(f'{duplicates} duplicate tracking ID(s) allocated.')
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(f'{len(allocated)} allocations in {elapsed:.2f}s ({len(allocated) / elapsed:.0f}/s)')
+        self.stdout.write(f'Latency p50={quantiles[49] * 1000:.2f}ms p95={quantiles[94] * 1000:.2f}ms '
+                          f'p99={quantiles[98] * 1000:.2f}ms max={max(latencies) * 1000:.2f}ms')
+        self.stdout.write(self.style.SUCCESS('✅ No duplicate tracking ID.'))
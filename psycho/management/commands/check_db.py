@@ -7,7 +7,10 @@ from django.core.exceptions import ImproperlyConfigured
 
 
 class Command(BaseCommand):
-    help = "Check if the configured database(s) are reachable and correctly configured."
+    help = (
+        "Check if the configured database(s) are reachable and correctly configured, and show how the connections "
+        "are reused (connection pool with its statistics, persistent connections or one connection per request)."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -40,6 +43,7 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.SUCCESS(f"✅ Database '{alias}' is reachable and healthy."))
                 self.stdout.write(f"DB ENGINE: {conn.settings_dict['ENGINE']}")
                 self.stdout.write(f"DB Vendor: {conn.vendor}")
+                self.write_connection_mode(conn)
                 return
             else:
                 self.stderr.write(self.style.ERROR(f"⚠️ Unexpected query result: {result}"))
@@ -60,3 +64,20 @@ class Command(BaseCommand):
                     conn.close()
             except Exception as e:
                 self.stderr.write(self.style.WARNING(f"⚠️ Error closing connection: {e}"))
+
+    def write_connection_mode(self, conn):
+        pool = getattr(conn, "pool", None)  # PostgreSQL with the "pool" option only
+        if pool is None:
+            max_age = conn.settings_dict["CONN_MAX_AGE"]
+            if max_age is None:
+                self.stdout.write("Connections: persistent (never closed)")
+            elif max_age:
+                self.stdout.write(f"Connections: persistent ({max_age}s)")
+            else:
+                self.stdout.write("Connections: one per request")
+            return
+        # The statistics are those of this process' pool: a server process has its own
+        stats = pool.get_stats()
+        self.stdout.write(f"Connections: pool (min {pool.min_size}, max {pool.max_size}, timeout {pool.timeout}s)")
+        for name in sorted(stats):
+            self.stdout.write(f"  {name}: {stats[name]}")
@@ -0,0 +1,72 @@
+from urllib.parse import urlencode
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from psycho.plans import APPLICATION_PLANS
+
+# Sparse fieldsets checked on top of the full payload (see psycho.fieldsets)
+FIELDSETS = [
+    {},
+    {'fields': 'tracking_id,status,applicant.last_name,applicant.baccalaureate_average'},
+    {'fields': 'url,applicant.url,applicant.user,applicant.username,applicant.university'},
+    {'exclude': 'status_history_ids,applicant.university'},
+]
+APPLICANT_FIELDSETS = [
+    {},
+    {'fields': 'url,first_name,user,user_id,university.name'},
+    {'exclude': 'university,date_registered'},
+]
+
+
+def sample_urls(pages):
+    application_list = reverse('psycho:application-list')
+    applicant_list = reverse('psycho:applicant-list')
+    for plan in APPLICATION_PLANS:
+        for fieldset in FIELDSETS:
+            for page in range(1, pages + 1):
+                yield f"{application_list}?{urlencode({**plan, **fieldset, 'page': page, 'page_size': 100})}"
+            yield f"{application_list}?{urlencode({**plan, **fieldset, 'cursor': '', 'page_size': 100})}"
+    for fieldset in APPLICANT_FIELDSETS:
+        for page in range(1, pages + 1):
+            yield f"{applicant_list}?{urlencode({**fieldset, 'page': page})}"
+
+
+class Command(BaseCommand):
+    help = """
+    Check that the fast read path of the list endpoints (psycho.fastpath) renders byte for byte the same responses as
+    the regular serializers, for every supported list plan, a few sparse fieldsets and the first pages of each, on the
+    data of an existing database (psycho/tests/test_fastpath.py checks the serializers on fixtures). The response cache
+    is disabled for the check. Seed the database first.
+
+    Usage: python manage.py check_fast_serializers [--pages 3]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3, help='Number of pages checked per list plan.')
+
+    def handle(self, *args, **options):
+        client = Client()
+        failures = 0
+        checked = 0
+        with override_settings(ALLOWED_HOSTS=['testserver'], PSYCHO_RESPONSE_CACHE={'ENABLED': False}):
+            for url in sample_urls(options['pages']):
+                checked += 1
+                with override_settings(PSYCHO_FAST_READ_PATH=True):
+                    fast = client.get(url, HTTP_ACCEPT='application/json')
+                with override_settings(PSYCHO_FAST_READ_PATH=False):
+                    regular = client.get(url, HTTP_ACCEPT='application/json')
+                if (fast.status_code, fast.content) != (regular.status_code, regular.content):
+                    failures += 1
+                    self.stderr.write(self.style.ERROR(f'❌ {url}'))
+                    self.stderr.write(f'   fast:    {fast.status_code} {fast.content[:500]!r}')
+                    self.stderr.write(f'   regular: {regular.status_code} {regular.content[:500]!r}')
+                elif options['verbosity'] > 1:
+                    self.stdout.write(self.style.SUCCESS(f'✅ {url}'))
+
+        if failures:
+            raise CommandError(f'{failures} response(s) out of {checked} differ between the fast and regular paths.')
+        self.stdout.write(self.style.SUCCESS(f'✅ {checked} responses identical on the fast and regular paths.'))
@@ -0,0 +1,44 @@
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from psycho.testing import assert_query_budget, sample_requests
+from psycho.urls import QUERY_BUDGETS
+
+
+class Command(BaseCommand):
+    help = """
+    Request every route listed in psycho.urls.QUERY_BUDGETS against the current database and fail if one of them runs
+    more SQL queries than its budget (most likely a N+1 query), as psycho/tests/test_query_budgets.py does in the test
+    suite. The response and status lookup caches are disabled for the check.
+    Seed the database first: the lists must have more than one row for a N+1 to show.
+
+    Usage: python manage.py check_query_budgets
+    """
+
+    def handle(self, *args, **options):
+        client = Client()
+        failures = 0
+        checked = 0
+        with override_settings(ALLOWED_HOSTS=['testserver'], PSYCHO_RESPONSE_CACHE={'ENABLED': False},
+                               PSYCHO_STATUS_LOOKUP={'ENABLED': False}):
+            for route_name, url in sample_requests():
+                checked += 1
+                try:
+                    with assert_query_budget(route_name) as recorder:
+                        response = client.get(url)
+                except AssertionError as e:
+                    failures += 1
+                    self.stderr.write(self.style.ERROR(f'❌ {url}'))
+                    self.stderr.write(str(e))
+                    continue
+                if response.status_code != 200:
+                    failures += 1
+                    self.stderr.write(self.style.ERROR(f'❌ {url}: HTTP {response.status_code}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'✅ {url}: {recorder.count}/{QUERY_BUDGETS[route_name]} queries'))
+
+        if failures:
+            raise CommandError(f'{failures} request(s) out of {checked} failed or went over their query budget.')
@@ -0,0 +1,47 @@
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from psycho.plans import APPLICATION_PLANS
+from psycho.testing import explain, get_plan_queryset
+
+
+class Command(BaseCommand):
+    help = """
+    Run EXPLAIN on every supported applications list plan (psycho.plans.APPLICATION_PLANS) and fail if one of them
+    falls back to a sequential scan, as psycho/tests/test_query_plans.py does in the test suite. The command checks
+    the plans against the data of an existing database.
+
+    On PostgreSQL, sequential scans are disabled for the EXPLAIN so that the check does not depend on the table
+    statistics: a plan still showing a "Seq Scan", or sorting a whole index scan, has no usable index. Seed the
+    database first for realistic plans.
+
+    Usage: python manage.py check_query_plans [--database default] [--verbose-plans]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', type=str, default='default', help='Database alias to check.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failing ones.')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        connection = connections[alias]
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Unsupported database vendor: {connection.vendor}')
+
+        failures = 0
+        for params in APPLICATION_PLANS:
+            plan, sequential = explain(get_plan_queryset(params, using=alias))
+
+            label = '&'.join(f'{key}={value}' for key, value in params.items()) or '(default)'
+            if sequential:
+                failures += 1
+                self.stderr.write(self.style.ERROR(f'❌ {label}: sequential scan'))
+                self.stderr.write(plan)
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ {label}'))
+                if options['verbose_plans']:
+                    self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{failures} plan(s) out of {len(APPLICATION_PLANS)} fall back to a sequential scan.')
@@ -0,0 +1,136 @@
+import datetime
+from itertools import groupby
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from psycho.history import registry
+
+
+class Command(BaseCommand):
+    help = """
+    Compact the historical records of the models using psycho.history.DiffHistoricalRecords (ApplicantProfile), as
+    the 'diff' mode would have written them, and optionally drop the old ones.
+
+    For each object, in order:
+        - the records written within --window seconds of each other (the saves of one submission) are coalesced
+          into the last one, which stays a creation if the first one was;
+        - the updates changing no tracked field since the previous record are dropped;
+        - the changed fields of the remaining updates are filled in (history_changed_fields);
+        - with --keep-days, the records older than the retention are dropped but the last of them, which keeps the
+          state of the object at the cutoff (all of them for an object deleted before the cutoff).
+
+    Usage: python manage.py compact_history [--window 1] [--keep-days N] [--batch-size 2000] [--dry-run]
+    Example: python manage.py compact_history --keep-days 365 --dry-run
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', type=float, default=1,
+                            help='Seconds within which the records of an object are coalesced. 0 to disable.')
+        parser.add_argument('--keep-days', type=int, default=None,
+                            help='Drop the records older than this number of days (see above).')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Number of records read per query.')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
+
+    def handle(self, *args, **options):
+        if options['window'] < 0:
+            raise CommandError('The window must be positive.')
+        if options['keep_days'] is not None and options['keep_days'] < 1:
+            raise CommandError('The number of days to keep must be a positive integer.')
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be a positive integer.')
+        self.window = datetime.timedelta(seconds=options['window'])
+        self.cutoff = timezone.now() - datetime.timedelta(days=options['keep_days']) \
+            if options['keep_days'] is not None else None
+        self.dry_run = options['dry_run']
+
+        for history in registry:
+            model = getattr(history.cls, history.manager_name).model
+            self.compact_model(history, model, options['batch_size'])
+
+    def compact_model(self, history, model, batch_size):
+        pk_name = model.instance_type._meta.pk.attname
+        fields = history.get_compared_fields(model)
+        records = model.objects.order_by(pk_name, 'history_date', 'history_id').values(
+            'history_id', 'history_type', 'history_date', 'history_changed_fields', pk_name, *fields)
+
+        self.totals = {'read': 0, 'coalesced': 0, 'unchanged': 0, 'expired': 0, 'filled': 0}
+        self.deletions, self.updates = [], []
+        for _, object_records in groupby(records.iterator(chunk_size=batch_size), key=lambda record: record[pk_name]):
+            self.compact_object(list(object_records), fields)
+            if len(self.deletions) + len(self.updates) >= batch_size:
+                self.write(model)
+        self.write(model)
+
+        verb = 'would be' if self.dry_run else 'were'
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {model.__name__}: {self.totals["read"]} record(s) read; {self.totals["coalesced"]} coalesced, '
+            f'{self.totals["unchanged"]} without change and {self.totals["expired"]} expired record(s) {verb} '
+            f'deleted, the changed fields of {self.totals["filled"]} {verb} filled in.'))
+
+    def compact_object(self, records, fields):
+        self.totals['read'] += len(records)
+
+        # Coalesce the bursts of saves into their last record
+        kept = []
+        for record in records:
+            last = kept[-1] if kept else None
+            if (last is not None and '-' not in (last['history_type'], record['history_type'])
+                    and record['history_date'] - last['burst_start'] <= self.window):
+                kept.pop()
+                self.delete(last, 'coalesced')
+                record['burst_start'] = last['burst_start']
+                if last['history_type'] == '+':
+                    record['history_type'] = '+'
+                    record['changed'] = True
+            else:
+                record['burst_start'] = record['history_date']
+            kept.append(record)
+
+        # Drop the updates changing nothing, fill in the changed fields of the others
+        previous = None
+        compacted = []
+        for record in kept:
+            if record['history_type'] == '~' and previous is not None:
+                changed_fields = [field for field in fields if record[field] != previous[field]]
+                if not changed_fields:
+                    self.delete(record, 'unchanged')
+                    continue
+                if record['history_changed_fields'] != changed_fields:
+                    record['history_changed_fields'] = changed_fields
+                    record['changed'] = True
+                    self.totals['filled'] += 1
+            elif record['history_type'] == '+' and record['history_changed_fields'] is not None:
+                record['history_changed_fields'] = None
+                record['changed'] = True
+            compacted.append(record)
+            previous = record
+
+        # Retention: the last record before the cutoff holds the state of the object at the cutoff
+        if self.cutoff is not None:
+            expired = [record for record in compacted if record['history_date'] < self.cutoff]
+            if expired and expired[-1]['history_type'] != '-':
+                expired.pop()
+            for record in expired:
+                self.delete(record, 'expired')
+                record['changed'] = False
+            compacted = [record for record in compacted if record not in expired]
+
+        self.updates += [record for record in compacted if record.get('changed')]
+
+    def delete(self, record, reason):
+        self.deletions.append(record['history_id'])
+        self.totals[reason] += 1
+
+    def write(self, model):
+        if not self.dry_run and (self.deletions or self.updates):
+            with transaction.atomic():
+                model.objects.filter(history_id__in=self.deletions).delete()
+                model.objects.bulk_update([
+                    model(history_id=record['history_id'], history_type=record['history_type'],
+                          history_changed_fields=record['history_changed_fields'])
+                    for record in self.updates
+                ], ['history_type', 'history_changed_fields'])
+        self.deletions, self.updates = [], []
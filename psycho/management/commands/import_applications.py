@@ -0,0 +1,269 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from simple_history.utils import bulk_create_with_history
+
+from psycho.cache import bump_generations
+from psycho.lookup import forget
+from psycho.models import ApplicantProfile, Application, ApplicationStatusHistory, University
+from psycho.stats import StatsDelta, get_row
+from psycho.tracking import TrackingIdsExhausted, get_tracking_id_allocator
+
+APPLICANT_FIELDS = [
+    'first_name',
+    'last_name',
+    'date_of_birth',
+    'gender',
+    'email',
+    'phone',
+    'degree',
+    'baccalaureate_series',
+    'baccalaureate_average',
+    'baccalaureate_session',
+    'university_field_of_study',
+    'university_average',
+]
+
+SUBMISSION_NOTE = "Status on application submission."
+
+
+class RejectedRow(Exception):
+    """
+    Raised when an input row cannot be imported. The message is written to the reject file.
+    """
+
+
+class Command(BaseCommand):
+    help = """
+    Import applications in bulk from a CSV or JSONL file.
+
+    The input is streamed and processed in batches: each batch is validated in memory, checked for uniqueness
+    conflicts with a handful of queries, then inserted with bulk_create (applicant profiles with their history,
+    applications and their initial status history). Invalid rows are written to a reject file with a reason.
+
+    Usage: python manage.py import_applications <path> [--format csv|jsonl] [--batch-size 1000] [--rejects <path>]
+    Example: python manage.py import_applications drive_2025.csv --rejects drive_2025.rejects.csv
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='The CSV or JSONL file to import.')
+        parser.add_argument('--format', type=str, choices=['csv', 'jsonl'], default=None,
+                            help='The input format. Inferred from the file extension by default.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows inserted per batch.')
+        parser.add_argument('--rejects', type=str, default=None,
+                            help='Where to write rejected rows. Defaults to <path>.rejects.<ext>.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File "{path}" does not exist.')
+        input_format = options['format'] or path.suffix.lstrip('.').lower()
+        if input_format not in ('csv', 'jsonl'):
+            raise CommandError('Cannot infer the input format, use --format csv|jsonl.')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Batch size must be a positive integer.')
+        rejects_path = Path(options['rejects'] or f'{path}.rejects.{input_format}')
+
+        self.imported = 0
+        self.rejected = 0
+        started = time.monotonic()
+
+        with path.open(newline='', encoding='utf-8') as source, \
+                rejects_path.open('w', newline='', encoding='utf-8') as rejects:
+            if input_format == 'csv':
+                reader = csv.DictReader(source)
+                rows = enumerate(reader, start=2)  # Line 1 is the header
+                writer = csv.DictWriter(rejects, fieldnames=[*(reader.fieldnames or []), 'reject_reason'],
+                                        extrasaction='ignore')
+                writer.writeheader()
+                self.write_reject = lambda line, row, reason: writer.writerow({**row, 'reject_reason': reason})
+            else:
+                rows = self.read_jsonl(source)
+                self.write_reject = lambda line, row, reason: rejects.write(
+                    json.dumps({'line': line, 'reject_reason': reason, 'row': row}) + '\n')
+
+            while batch := list(islice(rows, batch_size)):
+                self.import_batch(batch)
+                self.stdout.write(f'{self.imported} imported, {self.rejected} rejected ...')
+
+        # bulk_create does not send the signals invalidating the response cache
+        bump_generations('applications', 'applicants')
+
+        elapsed = time.monotonic() - started
+        rate = (self.imported + self.rejected) / elapsed * 60 if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.imported} application(s) imported, {self.rejected} rejected in {elapsed:.1f}s '
+            f'({rate:.0f} rows/min).'))
+        if self.rejected:
+            self.stdout.write(self.style.WARNING(f'Rejected rows written to "{rejects_path}".'))
+
+    @staticmethod
+    def read_jsonl(source):
+        """
+        Yield (line number, row) pairs from a JSONL stream. Malformed lines are yielded as a string to be rejected.
+        """
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = f'Invalid JSON: {e}'
+            yield line_number, row
+
+    def reject(self, line, row, reason):
+        self.rejected += 1
+        self.write_reject(line, row if isinstance(row, dict) else {}, reason)
+
+    @staticmethod
+    def build_applicant(row):
+        """
+        Build an unsaved, normalized and validated ApplicantProfile from an input row.
+        Uniqueness is not checked here: it is checked for the whole batch at once.
+        """
+        if not isinstance(row, dict):
+            raise RejectedRow(row)
+        data = {field: row.get(field) for field in APPLICANT_FIELDS}
+        data = {field: None if value == '' else value for field, value in data.items()}
+
+        # Same phone preprocessing as the ApplicantProfileSerializer
+        if data['phone'] and not str(data['phone']).startswith('+229'):
+            data['phone'] = '+229' + str(data['phone'])
+
+        applicant = ApplicantProfile(**data)
+        applicant.normalize_fields()
+        try:
+            applicant.full_clean(exclude=['university', 'user'], validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            raise RejectedRow('; '.join(f'{field}: {" ".join(errors)}' for field, errors in e.message_dict.items()))
+        return applicant
+
+    @staticmethod
+    def get_university_name(row):
+        university = row.get('university')
+        if isinstance(university, dict):
+            university = university.get('name')
+        return university.strip() if isinstance(university, str) and university.strip() else None
+
+    @staticmethod
+    def get_status(row):
+        status = row.get('status') or Application.ApplicationStatus.PENDING
+        if status not in Application.ApplicationStatus.values:
+            raise RejectedRow(f'status: "{status}" is not a valid choice.')
+        return status
+
+    @staticmethod
+    def find_conflicts(candidates):
+        """
+        Return the emails, phones and (last_name, date_of_birth) pairs of the candidates which are already taken.
+        """
+        applicants = [applicant for _, _, applicant, _, _ in candidates]
+        emails = {applicant.email for applicant in applicants}
+        phones = {str(applicant.phone) for applicant in applicants}
+        # The cross product over-matches (last_name, date_of_birth) pairs, which is harmless: only pairs that exist
+        # are returned, and it keeps the query flat whatever the batch size.
+        identities = Q(last_name__in={applicant.last_name for applicant in applicants},
+                       date_of_birth__in={applicant.date_of_birth for applicant in applicants})
+
+        taken = ApplicantProfile.objects.filter(Q(email__in=emails) | Q(phone__in=phones) | identities)
+        taken_emails, taken_phones, taken_identities = set(), set(), set()
+        for email, phone, last_name, date_of_birth in taken.values_list('email', 'phone', 'last_name',
+                                                                          'date_of_birth'):
+            taken_emails.add(email)
+            taken_phones.add(str(phone))
+            taken_identities.add((last_name, date_of_birth))
+        return taken_emails, taken_phones, taken_identities
+
+    @staticmethod
+    def resolve_universities(names):
+        """
+        Return a name to University mapping for the given names, creating the missing universities.
+        """
+        universities = {}
+        for university in University.objects.filter(name__in=names).order_by('pk'):
+            universities.setdefault(university.name, university)
+        missing = [University(name=name) for name in names if name not in universities]
+        for university in University.objects.bulk_create(missing):
+            universities[university.name] = university
+        return universities
+
+    def import_batch(self, batch):
+        candidates = []
+        for line, row in batch:
+            try:
+                applicant = self.build_applicant(row)
+                candidates.append((line, row, applicant, self.get_status(row), self.get_university_name(row)))
+            except RejectedRow as e:
+                self.reject(line, row, str(e))
+        if not candidates:
+            return
+
+        taken_emails, taken_phones, taken_identities = self.find_conflicts(candidates)
+        accepted = []
+        for line, row, applicant, status, university_name in candidates:
+            identity = (applicant.last_name, applicant.date_of_birth)
+            if applicant.email in taken_emails:
+                self.reject(line, row, 'This email is already registered.')
+            elif str(applicant.phone) in taken_phones:
+                self.reject(line, row, 'This phone number is already registered.')
+            elif identity in taken_identities:
+                self.reject(line, row, 'The applicant already exists.')
+            else:
+                # Later rows of the same batch conflict with this one
+                taken_emails.add(applicant.email)
+                taken_phones.add(str(applicant.phone))
+                taken_identities.add(identity)
+                accepted.append((line, row, applicant, status, university_name))
+
+        try:
+            with transaction.atomic():
+                self.insert(accepted)
+            self.imported += len(accepted)
+        except (IntegrityError, TrackingIdsExhausted):
+            # A concurrent writer took one of the values, or a prefix has no tracking ID left: fall back to row by
+            # row inserts to isolate the row.
+            for entry in accepted:
+                line, row = entry[:2]
+                try:
+                    with transaction.atomic():
+                        self.insert([entry])
+                    self.imported += 1
+                except IntegrityError as e:
+                    self.reject(line, row, f'Database error while creating applicant profile: {e}')
+                except TrackingIdsExhausted as e:
+                    self.reject(line, row, e.message)
+
+    def insert(self, accepted):
+        universities = self.resolve_universities({name for *_, name in accepted if name})
+        applicants, applications = [], []
+        for _, _, applicant, status, university_name in accepted:
+            applicant.university = universities.get(university_name)
+            applicants.append(applicant)
+            applications.append(Application(applicant=applicant, status=status))
+
+        tracking_ids = get_tracking_id_allocator().allocate_many(applicants)
+        for application, tracking_id in zip(applications, tracking_ids):
+            application.tracking_id = tracking_id
+        bulk_create_with_history(applicants, ApplicantProfile)
+        Application.objects.bulk_create(applications)
+        # bulk_create does not send post_save: log the submission status as handle_application_post_save would.
+        ApplicationStatusHistory.objects.bulk_create([
+            ApplicationStatusHistory(application=application, new_status=application.status, note=SUBMISSION_NOTE)
+            for application in applications
+        ])
+        # Nor does it update the application stats (see psycho.stats)
+        delta = StatsDelta()
+        for application in applications:
+            delta.add(get_row(application.status, application.applicant))
+        delta.apply()
+        # Nor does it forget the unknown tracking ids cached by the status lookups (see psycho.lookup)
+        transaction.on_commit(lambda: forget(*tracking_ids))
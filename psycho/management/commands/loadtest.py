@@ -0,0 +1,307 @@
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+import django
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from psycho import urls
+from psycho.models import AdminProfile, Application, User
+from psycho.seeding import ApplicantGenerator, get_payload, get_universities
+
+# Gated metrics: (result key, True when higher is better). The p99 is recorded and shown but too noisy on a
+# developer machine to fail a run.
+GATED_METRICS = [('p50_ms', False), ('p95_ms', False), ('rps', True)]
+
+
+class Scenario:
+    """
+    Requests of one route: get_request(index) returns the (path, JSON body or None) of the index-th request.
+    """
+
+    def __init__(self, name, route, get_request, method='GET', accept='application/json'):
+        self.name = name
+        self.route = route
+        self.get_request = get_request
+        self.method = method
+        self.accept = accept
+
+
+def fixed(path):
+    return lambda index: (path, None)
+
+
+def build_scenarios(total, seed, writes=True):
+    """
+    Return the scenarios of the load test: every route of psycho.urls, on the first objects found in the database.
+    total is the number of requests each scenario sends (the warm-up included), to build as many unique creations.
+    """
+    application = Application.objects.select_related('applicant').order_by('date_submitted').first()
+    if application is None:
+        raise CommandError('No application found: seed the database first (python manage.py seed_applications).')
+    admin_profile = AdminProfile.objects.order_by('date_created').first()
+    user = User.objects.order_by('pk').first()
+    name = f'{urls.app_name}:'
+
+    scenarios = [
+        Scenario('api-root', 'api-root', fixed(reverse(name + 'api-root'))),
+        Scenario('application-list', 'application-list', fixed(reverse(name + 'application-list'))),
+        Scenario('application-list keyset', 'application-list',
+                 fixed(reverse(name + 'application-list') + '?cursor=&page_size=100&sort_by=-baccalaureate_average')),
+        Scenario('application-list tracking', 'application-list',
+                 fixed(reverse(name + 'application-list') + f'?tracking_id={application.tracking_id}')),
+        Scenario('application-track', 'application-track',
+                 fixed(reverse(name + 'application-track', args=[application.tracking_id]))),
+        Scenario('application-detail', 'application-detail',
+                 fixed(reverse(name + 'application-detail', args=[application.pk]))),
+        Scenario('application-status-history', 'application-status-history',
+                 fixed(reverse(name + 'application-status-history', args=[application.pk]))),
+        Scenario('application-stats', 'application-stats', fixed(reverse(name + 'application-stats'))),
+        Scenario('application-export', 'application-export',
+                 fixed(reverse(name + 'application-export') + '?status=Incomplete'), accept='text/csv'),
+        Scenario('applicant-list', 'applicant-list', fixed(reverse(name + 'applicant-list'))),
+        Scenario('applicant-search', 'applicant-search',
+                 fixed(reverse(name + 'applicant-search') + f'?q={application.applicant.last_name}')),
+        Scenario('applicant-detail', 'applicant-detail',
+                 fixed(reverse(name + 'applicant-detail', args=[application.applicant_id]))),
+        Scenario('adminprofile-list', 'adminprofile-list', fixed(reverse(name + 'adminprofile-list'))),
+        Scenario('async-application-list', 'async-application-list',
+                 fixed(reverse(name + 'async-application-list') + '?page_size=100')),
+        Scenario('async-application-detail', 'async-application-detail',
+                 fixed(reverse(name + 'async-application-detail', args=[application.pk]))),
+        Scenario('async-application-status-history', 'async-application-status-history',
+                 fixed(reverse(name + 'async-application-status-history', args=[application.pk]))),
+    ]
+    if admin_profile is not None:
+        scenarios.append(Scenario('adminprofile-detail', 'adminprofile-detail',
+                                  fixed(reverse(name + 'adminprofile-detail', args=[admin_profile.pk]))))
+    if user is not None:
+        scenarios.append(Scenario('user-detail', 'user-detail', fixed(reverse(name + 'user-detail', args=[user.pk]))))
+    if not writes:
+        return scenarios
+
+    # Writes: new applications and applicants, and status changes on the most recent applications
+    generator = ApplicantGenerator(seed, universities=get_universities())
+    created = generator.unique_applicants(2 * total, graduates=True)
+    applications, applicants = created[:total], created[total:]
+    targets = list(Application.objects.order_by('-date_submitted').values_list('pk', flat=True)[:100])
+    statuses = list(Application.ApplicationStatus.values)
+    scenarios += [
+        Scenario('application-create', 'application-list', lambda index: (
+            reverse(name + 'application-list'), {'applicant': get_payload(applications[index])}), method='POST'),
+        Scenario('applicant-create', 'applicant-list', lambda index: (
+            reverse(name + 'applicant-list'), get_payload(applicants[index])), method='POST'),
+        Scenario('application-partial-update', 'application-detail', lambda index: (
+            reverse(name + 'application-detail', args=[targets[index % len(targets)]]),
+            {'status': statuses[index % len(statuses)]}), method='PATCH'),
+        Scenario('application-bulk-status', 'application-bulk-status', lambda index: (
+            reverse(name + 'application-bulk-status'),
+            {'ids': [str(pk) for pk in targets[index % 10::10]], 'status': statuses[index % len(statuses)]}),
+                 method='POST'),
+    ]
+    return scenarios
+
+
+def get_route_names():
+    return {pattern.name for pattern in urls.urlpatterns if pattern.name}
+
+
+class Command(BaseCommand):
+    help = """
+    Load test every route of psycho/urls.py on a running server at a fixed concurrency, record the throughput and
+    the p50/p95/p99 latencies of each to a JSON file, and compare them to a baseline (regression gate).
+
+    The requests target the first objects of the database: seed it first with seed_applications, with the same
+    --count and --seed for every run compared to the same baseline. The writes (application and applicant creations,
+    status changes) modify the database: use a throwaway one, or --skip-writes. Start the server with the settings
+    to measure, e.g. with the response cache disabled to measure the database work:
+        daphne -b 127.0.0.1 -p 8000 p041725.asgi:application
+
+    A run fails when a request does not succeed, or, with --baseline, when the p50 or p95 latency of a scenario got
+    slower, or its throughput lower, than the baseline's by more than --tolerance. The p99 is recorded and shown but
+    not gated: it is too noisy on a developer machine.
+
+    Usage: python manage.py loadtest [--base-url http://127.0.0.1:8000] [--concurrency 8] [--requests 200]
+           [--warmup 10] [--output <path>] [--baseline <path>] [--tolerance 0.2] [--only <name>] [--skip-writes]
+    Example: python manage.py loadtest --output loadtest_baseline.json
+             python manage.py loadtest --baseline loadtest_baseline.json --output loadtest_latest.json
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', type=str, default='http://127.0.0.1:8000', help='URL of the running server.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=200, help='Number of requests per scenario.')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Number of unrecorded requests sent first by each scenario.')
+        parser.add_argument('--output', type=str, default=None, help='Where to write the results (JSON).')
+        parser.add_argument('--baseline', type=str, default=None, help='Results (JSON) to compare the run to.')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Relative change of a gated metric above which a scenario regressed.')
+        parser.add_argument('--only', type=str, default=None,
+                            help='Comma separated names of the scenarios to run (all by default).')
+        parser.add_argument('--skip-writes', action='store_true', help='Only send read requests.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the generated creation payloads.')
+
+    def handle(self, *args, **options):
+        concurrency, count, warmup = options['concurrency'], options['requests'], options['warmup']
+        if concurrency < 1 or count < 1 or warmup < 0:
+            raise CommandError('--concurrency and --requests must be positive integers, --warmup a natural one.')
+        if options['tolerance'] < 0:
+            raise CommandError('--tolerance must be positive.')
+        baseline = self.read_baseline(options['baseline']) if options['baseline'] else None
+        base_url = options['base_url'].rstrip('/')
+
+        scenarios = build_scenarios(warmup + count, options['seed'], writes=not options['skip_writes'])
+        if uncovered := get_route_names() - {scenario.route for scenario in scenarios}:
+            self.stdout.write(self.style.WARNING(f'Routes without a scenario: {", ".join(sorted(uncovered))}.'))
+        if options['only']:
+            names = set(options['only'].split(','))
+            scenarios = [scenario for scenario in scenarios if scenario.name in names]
+            if not scenarios:
+                raise CommandError(f'No scenario named {options["only"]}.')
+
+        results = {}
+        failures = 0
+        for scenario in scenarios:
+            result = self.run(base_url, scenario, concurrency, count, warmup)
+            results[scenario.name] = result
+            failures += result['errors']
+            self.stdout.write(
+                f'{scenario.name:<34} {result["rps"]:8.1f} req/s p50 {result["p50_ms"]:7.1f} ms '
+                f'p95 {result["p95_ms"]:7.1f} ms p99 {result["p99_ms"]:7.1f} ms'
+                + (self.style.ERROR(f' ({result["errors"]} errors, e.g. {result["first_error"]})')
+                   if result['errors'] else ''))
+
+        report = {
+            'meta': {
+                'date': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'base_url': base_url,
+                'concurrency': concurrency,
+                'requests': count,
+                'warmup': warmup,
+                'applications': Application.objects.count(),
+                'settings': os.environ.get('DJANGO_SETTINGS_MODULE'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'cpus': os.cpu_count(),
+            },
+            'scenarios': results,
+        }
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+            self.stdout.write(f'Results written to "{options["output"]}".')
+
+        regressions = self.compare(report, baseline, options['tolerance']) if baseline else 0
+        if failures:
+            raise CommandError(f'{failures} request(s) failed.')
+        if regressions:
+            raise CommandError(f'{regressions} regression(s) over the {options["tolerance"]:.0%} tolerance.')
+        self.stdout.write(self.style.SUCCESS('✅ Load test done' + (', no regression.' if baseline else '.')))
+
+    @staticmethod
+    def read_baseline(path):
+        try:
+            baseline = json.loads(Path(path).read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read the baseline "{path}": {e}')
+        if not isinstance(baseline, dict) or 'scenarios' not in baseline:
+            raise CommandError(f'"{path}" is not a load test result file.')
+        return baseline
+
+    @staticmethod
+    def fetch(base_url, scenario, index):
+        path, body = scenario.get_request(index)
+        headers = {'Accept': scenario.accept}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(base_url + path, data=data, headers=headers, method=scenario.method),
+                         timeout=60) as response:
+                response.read()
+                error = None
+        except HTTPError as e:
+            error = f'HTTP {e.code} on {scenario.method} {path}'
+        except URLError as e:
+            error = f'{e.reason} on {scenario.method} {path}'
+        return error, time.perf_counter() - started
+
+    def run(self, base_url, scenario, concurrency, count, warmup):
+        for index in range(warmup):
+            self.fetch(base_url, scenario, index)
+
+        indexes = itertools.count(warmup)
+        lock = threading.Lock()
+
+        def next_fetch(_):
+            with lock:
+                index = next(indexes)  # Every creation payload is sent once
+            return self.fetch(base_url, scenario, index)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(next_fetch, range(count)))
+        elapsed = time.perf_counter() - started
+
+        errors = [error for error, _ in outcomes if error]
+        latencies = sorted(latency for _, latency in outcomes)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return {
+            'route': scenario.route,
+            'method': scenario.method,
+            'rps': round(count / elapsed, 2),
+            'p50_ms': round(percentiles[49] * 1000, 2),
+            'p95_ms': round(percentiles[94] * 1000, 2),
+            'p99_ms': round(percentiles[98] * 1000, 2),
+            'errors': len(errors),
+            'first_error': errors[0] if errors else None,
+        }
+
+    def compare(self, report, baseline, tolerance):
+        """
+        Write the change of every metric against the baseline and return the number of gated regressions.
+        """
+        for key in ('concurrency', 'requests', 'applications'):
+            if baseline.get('meta', {}).get(key) != report['meta'][key]:
+                self.stdout.write(self.style.WARNING(
+                    f'The baseline was recorded with {key} {baseline.get("meta", {}).get(key)}, this run with '
+                    f'{report["meta"][key]}: the comparison may not be meaningful.'))
+
+        regressions = 0
+        self.stdout.write('Compared to the baseline:')
+        for name, result in report['scenarios'].items():
+            reference = baseline['scenarios'].get(name)
+            if reference is None:
+                self.stdout.write(f'  {name:<34} new scenario')
+                continue
+            changes, regressed = [], []
+            for metric, higher_is_better in [*GATED_METRICS, ('p99_ms', False)]:
+                if not reference.get(metric):
+                    continue
+                change = result[metric] / reference[metric] - 1
+                changes.append(f'{metric} {change:+.0%}')
+                gated = metric in dict(GATED_METRICS)
+                if gated and (-change if higher_is_better else change) > tolerance:
+                    regressed.append(metric)
+            line = f'  {name:<34} ' + ', '.join(changes)
+            if regressed:
+                regressions += len(regressed)
+                self.stdout.write(self.style.ERROR(f'❌{line[1:]} (regressed: {", ".join(regressed)})'))
+            else:
+                self.stdout.write(line)
+        for name in baseline['scenarios'].keys() - report['scenarios'].keys():
+            self.stdout.write(self.style.WARNING(f'  {name:<34} in the baseline, not run'))
+        return regressions
@@ -0,0 +1,97 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from psycho.models import Application
+
+
+def sample_paths():
+    """
+    Return (label, sync path, async path) for each endpoint having an async version.
+    """
+    application = Application.objects.order_by('date_submitted').first()
+    if application is None:
+        raise CommandError('No application found: seed the database first.')
+    paths = [
+        ('list', reverse('psycho:application-list') + '?page_size=100', reverse('psycho:async-application-list') +
+         '?page_size=100'),
+        ('keyset list', reverse('psycho:application-list') + '?cursor=&page_size=100&sort_by=-baccalaureate_average',
+         reverse('psycho:async-application-list') + '?cursor=&page_size=100&sort_by=-baccalaureate_average'),
+        ('detail', reverse('psycho:application-detail', args=[application.pk]),
+         reverse('psycho:async-application-detail', args=[application.pk])),
+        ('tracking', reverse('psycho:application-list') + f'?tracking_id={application.tracking_id}',
+         reverse('psycho:async-application-list') + f'?tracking_id={application.tracking_id}'),
+        ('status history', reverse('psycho:application-status-history', args=[application.pk]),
+         reverse('psycho:async-application-status-history', args=[application.pk])),
+    ]
+    return paths
+
+
+class Command(BaseCommand):
+    help = """
+    Load test the async read endpoints (psycho.api.async_views) against their sync counterparts on a running server,
+    at several concurrency levels, and report the throughput and the latency percentiles of each.
+
+    Start the server with the worker count to compare first, and disable the response cache (PSYCHO_RESPONSE_CACHE
+    ENABLED False) so that every request reaches the database, e.g.:
+        daphne -b 127.0.0.1 -p 8000 p041725.asgi:application
+
+    Usage: python manage.py loadtest_async_views [--base-url http://127.0.0.1:8000] [--concurrency 1,8,32]
+           [--requests 200]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', type=str, default='http://127.0.0.1:8000', help='URL of the running server.')
+        parser.add_argument('--concurrency', type=str, default='1,8,32',
+                            help='Comma separated numbers of concurrent clients.')
+        parser.add_argument('--requests', type=int, default=200, help='Number of requests per run.')
+        parser.add_argument('--only', type=str, default=None, help='Only run the endpoint with this label.')
+
+    def fetch(self, url):
+        started = time.perf_counter()
+        try:
+            with urlopen(Request(url, headers={'Accept': 'application/json'}), timeout=60) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            status = e.code
+        return status, time.perf_counter() - started
+
+    def run(self, url, concurrency, requests):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self.fetch, [url] * requests))
+        elapsed = time.perf_counter() - started
+        errors = sum(1 for status, _ in results if status != 200)
+        latencies = sorted(latency for _, latency in results)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        return requests / elapsed, percentiles[49], percentiles[94], errors
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/')
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        failures = 0
+
+        for label, sync_path, async_path in sample_paths():
+            if options['only'] and label != options['only']:
+                continue
+            self.stdout.write(f'{label}:')
+            for concurrency in levels:
+                line = []
+                for variant, path in (('sync', sync_path), ('async', async_path)):
+                    self.fetch(base_url + path)  # Warm up
+                    rps, p50, p95, errors = self.run(base_url + path, concurrency, options['requests'])
+                    failures += errors
+                    line.append(f'{variant} {rps:7.1f} req/s p50 {p50 * 1000:6.1f} ms p95 {p95 * 1000:6.1f} ms'
+                                + (f' ({errors} errors)' if errors else ''))
+                self.stdout.write(f'  x{concurrency:<3} ' + ' | '.join(line))
+
+        if failures:
+            raise CommandError(f'{failures} request(s) did not answer 200.')
+        self.stdout.write(self.style.SUCCESS('✅ Load test done.'))
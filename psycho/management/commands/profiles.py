@@ -0,0 +1,156 @@
+import json
+import pstats
+import sys
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+
+from psycho.profiling import HEADER, delete_profile, get_directory, get_setting, list_profiles, make_token
+
+SORT_KEYS = {'tottime': 2, 'cumtime': 3, 'calls': 1}
+
+
+def short_path(filename):
+    """
+    Shorten the file names of the project and of the installed packages.
+    """
+    for base in (str(settings.BASE_DIR), *sorted((path for path in sys.path if path), key=len, reverse=True)):
+        if filename.startswith(base + '/'):
+            return filename[len(base) + 1:]
+    return filename
+
+
+def function_name(function):
+    filename, line, name = function
+    if filename == '~':  # Built-in
+        return name
+    return f'{short_path(filename)}:{line}({name})'
+
+
+class Command(BaseCommand):
+    help = """
+    List the request profiles stored by psycho.profiling.ProfilingMiddleware, show one of them, or add up the hot
+    functions of many (by default all those listed: filter them with --route, --method, --min-ms and --last).
+
+    The hot functions are listed with the number of profiles they show up in, their calls, their own time (tottime)
+    and their time including the functions they call (cumtime), in total and per profiled request.
+
+    Usage: python manage.py profiles [--route NAME] [--method GET] [--min-ms 100] [--last 20]
+                                     [--top 30 [--sort tottime|cumtime|calls]] [--show ID] [--token] [--clear]
+    Examples:
+        python manage.py profiles --token  # A header value: curl -H "X-Profile: <value>" ...
+        python manage.py profiles --route psycho:application-detail --method PATCH --top 30
+        python manage.py profiles --show 20251018T101203.512000-1f2e3d
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--route', help='Only the profiles of this route name (e.g. psycho:application-list).')
+        parser.add_argument('--method', help='Only the profiles of this HTTP method.')
+        parser.add_argument('--min-ms', type=float, default=None, help='Only the requests at least this slow.')
+        parser.add_argument('--last', type=int, default=None, help='Only the most recent profiles, this many.')
+        parser.add_argument('--top', type=int, default=None,
+                            help='Add up the profiles listed and show this many hot functions.')
+        parser.add_argument('--sort', choices=list(SORT_KEYS), default='tottime', help='Hot functions order.')
+        parser.add_argument('--show', metavar='ID', help='Show one profile: its details, hot functions and '
+                                                         'allocations.')
+        parser.add_argument('--token', action='store_true',
+                            help=f'Print a signed {HEADER} header value requesting a profile.')
+        parser.add_argument('--clear', action='store_true', help='Delete the profiles listed.')
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(make_token())
+            self.stdout.write(f"Valid {get_setting('TOKEN_MAX_AGE')}s, send it as the {HEADER} header.")
+            if not get_setting('ENABLED'):
+                self.stdout.write(self.style.WARNING("Profiling is disabled: set PSYCHO_PROFILING['ENABLED']."))
+            return
+        for name in ('last', 'top'):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(f'--{name} must be a positive integer.')
+
+        directory = get_directory()
+        if options['show']:
+            return self.show(directory, options['show'], options['top'] or 20, options['sort'])
+
+        profiles = self.select(list_profiles(directory), options)
+        if not profiles:
+            self.stdout.write(f'No profile in {directory}.')
+            return
+        if options['clear']:
+            for profile in profiles:
+                delete_profile(directory, profile['id'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {len(profiles)} profile(s) deleted.'))
+        elif options['top']:
+            self.write_hot_functions([directory / f"{profile['id']}.prof" for profile in profiles],
+                                     options['top'], options['sort'])
+        else:
+            self.write_list(profiles)
+
+    @staticmethod
+    def select(profiles, options):
+        if options['route']:
+            profiles = [profile for profile in profiles if profile['route'] == options['route']]
+        if options['method']:
+            profiles = [profile for profile in profiles if profile['method'] == options['method'].upper()]
+        if options['min_ms'] is not None:
+            profiles = [profile for profile in profiles if profile['duration_ms'] >= options['min_ms']]
+        if options['last']:
+            profiles = profiles[-options['last']:]
+        return profiles
+
+    def write_list(self, profiles):
+        self.stdout.write(f"{'id':<29} {'method':<7} {'route':<40} {'status':>6} {'ms':>9} {'queries':>7} "
+                          f"{'peak KiB':>9}  query params")
+        for profile in profiles:
+            peak = f"{profile['peak_memory'] / 1024:.0f}" if profile['peak_memory'] is not None else '-'
+            params = '&'.join(f'{key}={value}' for key, values in profile['query_params'].items() for value in values)
+            self.stdout.write(f"{profile['id']:<29} {profile['method']:<7} {profile['route'] or '-':<40} "
+                              f"{profile['status']:>6} {profile['duration_ms']:>9.1f} {profile['queries']:>7} "
+                              f"{peak:>9}  {params}")
+        durations = sorted(profile['duration_ms'] for profile in profiles)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {len(profiles)} profile(s), median {durations[len(durations) // 2]:.1f}ms, '
+            f'max {durations[-1]:.1f}ms.'))
+
+    def write_hot_functions(self, paths, top, sort):
+        # function -> [profiles, calls, tottime, cumtime]
+        totals = {}
+        paths = [path for path in paths if path.exists()]
+        for path in paths:
+            for function, (_, calls, tottime, cumtime, _) in pstats.Stats(str(path)).stats.items():
+                entry = totals.setdefault(function, [0, 0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += calls
+                entry[2] += tottime
+                entry[3] += cumtime
+        count = len(paths)
+        key = SORT_KEYS[sort]
+        self.stdout.write(f'Hot functions of {count} profile(s), by {sort}:')
+        self.stdout.write(f"{'profiles':>8} {'calls':>9} {'tottime ms':>11} {'cumtime ms':>11} "
+                          f"{'tottime/req':>11} {'cumtime/req':>11}  function")
+        for function, (profiles, calls, tottime, cumtime) in sorted(
+                totals.items(), key=lambda item: item[1][key], reverse=True)[:top]:
+            self.stdout.write(f'{profiles:>8} {calls:>9} {tottime * 1000:>11.1f} {cumtime * 1000:>11.1f} '
+                              f'{tottime * 1000 / count:>11.2f} {cumtime * 1000 / count:>11.2f}  '
+                              f'{function_name(function)}')
+
+    def show(self, directory, profile_id, top, sort):
+        path = directory / f'{Path(profile_id).name}.json'
+        if not path.exists():
+            raise CommandError(f'No profile {profile_id} in {directory}.')
+        profile = json.loads(path.read_text())
+        profile_id = profile['id']
+        for name in ('id', 'date', 'method', 'path', 'route', 'query_params', 'status', 'trigger', 'duration_ms',
+                     'queries', 'db_time_ms', 'peak_memory'):
+            self.stdout.write(f'{name:<13} {profile[name]}')
+        self.stdout.write('')
+        self.write_hot_functions([directory / f'{profile_id}.prof'], top, sort)
+        if profile['allocations']:
+            self.stdout.write('')
+            self.stdout.write(f"Largest allocations still held at the response ({profile_id}.tracemalloc):")
+            self.stdout.write(f"{'KiB':>9} {'blocks':>7}  site")
+            for allocation in profile['allocations']:
+                self.stdout.write(f"{allocation['size'] / 1024:>9.1f} {allocation['count']:>7}  "
+                                  f"{short_path(allocation['site'])}")
@@ -0,0 +1,106 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+
+from psycho.accounts import ROLES, AccountProvisioner
+
+
+class Command(BaseCommand):
+    help = """
+    Create the user accounts of existing profiles in bulk from a CSV or JSONL file.
+
+    Each row gives the role of the profile (applicant, hr_manager or admin), its email, the username and the password
+    of the account. The passwords are hashed in a process pool across the cores, and every batch is checked and
+    written with a handful of bulk queries (see psycho/accounts.py). Rejected rows are written, without their
+    password, to a reject file with a reason.
+
+    Usage: python manage.py provision_accounts <path> [--format csv|jsonl] [--role applicant|hr_manager|admin]
+           [--batch-size 500] [--processes N] [--rejects <path>]
+    Example: python manage.py provision_accounts cohort_2025.csv --role applicant
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='The CSV or JSONL file of the accounts to create.')
+        parser.add_argument('--format', type=str, choices=['csv', 'jsonl'], default=None,
+                            help='The input format. Inferred from the file extension by default.')
+        parser.add_argument('--role', type=str, choices=list(ROLES), default=None,
+                            help='The role of the rows without a role column.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of accounts created per batch.')
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Number of password hashing processes. Defaults to the number of cores.')
+        parser.add_argument('--rejects', type=str, default=None,
+                            help='Where to write rejected rows. Defaults to <path>.rejects.<ext>.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'File "{path}" does not exist.')
+        input_format = options['format'] or path.suffix.lstrip('.').lower()
+        if input_format not in ('csv', 'jsonl'):
+            raise CommandError('Cannot infer the input format, use --format csv|jsonl.')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Batch size must be a positive integer.')
+        if options['processes'] is not None and options['processes'] < 1:
+            raise CommandError('The number of processes must be a positive integer.')
+        rejects_path = Path(options['rejects'] or f'{path}.rejects.{input_format}')
+        default_role = options['role']
+
+        created = rejected = 0
+        started = time.monotonic()
+        with path.open(newline='', encoding='utf-8') as source, \
+                rejects_path.open('w', newline='', encoding='utf-8') as rejects, \
+                AccountProvisioner(processes=options['processes']) as provisioner:
+            if input_format == 'csv':
+                reader = csv.DictReader(source)
+                rows = enumerate(reader, start=2)  # Line 1 is the header
+                fieldnames = [name for name in reader.fieldnames or [] if name != 'password']
+                writer = csv.DictWriter(rejects, fieldnames=[*fieldnames, 'reject_reason'], extrasaction='ignore')
+                writer.writeheader()
+                write_reject = lambda line, row, reason: writer.writerow({**row, 'reject_reason': reason})
+            else:
+                rows = self.read_jsonl(source)
+                write_reject = lambda line, row, reason: rejects.write(
+                    json.dumps({'line': line, 'reject_reason': reason, 'row': row}) + '\n')
+            self.stdout.write(f'Hashing the passwords with {provisioner.processes} process(es) ...')
+
+            while batch := list(islice(rows, batch_size)):
+                for _, row in batch:
+                    if isinstance(row, dict) and default_role and not row.get('role'):
+                        row['role'] = default_role
+                reasons = provisioner.provision([row for _, row in batch])
+                for (line, row), reason in zip(batch, reasons):
+                    if reason is None:
+                        created += 1
+                    else:
+                        rejected += 1
+                        row = {key: value for key, value in row.items() if key != 'password'} \
+                            if isinstance(row, dict) else {}
+                        write_reject(line, row, reason)
+                self.stdout.write(f'{created} created, {rejected} rejected ...')
+
+        elapsed = time.monotonic() - started
+        rate = (created + rejected) / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {created} account(s) created, {rejected} rejected in {elapsed:.1f}s ({rate:.1f} accounts/s).'))
+        if rejected:
+            self.stdout.write(self.style.WARNING(f'Rejected rows written to "{rejects_path}".'))
+
+    @staticmethod
+    def read_jsonl(source):
+        """
+        Yield (line number, row) pairs from a JSONL stream. Malformed lines are yielded as a string to be rejected.
+        """
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                row = f'Invalid JSON: {e}'
+            yield line_number, row
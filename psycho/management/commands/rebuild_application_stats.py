@@ -0,0 +1,35 @@
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+
+from psycho.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = """
+    Recompute the application stats counters (ApplicationStats, see psycho/stats.py) from the applications and
+    report the buckets which had drifted. The counters are updated incrementally by every write going through the
+    ORM: run this after writes which bypass it (raw SQL, QuerySet.update() on the applicant fields...), or
+    periodically to check that nothing does.
+
+    Usage: python manage.py rebuild_application_stats [--dry-run] [--check]
+    Example: python manage.py rebuild_application_stats --dry-run --check
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the drift without fixing it.')
+        parser.add_argument('--check', action='store_true', help='Exit with an error if any bucket had drifted.')
+
+    def handle(self, *args, **options):
+        drift = rebuild_stats(dry_run=options['dry_run'])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('✅ The application stats match the applications.'))
+            return
+
+        for (dimension, value), (stored, (count, average_sum)) in sorted(drift.items()):
+            stored = f'{stored[0]} (sum {stored[1]:.2f})' if stored else 'missing'
+            self.stdout.write(f'  {dimension}={value}: {stored} -> {count} (sum {average_sum:.2f})')
+        action = 'found' if options['dry_run'] else 'fixed'
+        message = f'{len(drift)} drifted bucket(s) {action}.'
+        if options['check']:
+            raise CommandError(f'❌ {message}')
+        self.stdout.write(self.style.WARNING(message))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+import psycho.api.views  # noqa: F401 Registers the cached views
+from psycho.cache import CACHED_VIEWS, get_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = """
+    Report the response cache hit/miss ratio of each cached view. Each server process adds its counts every
+    PSYCHO_RESPONSE_CACHE['STATS_FLUSH_INTERVAL'] seconds: the last ones may be missing.
+
+    Usage: python manage.py response_cache_stats [--reset]
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after reporting them.')
+
+    def handle(self, *args, **options):
+        total_hits = total_misses = 0
+        for view_name, (hits, misses) in get_stats(CACHED_VIEWS).items():
+            total_hits += hits
+            total_misses += misses
+            self.stdout.write(f'{view_name:<20} {self.format_ratio(hits, misses)}')
+        self.stdout.write(self.style.SUCCESS(f"{'total':<20} {self.format_ratio(total_hits, total_misses)}"))
+
+        if options['reset']:
+            reset_stats(CACHED_VIEWS)
+            self.stdout.write('Counters reset.')
+
+    @staticmethod
+    def format_ratio(hits, misses):
+        requests = hits + misses
+        ratio = f'{hits / requests:.1%}' if requests else 'n/a'
+        return f'hits={hits} misses={misses} hit ratio={ratio}'
@@ -0,0 +1,103 @@
+import random
+import time
+
+from django.core.management import CommandError
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+from simple_history.utils import bulk_create_with_history
+
+from psycho.cache import bump_generations
+from psycho.lookup import forget
+from psycho.management.commands.import_applications import SUBMISSION_NOTE
+from psycho.models import ApplicantProfile, Application, ApplicationStatusHistory
+from psycho.seeding import ApplicantGenerator, get_universities
+from psycho.stats import StatsDelta, get_row
+from psycho.tracking import TrackingIdsExhausted, get_tracking_id_allocator
+
+REVIEW_NOTE = "Seeded review."
+
+
+class Command(BaseCommand):
+    help = """
+    Fill the database with realistic synthetic applications for local benchmarks and load tests.
+
+    Applicant profiles (with their history), applications, their status history (the submission, then the review for
+    the applications no longer pending) and universities are generated by psycho.seeding and inserted with
+    bulk_create, batch by batch. The generated values respect the unique constraints on email, phone and
+    (last_name, date_of_birth), including against the rows already in the database. The same --seed on the same
+    database gives the same data.
+
+    Usage: python manage.py seed_applications --count N [--batch-size 1000] [--seed 42]
+    Example: python manage.py seed_applications --count 100000 --seed 1
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, required=True, help='Number of applications to create.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of applications inserted per batch.')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Seed of the random generator. A random seed is picked (and shown) by default.')
+
+    def handle(self, *args, **options):
+        count, batch_size = options['count'], options['batch_size']
+        if count < 1:
+            raise CommandError('Count must be a positive integer.')
+        if batch_size < 1:
+            raise CommandError('Batch size must be a positive integer.')
+        seed = options['seed'] if options['seed'] is not None else random.randrange(2 ** 32)
+        self.stdout.write(f'Seeding {count} application(s) with --seed {seed} ...')
+
+        generator = ApplicantGenerator(seed, universities=get_universities())
+        created = 0
+        started = time.monotonic()
+        while created < count:
+            size = min(batch_size, count - created)
+            try:
+                with transaction.atomic():
+                    self.insert(generator, size)
+            except IntegrityError as e:
+                # A concurrent writer took one of the values: the next attempt draws another batch
+                self.stdout.write(self.style.WARNING(f'Batch dropped, retrying: {e}'))
+                continue
+            except ValueError as e:
+                raise CommandError(str(e))
+            except TrackingIdsExhausted as e:
+                raise CommandError(e.message)
+            created += size
+            self.stdout.write(f'{created} created ...')
+
+        # bulk_create does not send the signals invalidating the response cache
+        bump_generations('applications', 'applicants')
+
+        elapsed = time.monotonic() - started
+        rate = created / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {created} application(s) created in {elapsed:.1f}s ({rate:.0f} applications/s).'))
+
+    @staticmethod
+    def insert(generator, size):
+        applicants = generator.unique_applicants(size)
+        applications = [Application(applicant=applicant, status=generator.status()) for applicant in applicants]
+        tracking_ids = get_tracking_id_allocator().allocate_many(applicants)
+        for application, tracking_id in zip(applications, tracking_ids):
+            application.tracking_id = tracking_id
+
+        bulk_create_with_history(applicants, ApplicantProfile)
+        Application.objects.bulk_create(applications)
+        # bulk_create does not send post_save: log the submission as handle_application_post_save would, then the
+        # review of the applications no longer pending, as a partial_update of their status would.
+        histories = []
+        for application in applications:
+            histories.append(ApplicationStatusHistory(
+                application=application, new_status=Application.ApplicationStatus.PENDING, note=SUBMISSION_NOTE))
+            if application.status != Application.ApplicationStatus.PENDING:
+                histories.append(ApplicationStatusHistory(
+                    application=application, old_status=Application.ApplicationStatus.PENDING,
+                    new_status=application.status, note=REVIEW_NOTE))
+        ApplicationStatusHistory.objects.bulk_create(histories)
+        # Nor does it update the application stats (see psycho.stats)
+        delta = StatsDelta()
+        for application in applications:
+            delta.add(get_row(application.status, application.applicant))
+        delta.apply()
+        # Nor does it forget the unknown tracking ids cached by the status lookups (see psycho.lookup)
+        transaction.on_commit(lambda: forget(*tracking_ids))
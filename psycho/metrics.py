@@ -0,0 +1,225 @@
+"""
+Prometheus metrics, served at /metrics in the Prometheus text format.
+
+The MetricsMiddleware measures every request, labelled by route name (the namespaced URL name, "unmatched" for the
+URLs resolving to no view, so that probes cannot grow the label set) and method:
+    - psycho_http_requests_total: requests, also by status code;
+    - psycho_http_request_duration_seconds: latency, from the middleware to the response;
+    - psycho_db_duration_seconds and psycho_db_queries_total: SQL time per request and queries run (see
+      psycho.instrumentation);
+    - psycho_serializer_duration_seconds: time spent turning objects into data (the serializers using
+      TimedRepresentationMixin, the fast read path of psycho.fastpath).
+Business counters:
+    - psycho_submissions_total: application submissions through the API, by outcome (created, conflict: a unique
+      constraint of the applicant profile, invalid, error);
+    - psycho_submission_conflicts_total: the unique constraints hit by the submissions, by field (email, phone,
+      identity: the (last_name, date_of_birth) pair), Application.create_applicant_profile included;
+    - psycho_status_transitions_total: application status changes, by target status (bulk_status included), once
+      their transaction commits.
+
+Several worker processes: set the PROMETHEUS_MULTIPROC_DIR environment variable to an empty directory, writable by
+the workers, before they start (and empty it on each deployment). Each process then writes its metrics to memory
+mapped files there, which the /metrics view adds up on each scrape: no collector process is needed, whichever worker
+serves the scrape. Without it, each process serves its own metrics, which only suits a single process server.
+
+Settings (PSYCHO_METRICS): ENABLED, ALLOWED_IPS (the clients allowed to scrape, by REMOTE_ADDR; None for any) and
+TOKEN (when set, scrapes must send "Authorization: Bearer <TOKEN>"). Behind a reverse proxy on the same host,
+REMOTE_ADDR is the proxy's: do not forward /metrics, or set TOKEN.
+"""
+import hmac
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, multiprocess
+from rest_framework.settings import api_settings
+
+from psycho.instrumentation import QueryRecorder
+
+DEFAULT_SETTINGS = {
+    'ENABLED': True,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+    'TOKEN': None,
+}
+UNMATCHED_ROUTE = 'unmatched'
+# Finer than the default buckets at the low end: most SQL and serialization times are below 5ms
+FAST_BUCKETS = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+
+REQUESTS = Counter('psycho_http_requests', 'HTTP requests', ['route', 'method', 'status'])
+REQUEST_DURATION = Histogram('psycho_http_request_duration_seconds', 'HTTP request latency', ['route', 'method'])
+DB_DURATION = Histogram('psycho_db_duration_seconds', 'SQL time per HTTP request', ['route', 'method'],
+                        buckets=FAST_BUCKETS)
+DB_QUERIES = Counter('psycho_db_queries', 'SQL queries run by the HTTP requests', ['route', 'method'])
+SERIALIZER_DURATION = Histogram('psycho_serializer_duration_seconds', 'Serialization time per HTTP request',
+                                ['route', 'method'], buckets=FAST_BUCKETS)
+SUBMISSIONS = Counter('psycho_submissions', 'Application submissions through the API', ['outcome'])
+SUBMISSION_CONFLICTS = Counter('psycho_submission_conflicts', 'Unique constraints hit by the submissions', ['field'])
+STATUS_TRANSITIONS = Counter('psycho_status_transitions', 'Application status changes', ['status'])
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_METRICS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+# Business counters
+
+def count_on_commit(counter, amount=1, **labels):
+    """
+    Increment the counter once the current transaction commits (right away outside of one).
+    """
+    if amount:
+        transaction.on_commit(lambda: counter.labels(**labels).inc(amount))
+
+
+def get_conflicts(errors, field=None):
+    """
+    Return the fields of the "unique" validation errors found in DRF serializer errors (nested ones included); the
+    non field ones are reported as "identity", the (last_name, date_of_birth) constraint of ApplicantProfile.
+    """
+    if isinstance(errors, dict):
+        return [conflict for name, value in errors.items() for conflict in get_conflicts(value, name)]
+    if isinstance(errors, list):
+        return [conflict for value in errors for conflict in get_conflicts(value, field)]
+    if getattr(errors, 'code', None) == 'unique':
+        return ['identity' if field in (None, api_settings.NON_FIELD_ERRORS_KEY) else field]
+    return []
+
+
+def count_submission(outcome, errors=None):
+    conflicts = get_conflicts(errors) if errors is not None else []
+    if conflicts:
+        outcome = 'conflict'
+        for field in conflicts:
+            SUBMISSION_CONFLICTS.labels(field=field).inc()
+    SUBMISSIONS.labels(outcome=outcome).inc()
+
+
+# Serialization time
+
+class SerializationTimer:
+    def __init__(self):
+        self.duration = 0.0
+        self.depth = 0  # Nested serializers run within the time of their parent
+
+
+active_timer = ContextVar('psycho_serialization_timer', default=None)
+
+
+@contextmanager
+def timed_serialization():
+    """
+    Add the time spent in the block to the serialization time of the current request, nested blocks once.
+    """
+    timer = active_timer.get()
+    if timer is None or timer.depth:
+        yield
+        return
+    timer.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.duration += time.perf_counter() - started
+        timer.depth -= 1
+
+
+class TimedRepresentationMixin:
+    """
+    Serializer mixin counting to_representation in psycho_serializer_duration_seconds.
+    """
+
+    def to_representation(self, instance):
+        with timed_serialization():
+            return super().to_representation(instance)
+
+
+# Requests
+
+class MetricsMiddleware:
+    """
+    Measure each request: see the module docstring. First in MIDDLEWARE, to time the other middlewares too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_setting('ENABLED'):
+            return self.get_response(request)
+        started = time.perf_counter()
+        timer = SerializationTimer()
+        token = active_timer.set(timer)
+        try:
+            with QueryRecorder(fingerprints=False) as recorder:
+                response = self.get_response(request)
+        finally:
+            active_timer.reset(token)
+        self.observe(request, response, time.perf_counter() - started, recorder, timer)
+        return response
+
+    async def __acall__(self, request):
+        if not get_setting('ENABLED'):
+            return await self.get_response(request)
+        started = time.perf_counter()
+        timer = SerializationTimer()
+        token = active_timer.set(timer)
+        try:
+            with QueryRecorder(fingerprints=False) as recorder:
+                response = await self.get_response(request)
+        finally:
+            active_timer.reset(token)
+        self.observe(request, response, time.perf_counter() - started, recorder, timer)
+        return response
+
+    @staticmethod
+    def observe(request, response, duration, recorder, timer):
+        route = request.resolver_match.view_name if request.resolver_match else UNMATCHED_ROUTE
+        REQUESTS.labels(route=route, method=request.method, status=response.status_code).inc()
+        REQUEST_DURATION.labels(route=route, method=request.method).observe(duration)
+        DB_DURATION.labels(route=route, method=request.method).observe(recorder.duration)
+        DB_QUERIES.labels(route=route, method=request.method).inc(recorder.count)
+        SERIALIZER_DURATION.labels(route=route, method=request.method).observe(timer.duration)
+
+
+def get_registry():
+    """
+    Return the registry to expose: the metrics of every process in multiprocess mode, this process' otherwise.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def is_allowed(request):
+    allowed_ips = get_setting('ALLOWED_IPS')
+    if allowed_ips is not None and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        return False
+    token = get_setting('TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    return True
+
+
+def metrics_view(request):
+    """
+    The metrics in the Prometheus text format, for the allowed scrapers.
+    """
+    if not get_setting('ENABLED'):
+        raise Http404
+    if not is_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:24
+
+from django.db import migrations, models
+
+
+def seed_tracking_id_counters(apps, schema_editor):
+    """
+    Start each prefix counter after the highest suffix already handed out by the former random allocation.
+    """
+    Application = apps.get_model('psycho', 'Application')
+    TrackingIdCounter = apps.get_model('psycho', 'TrackingIdCounter')
+
+    last_values = {}
+    for tracking_id in Application.objects.exclude(tracking_id=None).values_list('tracking_id', flat=True).iterator():
+        prefix, _, suffix = tracking_id.rpartition('-')
+        if suffix.isdigit():
+            prefix = f'{prefix}-'
+            last_values[prefix] = max(last_values.get(prefix, 0), int(suffix))
+    TrackingIdCounter.objects.bulk_create(
+        [TrackingIdCounter(prefix=prefix, last_value=last_value) for prefix, last_value in last_values.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0002_sync_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackingIdCounter',
+            fields=[
+                ('prefix', models.CharField(help_text="Tracking ID prefix, e.g. 'DO-200501-'", max_length=10, primary_key=True, serialize=False)),
+                ('last_value', models.PositiveIntegerField(help_text='Last suffix allocated for this prefix')),
+            ],
+        ),
+        migrations.RunPython(seed_tracking_id_counters, migrations.RunPython.noop),
+    ]
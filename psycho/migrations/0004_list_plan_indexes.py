@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0003_tracking_id_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicantprofile',
+            index=models.Index(fields=['degree', 'baccalaureate_series', 'baccalaureate_average'], name='applicant_bac_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicantprofile',
+            index=models.Index(fields=['baccalaureate_average'], name='applicant_bac_average_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['date_submitted'], name='application_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['status', 'date_submitted'], name='application_status_idx'),
+        ),
+    ]
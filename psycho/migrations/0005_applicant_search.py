@@ -0,0 +1,109 @@
+from django.db import migrations
+
+SEARCHED_COLUMNS = [
+    ('psycho_applicantprofile', 'first_name'),
+    ('psycho_applicantprofile', 'last_name'),
+    ('psycho_applicantprofile', 'email'),
+    ('psycho_applicantprofile', 'phone'),
+    ('psycho_application', 'tracking_id'),
+]
+
+# The expression matches the SQL of the icontains lookup, UPPER("column"::text) LIKE UPPER('%q%'), so that the
+# trigram indexes serve it.
+POSTGRESQL_FORWARD = ['CREATE EXTENSION IF NOT EXISTS pg_trgm'] + [
+    f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+    for table, column in SEARCHED_COLUMNS
+]
+POSTGRESQL_BACKWARD = [f'DROP INDEX IF EXISTS {table}_{column}_trgm' for table, column in SEARCHED_COLUMNS]
+
+# The FTS5 table rowid is the applicant profile rowid, so that the triggers update it without scanning.
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE psycho_applicant_search USING fts5(
+        applicant_id UNINDEXED, first_name, last_name, email, phone, tracking_id, tokenize = 'trigram'
+    )
+    """,
+    """
+    INSERT INTO psycho_applicant_search (rowid, applicant_id, first_name, last_name, email, phone, tracking_id)
+    SELECT p.rowid, p.applicant_id, p.first_name, p.last_name, p.email, p.phone, a.tracking_id
+    FROM psycho_applicantprofile p LEFT JOIN psycho_application a ON a.applicant_id = p.applicant_id
+    """,
+    """
+    CREATE TRIGGER psycho_applicant_search_ai AFTER INSERT ON psycho_applicantprofile BEGIN
+        INSERT INTO psycho_applicant_search (rowid, applicant_id, first_name, last_name, email, phone, tracking_id)
+        VALUES (new.rowid, new.applicant_id, new.first_name, new.last_name, new.email, new.phone,
+                (SELECT tracking_id FROM psycho_application WHERE applicant_id = new.applicant_id));
+    END
+    """,
+    """
+    CREATE TRIGGER psycho_applicant_search_au AFTER UPDATE OF first_name, last_name, email, phone
+    ON psycho_applicantprofile BEGIN
+        UPDATE psycho_applicant_search
+        SET first_name = new.first_name, last_name = new.last_name, email = new.email, phone = new.phone
+        WHERE rowid = new.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER psycho_applicant_search_ad AFTER DELETE ON psycho_applicantprofile BEGIN
+        DELETE FROM psycho_applicant_search WHERE rowid = old.rowid;
+    END
+    """,
+    """
+    CREATE TRIGGER psycho_applicant_search_tracking_ai AFTER INSERT ON psycho_application BEGIN
+        UPDATE psycho_applicant_search SET tracking_id = new.tracking_id
+        WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = new.applicant_id);
+    END
+    """,
+    """
+    CREATE TRIGGER psycho_applicant_search_tracking_au AFTER UPDATE OF tracking_id, applicant_id
+    ON psycho_application BEGIN
+        UPDATE psycho_applicant_search SET tracking_id = NULL
+        WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = old.applicant_id);
+        UPDATE psycho_applicant_search SET tracking_id = new.tracking_id
+        WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = new.applicant_id);
+    END
+    """,
+    """
+    CREATE TRIGGER psycho_applicant_search_tracking_ad AFTER DELETE ON psycho_application BEGIN
+        UPDATE psycho_applicant_search SET tracking_id = NULL
+        WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = old.applicant_id);
+    END
+    """,
+]
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS psycho_applicant_search_ai',
+    'DROP TRIGGER IF EXISTS psycho_applicant_search_au',
+    'DROP TRIGGER IF EXISTS psycho_applicant_search_ad',
+    'DROP TRIGGER IF EXISTS psycho_applicant_search_tracking_ai',
+    'DROP TRIGGER IF EXISTS psycho_applicant_search_tracking_au',
+    'DROP TRIGGER IF EXISTS psycho_applicant_search_tracking_ad',
+    'DROP TABLE IF EXISTS psycho_applicant_search',
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        if schema_editor.connection.vendor == 'sqlite' and vendor_statements is SQLITE_FORWARD:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+                if not cursor.fetchone()[0]:
+                    return  # psycho.search falls back to unindexed lookups
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0004_list_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run_statements({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': SQLITE_BACKWARD}),
+        ),
+    ]
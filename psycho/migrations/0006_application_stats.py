@@ -0,0 +1,66 @@
+# Generated by Django 5.2.6 on 2026-10-18 06:48
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+# Dimension -> Application lookup, as in psycho.stats
+DIMENSIONS = {
+    'status': 'status',
+    'degree': 'applicant__degree',
+    'baccalaureate_series': 'applicant__baccalaureate_series',
+    'gender': 'applicant__gender',
+}
+
+
+def seed_application_stats(apps, schema_editor):
+    """
+    Create a bucket for every choice and count the existing applications in them.
+    """
+    Application = apps.get_model('psycho', 'Application')
+    ApplicantProfile = apps.get_model('psycho', 'ApplicantProfile')
+    ApplicationStats = apps.get_model('psycho', 'ApplicationStats')
+
+    buckets = {}
+    for dimension in DIMENSIONS:
+        model = Application if dimension == 'status' else ApplicantProfile
+        for value, _ in model._meta.get_field(dimension).choices:
+            buckets[(dimension, value)] = (0, 0.0)
+
+    applications = Application.objects.order_by()
+    aggregates = {'application_count': Count('pk'), 'average_sum': Sum('applicant__baccalaureate_average')}
+    total = applications.aggregate(**aggregates)
+    buckets[('total', '')] = (total['application_count'], total['average_sum'] or 0.0)
+    for dimension, lookup in DIMENSIONS.items():
+        for value, count, average_sum in applications.values(lookup).annotate(**aggregates).values_list(
+                lookup, 'application_count', 'average_sum'):
+            buckets[(dimension, value or '')] = (count, average_sum or 0.0)
+
+    ApplicationStats.objects.bulk_create([
+        ApplicationStats(dimension=dimension, value=value, count=count, baccalaureate_average_sum=average_sum)
+        for (dimension, value), (count, average_sum) in buckets.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0005_applicant_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(help_text="Grouping of the bucket, e.g. 'status' or 'gender'", max_length=30)),
+                ('value', models.CharField(blank=True, help_text='Value of the dimension counted by the bucket', max_length=20)),
+                ('count', models.IntegerField(default=0, help_text='Number of applications in the bucket')),
+                ('baccalaureate_average_sum', models.FloatField(default=0, help_text="Sum of the applicants' baccalaureate averages")),
+            ],
+            options={
+                'verbose_name_plural': 'Application stats',
+                'constraints': [models.UniqueConstraint(fields=('dimension', 'value'), name='application_stats_unique_bucket')],
+            },
+        ),
+        migrations.RunPython(seed_application_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0006_application_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalapplicantprofile',
+            name='history_changed_fields',
+            field=models.JSONField(blank=True, help_text='Fields changed since the previous record, null when not computed', null=True),
+        ),
+    ]
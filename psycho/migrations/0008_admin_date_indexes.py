@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0007_history_changed_fields'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='applicantprofile',
+            index=models.Index(fields=['date_registered'], name='applicant_registered_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicationstatushistory',
+            index=models.Index(fields=['date_changed'], name='status_history_changed_idx'),
+        ),
+    ]
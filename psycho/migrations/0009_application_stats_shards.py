@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0008_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='applicationstats',
+            name='application_stats_unique_bucket',
+        ),
+        migrations.AddField(
+            model_name='applicationstats',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Row of the bucket the writes are spread over'),
+        ),
+        migrations.AddConstraint(
+            model_name='applicationstats',
+            constraint=models.UniqueConstraint(fields=('dimension', 'value', 'shard'), name='application_stats_unique_shard'),
+        ),
+    ]
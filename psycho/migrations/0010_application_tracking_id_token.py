@@ -0,0 +1,46 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:20
+
+from django.db import migrations, models
+
+TRACKING_ID = models.CharField(blank=True, max_length=20, null=True, unique=True,
+                               verbose_name='A human-readable reference to track the application')
+
+
+def alter_tracking_id(from_length, to_length):
+    def run(apps, schema_editor):
+        # SQLite does not enforce the length, and would rebuild the table, dropping the applicant search triggers on
+        # it (see 0005_applicant_search)
+        if schema_editor.connection.vendor == 'sqlite':
+            return
+        Application = apps.get_model('psycho', 'Application')
+        fields = []
+        for max_length in (from_length, to_length):
+            field = models.CharField(blank=True, max_length=max_length, null=True, unique=True)
+            field.set_attributes_from_name('tracking_id')
+            field.model = Application
+            fields.append(field)
+        schema_editor.alter_field(Application, *fields)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0009_application_stats_shards'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='application',
+                    name='tracking_id',
+                    field=TRACKING_ID,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(alter_tracking_id(14, 20), alter_tracking_id(20, 14)),
+            ],
+        ),
+    ]
@@ -0,0 +1,119 @@
+from django.db import migrations
+
+# A copy of psycho.search.ACCENTED and UNACCENTED, as of this migration
+ACCENTED = ('ÀÁÂÃÄÅÇÈÉÊËÌÍÎÏÑÒÓÔÕÖÙÚÛÜÝàáâãäåçèéêëìíîïñòóôõöùúûüýÿĀ'
+            'āĂăĄąĆćĈĉĊċČčĎďĒēĔĕĖėĘęĚěĜĝĞğĠġĢģĤĥĨĩĪīĬĭĮįİĴĵĶķĹĺĻļĽľ'
+            'ŃńŅņŇňŌōŎŏŐőŔŕŖŗŘřŚśŜŝŞşŠšŢţŤťŨũŪūŬŭŮůŰűŲųŴŵŶŷŸŹźŻżŽžſ')
+UNACCENTED = ('AAAAAACEEEEIIIINOOOOOUUUUYaaaaaaceeeeiiiinooooouuuuyyA'
+              'aAaAaCcCcCcCcDdEeEeEeEeEeGgGgGgGgHhIiIiIiIiIJjKkLlLlLl'
+              'NnNnNnOoOoOoRrRrRrSsSsSsSsTtTtUuUuUuUuUuUuWwYyYZzZzZzs')
+
+SEARCHED_COLUMNS = [
+    ('psycho_applicantprofile', 'first_name'),
+    ('psycho_applicantprofile', 'last_name'),
+    ('psycho_applicantprofile', 'email'),
+    ('psycho_applicantprofile', 'phone'),
+    ('psycho_application', 'tracking_id'),
+]
+
+# The index expressions match the searched expressions of psycho.search, UPPER(psycho_fold("column")), so that the
+# trigram indexes serve them.
+POSTGRESQL_FORWARD = [
+    f"""
+    CREATE OR REPLACE FUNCTION psycho_fold(text) RETURNS text
+    AS $$ SELECT translate($1, '{ACCENTED}', '{UNACCENTED}') $$
+    LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+    """,
+] + [f'DROP INDEX IF EXISTS {table}_{column}_trgm' for table, column in SEARCHED_COLUMNS] + [
+    f'CREATE INDEX IF NOT EXISTS {table}_{column}_fold_trgm ON {table} '
+    f'USING gin (UPPER(psycho_fold({column})) gin_trgm_ops)'
+    for table, column in SEARCHED_COLUMNS
+]
+POSTGRESQL_BACKWARD = [f'DROP INDEX IF EXISTS {table}_{column}_fold_trgm' for table, column in SEARCHED_COLUMNS] + [
+    f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm ON {table} USING gin (UPPER({column}::text) gin_trgm_ops)'
+    for table, column in SEARCHED_COLUMNS
+] + ['DROP FUNCTION IF EXISTS psycho_fold(text)']
+
+
+def sqlite_statements(fold):
+    """
+    Return the statements replacing the triggers of 0005_applicant_search by ones writing fold(value) to the FTS5
+    table, and refilling it. The psycho_fold function is registered on each connection by psycho.search; with an
+    empty fold, the values are written as they are.
+    """
+    triggers = [
+        f"""
+        CREATE TRIGGER psycho_applicant_search_ai AFTER INSERT ON psycho_applicantprofile BEGIN
+            INSERT INTO psycho_applicant_search (rowid, applicant_id, first_name, last_name, email, phone, tracking_id)
+            VALUES (new.rowid, new.applicant_id, {fold}(new.first_name), {fold}(new.last_name), {fold}(new.email),
+                    {fold}(new.phone),
+                    (SELECT {fold}(tracking_id) FROM psycho_application WHERE applicant_id = new.applicant_id));
+        END
+        """,
+        f"""
+        CREATE TRIGGER psycho_applicant_search_au AFTER UPDATE OF first_name, last_name, email, phone
+        ON psycho_applicantprofile BEGIN
+            UPDATE psycho_applicant_search
+            SET first_name = {fold}(new.first_name), last_name = {fold}(new.last_name), email = {fold}(new.email),
+                phone = {fold}(new.phone)
+            WHERE rowid = new.rowid;
+        END
+        """,
+        f"""
+        CREATE TRIGGER psycho_applicant_search_tracking_ai AFTER INSERT ON psycho_application BEGIN
+            UPDATE psycho_applicant_search SET tracking_id = {fold}(new.tracking_id)
+            WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = new.applicant_id);
+        END
+        """,
+        f"""
+        CREATE TRIGGER psycho_applicant_search_tracking_au AFTER UPDATE OF tracking_id, applicant_id
+        ON psycho_application BEGIN
+            UPDATE psycho_applicant_search SET tracking_id = NULL
+            WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = old.applicant_id);
+            UPDATE psycho_applicant_search SET tracking_id = {fold}(new.tracking_id)
+            WHERE rowid = (SELECT rowid FROM psycho_applicantprofile WHERE applicant_id = new.applicant_id);
+        END
+        """,
+    ]
+    return [
+        'DROP TRIGGER IF EXISTS psycho_applicant_search_ai',
+        'DROP TRIGGER IF EXISTS psycho_applicant_search_au',
+        'DROP TRIGGER IF EXISTS psycho_applicant_search_tracking_ai',
+        'DROP TRIGGER IF EXISTS psycho_applicant_search_tracking_au',
+        *triggers,
+        'DELETE FROM psycho_applicant_search',
+        f"""
+        INSERT INTO psycho_applicant_search (rowid, applicant_id, first_name, last_name, email, phone, tracking_id)
+        SELECT p.rowid, p.applicant_id, {fold}(p.first_name), {fold}(p.last_name), {fold}(p.email), {fold}(p.phone),
+               {fold}(a.tracking_id)
+        FROM psycho_applicantprofile p LEFT JOIN psycho_application a ON a.applicant_id = p.applicant_id
+        """,
+    ]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        vendor_statements = statements.get(schema_editor.connection.vendor, [])
+        if schema_editor.connection.vendor == 'sqlite':
+            with schema_editor.connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'psycho_applicant_search'")
+                if cursor.fetchone() is None:
+                    return  # SQLite built without FTS5, see 0005_applicant_search
+        for statement in vendor_statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('psycho', '0010_application_tracking_id_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'postgresql': POSTGRESQL_FORWARD, 'sqlite': sqlite_statements('psycho_fold')}),
+            run_statements({'postgresql': POSTGRESQL_BACKWARD, 'sqlite': sqlite_statements('')}),
+        ),
+    ]
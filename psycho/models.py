@@ -1,14 +1,15 @@
-import random
 import uuid
 
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.models import Group, Permission
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models, IntegrityError
+from django.db import models, IntegrityError, transaction
 from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
-from simple_history.models import HistoricalRecords
+
+from psycho.history import DiffHistoricalRecords
+from psycho.metrics import SUBMISSION_CONFLICTS
 
 
 class NormalizeFieldsMixin:
@@ -148,7 +149,8 @@ class ApplicantProfile(models.Model, NormalizeFieldsMixin):
                                     help_text="Unique identifier for the applicant")
     user = models.OneToOneField(User, null=True, blank=True, on_delete=models.SET_NULL,
                                 related_name='applicant_profile')
-    history = HistoricalRecords()
+    # One record per transaction changing the profile (see psycho/history.py)
+    history = DiffHistoricalRecords(ignored_fields=['date_updated'])
     # Personal history
     first_name = models.CharField("applicant first name", max_length=100, help_text="ApplicantProfile's first name")
     last_name = models.CharField("applicant last name", max_length=100, help_text="ApplicantProfile's last name")
@@ -196,9 +198,18 @@ class ApplicantProfile(models.Model, NormalizeFieldsMixin):
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # On instance load track the loaded values, compared to the saved ones by the post_save handlers
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
     def save(self, *args, **kwargs):
         self.normalize_fields()
-        super().save(*args, **kwargs)
+        # The post_save handlers (application stats) write in the same transaction as the profile
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def create_user_account(self, username, raw_password):
         """
@@ -232,6 +243,14 @@ class ApplicantProfile(models.Model, NormalizeFieldsMixin):
     class Meta:
         ordering = ['-date_registered']
 
+        # Back the list filters and sorts declared in psycho.plans
+        indexes = [
+            models.Index(fields=['degree', 'baccalaureate_series', 'baccalaureate_average'], name='applicant_bac_idx'),
+            models.Index(fields=['baccalaureate_average'], name='applicant_bac_average_idx'),
+            # The default ordering, and the admin date_hierarchy
+            models.Index(fields=['date_registered'], name='applicant_registered_idx'),
+        ]
+
         constraints = [
             models.UniqueConstraint(
                 fields=["last_name", "date_of_birth"],
@@ -339,8 +358,9 @@ class Application(models.Model):
     # Application details
     date_submitted = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
-    # The following field is auto computed from the lastname, the date of birth and random three digits.
-    tracking_id = models.CharField("A human-readable reference to track the application", max_length=14, unique=True,
+    # The following field is auto computed from the lastname, the date of birth, a per prefix counter and a random
+    # token (see psycho.tracking).
+    tracking_id = models.CharField("A human-readable reference to track the application", max_length=20, unique=True,
                                    null=True, blank=True)
 
     def __init__(self, *args, **kwargs):
@@ -365,6 +385,12 @@ class Application(models.Model):
         verbose_name = "Application"
         verbose_name_plural = "Applications"
 
+        # Back the list filters and sorts declared in psycho.plans
+        indexes = [
+            models.Index(fields=['date_submitted'], name='application_submitted_idx'),
+            models.Index(fields=['status', 'date_submitted'], name='application_status_idx'),
+        ]
+
     def create_applicant_profile(self, applicant_profile_data: dict):
         """
         Create an ApplicantProfile associated with a new application.
@@ -396,6 +422,8 @@ class Application(models.Model):
 
         except IntegrityError as e:
             if 'unique constraint' in str(e).lower():
+                field = 'email' if 'email' in str(e) else 'phone' if 'phone' in str(e) else 'identity'
+                SUBMISSION_CONFLICTS.labels(field=field).inc()
                 if 'email' in str(e):
                     raise ValueError("This email is already registered.")
                 elif 'phone' in str(e):
@@ -425,14 +453,49 @@ class Application(models.Model):
                     raise TypeError("Applicant profile data must be a dictionary.")
                 self.applicant = self.create_applicant_profile(applicant_profile_data)
 
+        # The post_save handlers (status history, application stats) write in the same transaction as the application,
+        # and a failed insert gives its tracking ID suffix back
+        with transaction.atomic():
             # Generate tracking ID (based on existing applicant)
-            if not self.tracking_id and self.applicant:
-                while True:  # To enforce the uniqueness of the tracking_id
-                    new_id = f"{self.applicant.last_name[:2]}-{self.applicant.date_of_birth.strftime('%d%m%y')}-{random.randint(100, 999)}"
-                    if not Application.objects.filter(tracking_id=new_id).exists():
-                        self.tracking_id = new_id
-                        break
-        super().save(*args, **kwargs)
+            if self._state.adding and not self.tracking_id and self.applicant:
+                from psycho.tracking import get_tracking_id_allocator
+                self.tracking_id = get_tracking_id_allocator().allocate(self.applicant)
+            super().save(*args, **kwargs)
+
+
+class TrackingIdCounter(models.Model):
+    """
+    Last tracking ID suffix handed out for a tracking ID prefix (last name initials and date of birth).
+    See psycho.tracking for the allocators using it.
+    """
+    prefix = models.CharField(max_length=10, primary_key=True, help_text="Tracking ID prefix, e.g. 'DO-200501-'")
+    last_value = models.PositiveIntegerField(help_text="Last suffix allocated for this prefix")
+
+    def __str__(self):
+        return f'{self.prefix}{self.last_value}'
+
+
+class ApplicationStats(models.Model):
+    """
+    Number of applications and sum of their applicants' baccalaureate averages for one shard of a bucket, e.g. the
+    applications with the status "Accepted". A bucket is the sum of its shards. Maintained incrementally, see
+    psycho.stats.
+    """
+    dimension = models.CharField(max_length=30, help_text="Grouping of the bucket, e.g. 'status' or 'gender'")
+    value = models.CharField(max_length=20, blank=True, help_text="Value of the dimension counted by the bucket")
+    shard = models.PositiveSmallIntegerField(default=0, help_text="Row of the bucket the writes are spread over")
+    count = models.IntegerField(default=0, help_text="Number of applications in the bucket")
+    baccalaureate_average_sum = models.FloatField(default=0, help_text="Sum of the applicants' baccalaureate averages")
+
+    def __str__(self):
+        return f'{self.dimension}={self.value} #{self.shard}: {self.count}'
+
+    class Meta:
+        verbose_name_plural = "Application stats"
+
+        constraints = [
+            models.UniqueConstraint(fields=['dimension', 'value', 'shard'], name='application_stats_unique_shard'),
+        ]
 
 
 class ApplicationStatusHistory(models.Model):
@@ -456,6 +519,11 @@ class ApplicationStatusHistory(models.Model):
         ordering = ['-date_changed']
         verbose_name_plural = "Application status histories"
 
+        indexes = [
+            # The default ordering, and the admin date_hierarchy
+            models.Index(fields=['date_changed'], name='status_history_changed_idx'),
+        ]
+
 
 class Review(models.Model):
     """
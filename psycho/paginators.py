@@ -1,6 +1,119 @@
-from rest_framework.exceptions import NotFound
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+import operator
+from functools import reduce
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound, ValidationError as InvalidParameter
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_ESTIMATED_COUNTS = {
+    'THRESHOLD': 10000,
+}
+
+# Model -> function(alias) returning its exact number of rows from a maintained counter, or None (see psycho.stats)
+MAINTAINED_COUNTS = {}
+
+
+def get_estimated_counts_setting(name):
+    return getattr(settings, 'PSYCHO_ESTIMATED_COUNTS', {}).get(name, DEFAULT_ESTIMATED_COUNTS[name])
+
+
+def is_unfiltered(queryset):
+    """
+    Whether the queryset lists every row of its table, once.
+    """
+    query = queryset.query
+    return not query.where and not query.distinct and not query.is_sliced and not query.combinator \
+        and query.group_by is None
+
+
+def count_table(queryset, threshold):
+    """
+    Return (count, is_estimate) for the whole table of the queryset, in one query: the number of rows from the
+    statistics of PostgreSQL (pg_class.reltuples, as fresh as the last VACUUM or ANALYZE) when it reaches threshold,
+    else an exact COUNT(*), run by the same statement. None when the database offers no statistics (SQLite) or the
+    table is not found.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    with connection.cursor() as cursor:
+        # reltuples is -1 for a table never analyzed (PostgreSQL 14+), which is counted
+        cursor.execute(f'SELECT reltuples, CASE WHEN reltuples < %s THEN (SELECT COUNT(*) FROM {table}) END '
+                       f'FROM pg_class WHERE oid = to_regclass(%s)', [threshold, queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None:  # No such table in the search path
+        return None
+    estimate, count = row
+    if count is not None:
+        return count, False
+    return int(estimate), True
+
+
+def estimate_count(queryset):
+    """
+    Return the number of rows of the queryset as estimated by the query planner, from the table statistics, or None
+    when the database offers none (SQLite). PostgreSQL's estimate is as fresh as the last ANALYZE (autovacuum).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    # The ordering and the columns do not change the number of rows
+    sql, params = queryset.order_by().values('pk').query.get_compiler(using=queryset.db).as_sql()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator sparing the COUNT(*) reading the whole table, or the whole filtered range, on large lists:
+        - unfiltered lists: the maintained counter of the model when there is one (MAINTAINED_COUNTS, exact), else the
+          table statistics when they exceed PSYCHO_ESTIMATED_COUNTS['THRESHOLD'] rows, else COUNT(*), in one query
+          (count_table);
+        - filtered lists: a COUNT(*) stopping at THRESHOLD + 1 rows, exact below THRESHOLD rows; beyond, the planner's
+          estimate (estimate_count), at least THRESHOLD.
+    count_is_estimate tells whether the count is an estimate; with one, the last pages may be empty or missing.
+    """
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        threshold = get_estimated_counts_setting('THRESHOLD')
+        if is_unfiltered(queryset):
+            counter = MAINTAINED_COUNTS.get(queryset.model)
+            count = counter(queryset.db) if counter is not None else None
+            if count is not None:
+                return count
+            counted = count_table(queryset, threshold)
+            if counted is None:
+                return super().count
+            count, self.count_is_estimate = counted
+            return count
+        else:
+            count = queryset.order_by().values('pk')[:threshold + 1].count()
+            if count <= threshold:
+                return count
+            estimate = max(estimate_count(queryset) or 0, threshold)
+        self.count_is_estimate = True
+        return estimate
 
 
 class SafePageNumberPagination(PageNumberPagination):
@@ -16,6 +129,37 @@ class SafePageNumberPagination(PageNumberPagination):
             self.page = None
             return []
 
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for the async views: the count and the page rows are fetched with the async ORM.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        await self.acount(paginator)
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage:
+            # Instead of raising 404, return empty results
+            self.page = None
+            return []
+
+        self.page.object_list = [row async for row in self.page.object_list]
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return list(self.page)
+
+    @staticmethod
+    async def acount(paginator):
+        """
+        Count the rows of the paginator with the async ORM.
+        """
+        paginator.count = await paginator.object_list.acount()  # Paginator.count is a cached property
+
     def get_paginated_response(self, data):
         if self.page is None:  # overflow case
             return Response({
@@ -28,3 +172,220 @@ class SafePageNumberPagination(PageNumberPagination):
         paginated_response = super().get_paginated_response(data)
         paginated_response.data['page_size'] = self.get_page_size(self.request)
         return paginated_response
+
+
+class EstimatedCountMixin:
+    """
+    Page number pagination mixin counting with EstimatedCountPaginator, adding count_is_estimate to the responses.
+    """
+    django_paginator_class = EstimatedCountPaginator
+
+    @staticmethod
+    async def acount(paginator):
+        # The count may run raw SQL: computed in a thread, like the sync views (Paginator.count is a cached property)
+        await sync_to_async(lambda: paginator.count)()
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        count_is_estimate = getattr(self, 'page', None) is not None and self.page.paginator.count_is_estimate
+        data = dict(response.data)
+        response.data = {'count': data.pop('count'), 'count_is_estimate': count_is_estimate, **data}
+        return response
+
+
+class EstimatedCountPagination(EstimatedCountMixin, PageNumberPagination):
+    """
+    PageNumberPagination (the default pagination) with estimated counts on large lists.
+    """
+
+
+class SafeEstimatedCountPagination(EstimatedCountMixin, SafePageNumberPagination):
+    """
+    SafePageNumberPagination with estimated counts on large lists.
+    """
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (a.k.a. seek) pagination over an arbitrary ordering.
+
+    Unlike page number pagination, no COUNT(*) is issued and no OFFSET is scanned: the cursor carries the sort key
+    values of the boundary row, and the adjacent page is fetched with a "row comes after these values" filter. The
+    primary key is always appended to the ordering as a tie-breaker, so the walk is stable on non-unique sort keys.
+
+    Nullable sort keys are ordered NULLS LAST in both directions, so the behaviour is the same on every backend.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        self.ordering = list(ordering or [])
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def get_keys(self, queryset):
+        """
+        Return the ordering as a list of (lookup, descending) pairs, ending with the primary key tie-breaker.
+        """
+        ordering = self.ordering or list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        pk_name = queryset.model._meta.pk.name
+        keys = []
+        for field in ordering:
+            lookup = field.lstrip('-')
+            if lookup not in ('pk', pk_name):
+                keys.append((lookup, field.startswith('-')))
+        keys.append((pk_name, keys[-1][1] if keys else False))
+        return keys
+
+    @staticmethod
+    def resolve_field(model, lookup):
+        """
+        Return the model field targeted by a (possibly related) lookup such as "applicant__last_name".
+        """
+        *path, name = lookup.split('__')
+        for part in path:
+            model = model._meta.get_field(part).related_model
+            if model is None:
+                raise FieldDoesNotExist(f"'{part}' is not a relation.")
+        return model._meta.get_field(name)
+
+    @staticmethod
+    def get_value(instance, lookup):
+        if isinstance(instance, dict):  # A values() row
+            instance = instance[lookup]
+        else:
+            for part in lookup.split('__'):
+                if instance is None:
+                    return None
+                instance = getattr(instance, part)
+        if instance is None or isinstance(instance, (bool, int, float, str)):
+            return instance
+        if hasattr(instance, 'isoformat'):  # date and datetime
+            return instance.isoformat()
+        return str(instance)  # UUID, PhoneNumber...
+
+    def encode_cursor(self, instance, reverse):
+        position = [self.get_value(instance, lookup) for lookup, _ in self.keys]
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        """
+        Return (position, reverse) from the request cursor, or (None, False) for the first page. A cursor which was
+        not encoded by this pagination (tampered, or for another ordering) is a 400.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            raw_position, reverse = payload['p'], bool(payload['r'])
+            if not isinstance(raw_position, list) or len(raw_position) != len(self.keys):
+                raise ValueError("Cursor does not match the ordering.")
+            position = [
+                None if value is None else self.resolve_field(self.model, lookup).to_python(value)
+                for (lookup, _), value in zip(self.keys, raw_position)
+            ]
+        except (TypeError, ValueError, KeyError, AttributeError, ValidationError, binascii.Error):
+            raise InvalidParameter({self.cursor_query_param: self.invalid_cursor_message})
+        return position, reverse
+
+    def get_seek_filter(self, position, reverse):
+        """
+        Build the Q object selecting the rows strictly after (or before, when walking backward) the given position.
+        """
+        clauses = []
+        same_prefix = Q()
+        for (lookup, descending), value in zip(self.keys, position):
+            greater = descending == reverse
+            if value is None:
+                # NULLs sort last: nothing follows them going forward, every non null precedes them going backward.
+                beyond = Q(**{f'{lookup}__isnull': False}) if reverse else Q(pk__in=[])
+                same = Q(**{f'{lookup}__isnull': True})
+            else:
+                beyond = Q(**{f'{lookup}__{"gt" if greater else "lt"}': value})
+                if not reverse:
+                    beyond |= Q(**{f'{lookup}__isnull': True})
+                same = Q(**{lookup: value})
+            clauses.append(same_prefix & beyond)
+            same_prefix &= same
+        return reduce(operator.or_, clauses)
+
+    def get_order_by(self, reverse):
+        nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        return [
+            F(lookup).asc(**nulls) if descending == reverse else F(lookup).desc(**nulls)
+            for lookup, descending in self.keys
+        ]
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Set the pagination up for the request and return (page queryset, position, reverse).
+        """
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        try:
+            self.keys = self.get_keys(queryset)
+            for lookup, _ in self.keys:
+                self.resolve_field(self.model, lookup)
+        except FieldDoesNotExist as e:
+            raise NotFound(str(e))
+
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position, reverse))
+
+        # One extra row tells whether there is a further page, without counting.
+        return queryset.order_by(*self.get_order_by(reverse))[:self.page_size + 1], position, reverse
+
+    def get_page(self, results, position, reverse):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.first, self.last = (results[0], results[-1]) if results else (None, None)
+        return results
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset, position, reverse = self.get_page_queryset(queryset, request)
+        return self.get_page(list(queryset), position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset for the async views.
+        """
+        queryset, position, reverse = self.get_page_queryset(queryset, request)
+        return self.get_page([row async for row in queryset], position, reverse)
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first is None:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "page_size": self.page_size,
+            "results": data,
+        })
@@ -0,0 +1,35 @@
+"""
+Supported filter and sort plans for the applications list.
+
+Every filter and sort key declared here is backed by an index (see the Meta.indexes of Application and
+ApplicantProfile). Sort keys which are not declared are rejected by the API instead of being handed to order_by.
+psycho/tests/test_query_plans.py (and the check_query_plans command, on an existing database) runs EXPLAIN on each of
+the APPLICATION_PLANS and fails on a sequential scan.
+"""
+
+# Query parameter -> Application lookup
+APPLICATION_FILTERS = {
+    'status': 'status',
+    'degree': 'applicant__degree',
+    'baccalaureate_series': 'applicant__baccalaureate_series',
+}
+
+# sort_by key -> Application lookup
+APPLICATION_SORTS = {
+    'date_submitted': 'date_submitted',  # application_submitted_idx, application_status_idx
+    'status': 'status',  # application_status_idx
+    'last_name': 'applicant__last_name',  # applicant_unique_lower_last_name_date_of_birth
+    'baccalaureate_average': 'applicant__baccalaureate_average',  # applicant_bac_average_idx, applicant_bac_idx
+}
+
+# The filter/sort combinations the HR dashboard relies on, as list query parameters.
+APPLICATION_PLANS = [
+    {},
+    {'sort_by': '-date_submitted'},
+    {'status': 'Pending'},
+    {'status': 'Pending', 'sort_by': '-date_submitted'},
+    {'sort_by': 'status,date_submitted'},
+    {'sort_by': 'last_name'},
+    {'sort_by': '-baccalaureate_average'},
+    {'degree': 'BACHELOR', 'baccalaureate_series': 'D', 'sort_by': '-baccalaureate_average'},
+]
@@ -0,0 +1,238 @@
+"""
+On-demand request profiling, for the API clients the debug toolbar cannot serve (staging).
+
+The ProfilingMiddleware profiles the requests carrying a valid signed X-Profile header (see make_token and the
+profiles command: the tokens are signed with SECRET_KEY and expire after TOKEN_MAX_AGE seconds) and a SAMPLE_RATE
+share of the others. For each profiled request it stores in DIRECTORY, under an id returned in the X-Profile-Id
+response header:
+    - <id>.prof: the cProfile statistics (pstats.Stats, snakeviz... read it);
+    - <id>.tracemalloc: the tracemalloc snapshot of the memory allocated during the request and still held when the
+      response is returned (tracemalloc.Snapshot.load);
+    - <id>.json: the route, method, path and query parameters, status code, duration, SQL queries, allocation peak
+      and largest allocation sites.
+The profiles command lists them and adds up the hot functions of many profiles. The MAX_PROFILES most recent
+profiles are kept.
+
+Only the requests served by WSGI (runserver, p041725.wsgi) are profiled. Under ASGI (daphne, p041725.asgi) the view
+runs in a sync_to_async thread while the middleware runs in the event loop, and cProfile records either the event loop
+thread alone (the view missing, up to Python 3.11) or every thread of the process (from 3.12): the middleware leaves
+the requests alone and logs a warning instead, at startup and for each request sending an X-Profile header. Serve the
+WSGI application of the instance to profile, with one thread per process (e.g. gunicorn --threads 1): from Python 3.12
+cProfile records the other threads of the process as well, the requests served concurrently by a threaded server.
+
+One request is profiled at a time per process: the other requests are not profiled meanwhile. tracemalloc sees the
+whole process. The time spent streaming a response body (the export) is not profiled.
+
+Settings (PSYCHO_PROFILING): ENABLED, SAMPLE_RATE (0 to 1), DIRECTORY, TOKEN_MAX_AGE (seconds), MAX_PROFILES,
+TRACEMALLOC (take the allocation snapshots) and TRACEMALLOC_FRAMES (frames kept per allocation).
+"""
+import cProfile
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+
+from psycho.instrumentation import QueryRecorder
+
+logger = logging.getLogger('psycho.profiling')
+
+DEFAULT_SETTINGS = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.0,
+    'DIRECTORY': 'profiles',
+    'TOKEN_MAX_AGE': 3600,
+    'MAX_PROFILES': 500,
+    'TRACEMALLOC': True,
+    'TRACEMALLOC_FRAMES': 10,
+}
+HEADER = 'X-Profile'
+ID_HEADER = 'X-Profile-Id'
+SALT = 'psycho.profiling'
+TOP_ALLOCATIONS = 20  # Allocation sites summed up in the .json file
+
+# Held while a request is profiled: cProfile and tracemalloc cannot profile two requests of a process apart
+profiling_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_PROFILING', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def get_directory():
+    return Path(settings.BASE_DIR) / get_setting('DIRECTORY')  # An absolute DIRECTORY replaces BASE_DIR
+
+
+def make_token():
+    """
+    Return a value of the X-Profile header, valid TOKEN_MAX_AGE seconds.
+    """
+    return signing.TimestampSigner(salt=SALT).sign(uuid.uuid4().hex)
+
+
+def is_valid_token(token):
+    try:
+        signing.TimestampSigner(salt=SALT).unsign(token, max_age=get_setting('TOKEN_MAX_AGE'))
+    except signing.BadSignature:  # SignatureExpired included
+        return False
+    return True
+
+
+def should_profile(request):
+    token = request.headers.get(HEADER)
+    if token is not None:
+        return is_valid_token(token)
+    sample_rate = get_setting('SAMPLE_RATE')
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+class RequestProfiler:
+    """
+    Context manager profiling the code run in its block, then saving the profile (see save).
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.recorder = QueryRecorder(fingerprints=False)
+        self.tracing = get_setting('TRACEMALLOC')
+        self.started_tracemalloc = False
+        self.snapshot = None
+
+    def __enter__(self):
+        if self.tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(get_setting('TRACEMALLOC_FRAMES'))
+                self.started_tracemalloc = True
+            tracemalloc.reset_peak()
+            self.baseline = tracemalloc.take_snapshot()
+        self.recorder.__enter__()
+        self.started = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        self.duration = time.perf_counter() - self.started
+        self.recorder.__exit__(*exc_info)
+        if self.tracing:
+            self.snapshot = tracemalloc.take_snapshot()
+            self.peak = tracemalloc.get_traced_memory()[1]
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+    def get_allocations(self):
+        """
+        Return the largest allocation sites of the request, as (file:line, size, count) dicts.
+        """
+        # The baseline traces are left out, as well as tracemalloc's own
+        statistics = self.snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ]).compare_to(self.baseline, 'lineno')
+        return [{'site': str(statistic.traceback[0]), 'size': statistic.size_diff, 'count': statistic.count_diff}
+                for statistic in statistics[:TOP_ALLOCATIONS] if statistic.size_diff > 0]
+
+    def save(self, request, response):
+        """
+        Write the profile of the request to DIRECTORY and return its id.
+        """
+        now = timezone.now()
+        profile_id = f"{now.strftime('%Y%m%dT%H%M%S.%f')}-{uuid.uuid4().hex[:6]}"  # Sorts by date
+        directory = get_directory()
+        directory.mkdir(parents=True, exist_ok=True)
+
+        self.profile.dump_stats(directory / f'{profile_id}.prof')
+        if self.snapshot is not None:
+            self.snapshot.dump(str(directory / f'{profile_id}.tracemalloc'))
+        metadata = {
+            'id': profile_id,
+            'date': now.isoformat(),
+            'route': request.resolver_match.view_name if request.resolver_match else None,
+            'method': request.method,
+            'path': request.path,
+            'query_params': {key: request.GET.getlist(key) for key in request.GET},
+            'status': response.status_code,
+            'duration_ms': round(self.duration * 1000, 3),
+            'queries': self.recorder.count,
+            'db_time_ms': round(self.recorder.duration * 1000, 3),
+            'trigger': 'header' if HEADER in request.headers else 'sample',
+            'peak_memory': self.peak if self.snapshot is not None else None,
+            'allocations': self.get_allocations() if self.snapshot is not None else [],
+        }
+        (directory / f'{profile_id}.json').write_text(json.dumps(metadata, indent=2))
+        prune(directory, get_setting('MAX_PROFILES'))
+        return profile_id
+
+
+def list_profiles(directory=None):
+    """
+    Return the metadata of the stored profiles, oldest first.
+    """
+    directory = directory or get_directory()
+    if not directory.is_dir():
+        return []
+    return [json.loads(path.read_text()) for path in sorted(directory.glob('*.json'))]
+
+
+def delete_profile(directory, profile_id):
+    for suffix in ('.json', '.prof', '.tracemalloc'):
+        (directory / f'{profile_id}{suffix}').unlink(missing_ok=True)
+
+
+def prune(directory, keep):
+    """
+    Delete the profiles but the keep most recent ones (the ids sort by date).
+    """
+    profile_ids = sorted(path.stem for path in directory.glob('*.json'))
+    for profile_id in profile_ids[:max(len(profile_ids) - keep, 0)]:
+        delete_profile(directory, profile_id)
+
+
+class ProfilingMiddleware:
+    """
+    Profile the requests asking for it or sampled: see the module docstring.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            if get_setting('ENABLED'):
+                logger.warning('Profiling is enabled, but the requests served by ASGI are not profiled: serve the WSGI '
+                               'application (p041725.wsgi) instead.')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_setting('ENABLED') or not should_profile(request) or not profiling_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            with RequestProfiler() as profiler:
+                response = self.get_response(request)
+            self.save(profiler, request, response)
+        finally:
+            profiling_lock.release()
+        return response
+
+    async def __acall__(self, request):
+        # Not profiled: see the module docstring
+        if get_setting('ENABLED') and HEADER in request.headers:
+            logger.warning('Not profiling %s %s: the requests served by ASGI are not profiled, serve the WSGI '
+                           'application (p041725.wsgi) instead.', request.method, request.path)
+        return await self.get_response(request)
+
+    @staticmethod
+    def save(profiler, request, response):
+        try:
+            response[ID_HEADER] = profiler.save(request, response)
+        except OSError:  # A full or read-only disk does not fail the request
+            logger.exception('Could not save the profile of %s %s', request.method, request.path)
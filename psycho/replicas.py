@@ -0,0 +1,171 @@
+"""
+Read replicas: the reads of the safe-method requests go to a replica, everything else to the primary ("default").
+
+The ReplicaMiddleware picks, for each GET/HEAD/OPTIONS request, one of the healthy aliases listed in
+PSYCHO_READ_REPLICAS['ALIASES'] and holds it in a context variable (which follows the async views into the threads
+running their ORM calls); the ReplicaRouter sends the reads there. Writes, unsafe-method requests, management
+commands and background code always use the primary.
+
+Read-your-writes: a response to an unsafe-method request sets a cookie pinning the client to the primary for
+PIN_SECONDS, long enough for the replicas to catch up, so that the GET following a partial_update sees the change.
+
+Health: each process checks a replica at most every HEALTH_CHECK_INTERVAL seconds (a connection and, on PostgreSQL,
+the replay lag, compared to MAX_LAG_SECONDS). A replica failing the check, or raising a connection error during a
+request, is left out until its next check: its requests fall back to the other replicas, then to the primary.
+
+Locally, two SQLite files or two PostgreSQL databases make the setup (see p041725/settings/development.py). Nothing
+replicates to them: the replica copy stays as it was, which makes the pinning easy to observe.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, InterfaceError, OperationalError, connections
+
+DEFAULT_SETTINGS = {
+    'ALIASES': [],
+    'PIN_SECONDS': 5,
+    'HEALTH_CHECK_INTERVAL': 10,
+    'MAX_LAG_SECONDS': 30,
+    'HEADERS': False,
+}
+PIN_COOKIE = 'psycho_primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The replica the reads of the current request go to, None for the primary
+read_alias = ContextVar('psycho_read_alias', default=None)
+
+# Replica alias -> (healthy, monotonic time of the check), per process
+health = {}
+
+
+def get_setting(name):
+    return getattr(settings, 'PSYCHO_READ_REPLICAS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def check_replica(alias):
+    """
+    Return whether the replica answers and, on PostgreSQL, replays the primary's changes with an acceptable lag.
+    """
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # No lag when everything received was replayed (an idle primary does not make the replica late)
+                cursor.execute(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END")
+                lag = cursor.fetchone()[0]
+                return lag is None or lag <= get_setting('MAX_LAG_SECONDS')
+            cursor.execute('SELECT 1')
+            return True
+    except DatabaseError:
+        return False
+
+
+def is_healthy(alias):
+    healthy, checked_at = health.get(alias, (None, None))
+    if checked_at is None or time.monotonic() - checked_at >= get_setting('HEALTH_CHECK_INTERVAL'):
+        healthy = check_replica(alias)
+        health[alias] = (healthy, time.monotonic())
+    return healthy
+
+
+def mark_unhealthy(alias):
+    health[alias] = (False, time.monotonic())
+
+
+def choose_replica():
+    """
+    Return a healthy replica alias, None (the primary) if there is none.
+    """
+    aliases = [alias for alias in get_setting('ALIASES') if is_healthy(alias)]
+    return random.choice(aliases) if aliases else None
+
+
+def is_pinned(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    """
+    Send the reads to the replica chosen for the current request, and every write to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit: an instance read from a replica would otherwise be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_setting('ALIASES')}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replicas get the schema from the primary
+        return db not in get_setting('ALIASES')
+
+
+class ReplicaMiddleware:
+    """
+    Route the reads of the safe-method requests to a replica, unless the client is pinned to the primary, and pin
+    the clients sending unsafe-method requests.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        alias = self.get_read_alias(request)
+        token = read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.process_response(request, response, alias)
+
+    async def __acall__(self, request):
+        # The health checks query the replicas
+        alias = await sync_to_async(self.get_read_alias)(request) if get_setting('ALIASES') else None
+        token = read_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.process_response(request, response, alias)
+
+    @staticmethod
+    def get_read_alias(request):
+        if request.method not in SAFE_METHODS or not get_setting('ALIASES') or is_pinned(request):
+            return None
+        return choose_replica()
+
+    def process_exception(self, request, exception):
+        alias = read_alias.get()
+        if alias is not None and isinstance(exception, (OperationalError, InterfaceError)):
+            mark_unhealthy(alias)  # Fall back to the other replicas or the primary until the next check
+
+    @staticmethod
+    def process_response(request, response, alias):
+        if request.method not in SAFE_METHODS and get_setting('ALIASES'):
+            pin_seconds = get_setting('PIN_SECONDS')
+            response.set_cookie(PIN_COOKIE, f'{time.time() + pin_seconds:.3f}', max_age=pin_seconds, httponly=True,
+                                samesite='Lax')
+        if get_setting('HEADERS'):
+            response['X-DB-Read-Alias'] = alias or DEFAULT_DB_ALIAS
+        return response
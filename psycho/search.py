@@ -0,0 +1,147 @@
+"""
+Applicant search across first name, last name, email, phone and application tracking ID.
+
+- On PostgreSQL, the matching is done with LIKE '%q%' backed by pg_trgm GIN indexes and ranked by trigram
+  similarity.
+- On SQLite, the matching is done on the psycho_applicant_search FTS5 table (trigram tokenizer), kept up to date by
+  triggers, and ranked by bm25.
+- Otherwise, or for queries too short for trigrams, a plain (unindexed) ORM lookup ranks exact and prefix matches
+  first.
+
+The matching ignores the case and the accents: "akindes" finds "Akindès". Both sides are folded by psycho_fold, which
+replaces the accented Latin letters (ACCENTED) by their base letter: an SQL function on PostgreSQL, a Python function
+registered on each SQLite connection (the FTS5 triggers call it: a connection opened outside Django, e.g. by the
+sqlite3 shell, cannot write the applicant profiles).
+
+The queries run on the database the router reads ApplicantProfile from: a replica for the safe-method requests (see
+psycho.replicas).
+
+The indexes, the FTS5 table and its triggers are created by migrations 0005 and 0011.
+"""
+from django.db import DatabaseError, connections, router
+from django.db.backends.signals import connection_created
+from django.db.models import Case, CharField, F, Func, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+from django.db.models.lookups import Contains, Exact, StartsWith
+
+from psycho.models import ApplicantProfile, Application
+
+SEARCH_FIELDS = ['first_name', 'last_name', 'email', 'phone']
+SQLITE_SEARCH_TABLE = 'psycho_applicant_search'
+MIN_TRIGRAM_QUERY_LENGTH = 3
+FOLDING_VENDORS = ('postgresql', 'sqlite')
+
+# The Latin-1 and Latin Extended-A letters made of an ASCII letter and diacritics, and that letter (migration 0011
+# holds a copy for the SQL function)
+ACCENTED = ('ÀÁÂÃÄÅÇÈÉÊËÌÍÎÏÑÒÓÔÕÖÙÚÛÜÝàáâãäåçèéêëìíîïñòóôõöùúûüýÿĀ'
+            'āĂăĄąĆćĈĉĊċČčĎďĒēĔĕĖėĘęĚěĜĝĞğĠġĢģĤĥĨĩĪīĬĭĮįİĴĵĶķĹĺĻļĽľ'
+            'ŃńŅņŇňŌōŎŏŐőŔŕŖŗŘřŚśŜŝŞşŠšŢţŤťŨũŪūŬŭŮůŰűŲųŴŵŶŷŸŹźŻżŽžſ')
+UNACCENTED = ('AAAAAACEEEEIIIINOOOOOUUUUYaaaaaaceeeeiiiinooooouuuuyyA'
+              'aAaAaCcCcCcCcDdEeEeEeEeEeGgGgGgGgHhIiIiIiIiIJjKkLlLlLl'
+              'NnNnNnOoOoOoRrRrRrSsSsSsSsTtTtUuUuUuUuUuUuWwYyYZzZzZzs')
+FOLD_TABLE = str.maketrans(ACCENTED, UNACCENTED)
+
+
+def fold(text):
+    return None if text is None else text.translate(FOLD_TABLE)
+
+
+def register_fold_function(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('psycho_fold', 1, fold, deterministic=True)
+
+
+connection_created.connect(register_fold_function, dispatch_uid='psycho_register_fold_function')
+
+
+class Fold(Func):
+    function = 'psycho_fold'
+    output_field = CharField()
+
+
+def get_connection():
+    return connections[router.db_for_read(ApplicantProfile)]
+
+
+def normalize_query(q):
+    return ' '.join(q.split())
+
+
+def searched(field, connection):
+    """
+    Return the expression of a searched field the (upper cased) queries are compared with.
+    """
+    if connection.vendor in FOLDING_VENDORS:
+        return Upper(Fold(F(field)))  # The expression of the trigram indexes on PostgreSQL
+    return Upper(F(field))
+
+
+def match_filter(q, connection):
+    """
+    Return a Q object matching the applicant profiles containing q in one of the searched fields. The tracking ID
+    matches are resolved first, as a list of primary keys, so that the OR can be served by indexes on both tables.
+    """
+    tracking_matches = list(
+        Application.objects.filter(Contains(searched('tracking_id', connection), q))
+        .values_list('applicant_id', flat=True)[:100])
+    condition = Q(pk__in=tracking_matches)
+    for field in SEARCH_FIELDS:
+        condition |= Q(Contains(searched(field, connection), q.replace(' ', '') if field == 'phone' else q))
+    return condition
+
+
+def search_postgresql(q, limit, connection):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    queryset = ApplicantProfile.objects.filter(match_filter(q, connection)).annotate(
+        rank=Greatest(*[TrigramSimilarity(searched(field, connection), q) for field in SEARCH_FIELDS],
+                      TrigramSimilarity(searched('application__tracking_id', connection), q)),
+    ).order_by('-rank', 'pk')
+    return list(queryset.values_list('pk', flat=True)[:limit])
+
+
+def search_sqlite(q, limit, connection):
+    table = connection.ops.quote_name(SQLITE_SEARCH_TABLE)
+    phrase = '"{}"'.format(q.replace('"', '""'))  # An FTS5 string: matches the query as a substring
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT applicant_id FROM {table} WHERE {table} MATCH %s ORDER BY rank LIMIT %s",
+                       [phrase, limit])
+        hex_ids = [row[0] for row in cursor.fetchall()]
+    field = ApplicantProfile._meta.pk
+    return [field.to_python(hex_id) for hex_id in hex_ids]
+
+
+def search_orm(q, limit, connection):
+    ranks = []
+    for field in SEARCH_FIELDS:
+        ranks.append(Case(
+            When(Exact(searched(field, connection), q), then=Value(3)),
+            When(StartsWith(searched(field, connection), q), then=Value(2)),
+            When(Contains(searched(field, connection), q), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+    queryset = ApplicantProfile.objects.filter(match_filter(q, connection)).annotate(
+        rank=Greatest(*ranks)).order_by('-rank', 'pk')
+    return list(queryset.values_list('pk', flat=True)[:limit])
+
+
+def search_applicants(q, limit=20):
+    """
+    Return the primary keys of the best matching applicant profiles for q, best first.
+    """
+    connection = get_connection()
+    q = normalize_query(q)
+    if not q:
+        return []
+    if connection.vendor in FOLDING_VENDORS:
+        q = fold(q)
+    if len(q) >= MIN_TRIGRAM_QUERY_LENGTH:
+        if connection.vendor == 'postgresql':
+            return search_postgresql(q.upper(), limit, connection)
+        if connection.vendor == 'sqlite':
+            try:
+                return search_sqlite(q, limit, connection)
+            except DatabaseError:  # SQLite built without FTS5, the search table could not be created
+                pass
+    return search_orm(q.upper(), limit, connection)
@@ -0,0 +1,197 @@
+"""
+Synthetic data for the local benchmarks and load tests (see the seed_applications and loadtest commands).
+
+ApplicantGenerator builds realistic applicant profiles: Beninese names and phone numbers, a spread of degrees,
+baccalaureate series and averages, universities for the graduates. It draws from its own random generator, so that a
+seed gives the same data on the same database. unique_applicants() only returns applicants free of conflicts on the
+unique constraints (email, phone and (last_name, date_of_birth)), with the database and with each other.
+"""
+import datetime
+import random
+
+from django.db.models import Q
+
+from psycho.models import ApplicantProfile, Application, University
+
+FIRST_NAMES = {
+    'M': ['Abdou', 'Adébayo', 'Bio', 'Codjo', 'Comlan', 'Dossou', 'Éric', 'Faïz', 'Gildas', 'Hervé', 'Ibrahim',
+          'Jean', 'Kossi', 'Landry', 'Mathias', 'Moussa', 'Olivier', 'Patrice', 'Romuald', 'Sèdjro', 'Serge',
+          'Sourou', 'Thierry', 'Yannick', 'Zinsou'],
+    'F': ['Adjoa', 'Afi', 'Akouavi', 'Aminata', 'Béatrice', 'Chantal', 'Christelle', 'Diane', 'Edwige', 'Fatouma',
+          'Gisèle', 'Grâce', 'Hortense', 'Ines', 'Josiane', 'Léontine', 'Mariam', 'Nadège', 'Odile', 'Pélagie',
+          'Rachida', 'Sandrine', 'Sèna', 'Tatiana', 'Yétondé'],
+}
+LAST_NAMES = [
+    'Adjovi', 'Agbo', 'Ahouandjinou', 'Akpovi', 'Amoussou', 'Assogba', 'Avocè', 'Azonhiho', 'Bello', 'Boko',
+    'Chabi', 'Dagbo', 'Dossa', 'Dossou', 'Gbaguidi', 'Glèlè', 'Hounkpatin', 'Houngbo', 'Houénou', 'Kakpo',
+    'Kiki', 'Kpadonou', 'Lawani', 'Mensah', 'Natta', 'Orou', 'Quenum', 'Sagbo', 'Sossou', 'Soglo',
+    'Tchibozo', 'Tossou', 'Yayi', 'Zinsou', 'Zountchémè', 'Akindès', 'Alapini', 'Bankolé', 'Djossou', 'Fassinou',
+    'Gandonou', 'Hountondji', 'Kora', 'Mama', 'Nonfon', 'Oké', 'Padonou', 'Sanni', 'Tokpanou', 'Yessoufou',
+]
+EMAIL_DOMAINS = ['gmail.com', 'yahoo.fr', 'outlook.com', 'hotmail.com', 'uac.bj']
+# Mobile operator prefixes of the 10 digit numbering plan (01 XX XX XX XX)
+PHONE_PREFIXES = ['40', '41', '42', '46', '50', '51', '52', '53', '54', '56', '57', '59', '61', '62', '66', '67',
+                  '90', '91', '94', '95', '96', '97']
+UNIVERSITIES = [
+    "Université d'Abomey-Calavi",
+    'Université de Parakou',
+    "Université Nationale d'Agriculture",
+    'Université Nationale des Sciences, Technologies, Ingénierie et Mathématiques',
+    'École Polytechnique d\'Abomey-Calavi',
+    'Institut National Supérieur de Technologie Industrielle',
+    'Université Africaine de Technologie et de Management',
+    'École Supérieure de Gestion, d\'Informatique et des Sciences',
+]
+FIELDS_OF_STUDY = ['Psychologie', 'Informatique', 'Génie civil', 'Mathématiques', 'Physique', 'Droit', 'Économie',
+                   'Gestion', 'Médecine', 'Électrotechnique', 'Télécommunications', 'Sociologie']
+
+DEGREE_WEIGHTS = {
+    ApplicantProfile.Degree.HIGHSCHOOL: 55,
+    ApplicantProfile.Degree.BACHELOR: 30,
+    ApplicantProfile.Degree.MASTER: 12,
+    ApplicantProfile.Degree.PHD: 3,
+}
+SERIES_WEIGHTS = {
+    ApplicantProfile.BaccalaureateSeries.BAC_D: 50,
+    ApplicantProfile.BaccalaureateSeries.BAC_C: 25,
+    ApplicantProfile.BaccalaureateSeries.BAC_E: 10,
+    ApplicantProfile.BaccalaureateSeries.BAC_F: 15,
+}
+STATUS_WEIGHTS = {
+    Application.ApplicationStatus.PENDING: 50,
+    Application.ApplicationStatus.ACCEPTED: 20,
+    Application.ApplicationStatus.REJECTED: 20,
+    Application.ApplicationStatus.INCOMPLETE: 10,
+}
+
+
+def get_universities():
+    """
+    Return the universities of UNIVERSITIES, creating the missing ones.
+    """
+    universities = {university.name: university for university in University.objects.filter(name__in=UNIVERSITIES)}
+    missing = [University(name=name) for name in UNIVERSITIES if name not in universities]
+    universities.update((university.name, university) for university in University.objects.bulk_create(missing))
+    return [universities[name] for name in UNIVERSITIES]
+
+
+def find_conflicts(applicants):
+    """
+    Return the emails, phones and (last_name, date_of_birth) pairs of the applicants which are already taken.
+    """
+    # The cross product over-matches (last_name, date_of_birth) pairs, which is harmless: only pairs that exist
+    # are returned, and it keeps the query flat whatever the batch size.
+    identities = Q(last_name__in={applicant.last_name for applicant in applicants},
+                   date_of_birth__in={applicant.date_of_birth for applicant in applicants})
+    taken = ApplicantProfile.objects.filter(Q(email__in={applicant.email for applicant in applicants})
+                                            | Q(phone__in={str(applicant.phone) for applicant in applicants})
+                                            | identities)
+    taken_emails, taken_phones, taken_identities = set(), set(), set()
+    for email, phone, last_name, date_of_birth in taken.values_list('email', 'phone', 'last_name', 'date_of_birth'):
+        taken_emails.add(email)
+        taken_phones.add(str(phone))
+        taken_identities.add((last_name, date_of_birth))
+    return taken_emails, taken_phones, taken_identities
+
+
+def get_payload(applicant):
+    """
+    Return the JSON body creating the applicant through the API (the nested applicant of an application, or an
+    applicant profile).
+    """
+    payload = {
+        'first_name': applicant.first_name,
+        'last_name': applicant.last_name,
+        'date_of_birth': applicant.date_of_birth.isoformat(),
+        'gender': applicant.gender,
+        'email': applicant.email,
+        'phone': str(applicant.phone),
+        'degree': applicant.degree,
+        'baccalaureate_series': applicant.baccalaureate_series,
+        'baccalaureate_average': applicant.baccalaureate_average,
+        'baccalaureate_session': applicant.baccalaureate_session.isoformat(),
+    }
+    if applicant.university is not None:
+        payload.update({
+            'university': {'name': applicant.university.name},
+            'university_field_of_study': applicant.university_field_of_study,
+            'university_average': applicant.university_average,
+        })
+    return payload
+
+
+def weighted_choice(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+class ApplicantGenerator:
+    """
+    Generate realistic, unsaved applicant profiles and application statuses. See the module docstring.
+    """
+    max_attempts = 20  # Rounds of conflict resolution before giving up on a batch
+
+    def __init__(self, seed=None, universities=()):
+        self.random = random.Random(seed)
+        self.universities = list(universities)
+
+    def applicant(self, graduate=False):
+        rng = self.random
+        gender = rng.choice('MF')
+        first_name = rng.choice(FIRST_NAMES[gender])
+        last_name = rng.choice(LAST_NAMES)
+        if rng.random() < 0.2:  # Compound last names widen the (last_name, date_of_birth) space
+            last_name = '-'.join(rng.sample(LAST_NAMES, 2))
+        date_of_birth = datetime.date(1990, 1, 1) + datetime.timedelta(days=rng.randrange(18 * 365))
+        email_name = f'{first_name}.{last_name}'.lower().encode('ascii', 'ignore').decode()
+        degree = weighted_choice(rng, {degree: weight for degree, weight in DEGREE_WEIGHTS.items()
+                                       if not graduate or degree != ApplicantProfile.Degree.HIGHSCHOOL})
+        session_year = min(date_of_birth.year + rng.randint(17, 20), datetime.date.today().year)
+
+        applicant = ApplicantProfile(
+            first_name=first_name,
+            last_name=last_name,
+            date_of_birth=date_of_birth,
+            gender=gender,
+            email=f'{email_name}{rng.randrange(10000)}@{rng.choice(EMAIL_DOMAINS)}',
+            phone=f'+22901{rng.choice(PHONE_PREFIXES)}{rng.randrange(10 ** 6):06d}',
+            degree=degree,
+            baccalaureate_series=weighted_choice(rng, SERIES_WEIGHTS),
+            baccalaureate_average=round(min(max(rng.gauss(12, 2.5), 6), 19.5), 2),
+            baccalaureate_session=datetime.date(session_year, 7, 1),
+        )
+        if degree != ApplicantProfile.Degree.HIGHSCHOOL:
+            applicant.university = rng.choice(self.universities) if self.universities else None
+            applicant.university_field_of_study = rng.choice(FIELDS_OF_STUDY)
+            applicant.university_average = round(min(max(rng.gauss(12.5, 2), 8), 19), 2)
+        applicant.normalize_fields()
+        return applicant
+
+    def status(self):
+        return weighted_choice(self.random, STATUS_WEIGHTS)
+
+    def unique_applicants(self, count, graduates=False):
+        """
+        Return count applicants that can be inserted together: see the module docstring. With graduates, they all
+        went to a university (the API requires one on creation).
+        """
+        accepted = []
+        emails, phones, identities = set(), set(), set()
+        for _ in range(self.max_attempts):
+            candidates = [self.applicant(graduates) for _ in range(count - len(accepted))]
+            taken_emails, taken_phones, taken_identities = find_conflicts(candidates)
+            emails |= taken_emails
+            phones |= taken_phones
+            identities |= taken_identities
+            for applicant in candidates:
+                identity = (applicant.last_name, applicant.date_of_birth)
+                if applicant.email in emails or str(applicant.phone) in phones or identity in identities:
+                    continue
+                # Later candidates conflict with this one
+                emails.add(applicant.email)
+                phones.add(str(applicant.phone))
+                identities.add(identity)
+                accepted.append(applicant)
+            if len(accepted) == count:
+                return accepted
+        raise ValueError(f'Could not generate {count} unique applicants in {self.max_attempts} attempts: the '
+                         f'generated name and date of birth space is close to exhausted.')
@@ -1,15 +1,21 @@
+from django.conf import settings
 from django.db import transaction
 from rest_framework import serializers
 
+from .fields import RecentRelatedField
+from .fieldsets import SparseFieldsetsMixin
+from .metrics import TimedRepresentationMixin
 from .models import (
     User,
     AdminProfile,
     ApplicantProfile,
     Application, University, ApplicationStatusHistory
 )
+from .plans import APPLICATION_FILTERS
+from .tracking import TrackingIdsExhausted
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for the User model.
     """
@@ -19,7 +25,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'first_name', 'last_name']
 
 
-class AdminProfileSerializer(serializers.ModelSerializer):
+class AdminProfileSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
     Serializer for the AdminProfile model.
     """
@@ -173,15 +179,40 @@ class UniversitySerializer(serializers.ModelSerializer):
         return university
 
 
-class ApplicationStatusHistorySerializer(serializers.ModelSerializer):
+class ApplicationStatusHistorySerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = ApplicationStatusHistory
         fields = '__all__'
 
 
-class ApplicantProfileSerializer(serializers.ModelSerializer):
+class BulkStatusUpdateSerializer(serializers.Serializer):
     """
-    Serializer for the Applicant model.
+    Validate a bulk status transition request: either a list of application ids or a filter, a target status and an
+    optional note. Neither may be empty: an empty filter would select every application.
+    """
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False, max_length=10000)
+    filter = serializers.DictField(child=serializers.CharField(), required=False, allow_empty=False)
+    status = serializers.ChoiceField(choices=Application.ApplicationStatus.choices)
+    note = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))  # Drop duplicates, keep order
+
+    def validate_filter(self, value):
+        unknown = set(value) - set(APPLICATION_FILTERS)
+        if unknown:
+            raise serializers.ValidationError(f"Unsupported filter(s): {', '.join(sorted(unknown))}.")
+        return value
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either a list of ids or a filter.")
+        return attrs
+
+
+class ApplicantProfileSerializer(TimedRepresentationMixin, SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Serializer for the Applicant model. Accepts sparse fieldsets (see psycho.fieldsets).
     """
     url = serializers.HyperlinkedIdentityField(
         view_name='psycho:applicant-detail',
@@ -341,9 +372,35 @@ class ApplicantProfileSerializer(serializers.ModelSerializer):
         return updated
 
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicantSearchResultSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     """
-    Serializer for an Application.
+    Compact representation of an applicant profile for search results.
+    """
+    url = serializers.HyperlinkedIdentityField(
+        view_name='psycho:applicant-detail',
+        read_only=True,
+    )
+    tracking_id = serializers.CharField(source='application.tracking_id', default=None, read_only=True)
+    status = serializers.CharField(source='application.status', default=None, read_only=True)
+
+    class Meta:
+        model = ApplicantProfile
+        fields = [
+            "url",
+            "applicant_id",
+            "first_name",
+            "last_name",
+            "email",
+            "phone",
+            "tracking_id",
+            "status",
+        ]
+        read_only_fields = fields
+
+
+class ApplicationSerializer(TimedRepresentationMixin, SparseFieldsetsMixin, serializers.ModelSerializer):
+    """
+    Serializer for an Application. Accepts sparse fieldsets (see psycho.fieldsets), with dotted paths into applicant.
     """
     url = serializers.HyperlinkedIdentityField(
         view_name='psycho:application-detail',
@@ -354,7 +411,13 @@ class ApplicationSerializer(serializers.ModelSerializer):
 
     # Need to be writable for further nested applicant field handling.
 
-    status_history_ids = serializers.PrimaryKeyRelatedField(source='status_history', many=True, read_only=True)
+    # The last transitions only, most recent first: the whole history is paginated by the status_history endpoint
+    status_history_ids = RecentRelatedField(
+        child_relation=serializers.PrimaryKeyRelatedField(read_only=True),
+        source='status_history',
+        ordering=['-date_changed', '-id'],
+        limit=getattr(settings, 'PSYCHO_EMBEDDED_STATUS_HISTORY', 5),
+    )
 
     class Meta:
         model = Application
@@ -395,6 +458,8 @@ class ApplicationSerializer(serializers.ModelSerializer):
             application = Application(**validated_data, applicant=applicant_instance)
             try:
                 application.save()
+            except TrackingIdsExhausted as e:
+                raise serializers.ValidationError(serializers.as_serializer_error(e)) from e
             except ValueError as ve:
                 message = str(ve)
                 field_names = ['first_name', 'last_name', 'date_of_birth', 'email', 'phone']
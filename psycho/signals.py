@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from psycho.models import Application, ApplicationStatusHistory
+from psycho.cache import bump_generations
+from psycho.lookup import forget
+from psycho.metrics import STATUS_TRANSITIONS, count_on_commit
+from psycho.models import Application, ApplicationStatusHistory, ApplicantProfile, University, User
+from psycho.stats import APPLICANT_FIELDS, StatsDelta, get_row, get_rows
 
 
 # Receivers
@@ -29,3 +34,90 @@ def handle_application_post_save(sender, instance, created, **kwargs):
                 new_status=instance.status,
                 note=getattr(instance, "_status_change_note", None)
             )
+            count_on_commit(STATUS_TRANSITIONS, status=instance.status)
+
+    # Application stats (see psycho.stats)
+    delta = StatsDelta()
+    if created:
+        delta.add(get_row(instance.status, instance.applicant))
+    elif instance._initial_status != instance.status:
+        delta.remove(get_row(instance._initial_status, instance.applicant))
+        delta.add(get_row(instance.status, instance.applicant))
+    delta.apply()
+
+    # The saved status is the initial one of the next save
+    instance._initial_status = instance.status
+
+
+@receiver(pre_delete, sender=Application)
+def handle_application_pre_delete(sender, instance, **kwargs):
+    """
+    Remove the application from the stats, in the deletion transaction (cascades from ApplicantProfile included).
+    """
+    delta = StatsDelta()
+    for row in get_rows(Application.objects.filter(pk=instance.pk)):
+        delta.remove(row)
+    delta.apply()
+
+
+@receiver(post_save, sender=ApplicantProfile)
+def handle_applicant_profile_post_save(sender, instance, created, **kwargs):
+    """
+    Move the application of the applicant between the stats buckets when a field they depend on changed.
+    """
+    loaded = getattr(instance, '_loaded_values', {})
+    deferred = instance.get_deferred_fields()
+    changed = {name: loaded[name] for name in APPLICANT_FIELDS
+               if name in loaded and name not in deferred and loaded[name] != getattr(instance, name)}
+    if changed:
+        status = Application.objects.filter(applicant_id=instance.pk).values_list('status', flat=True).first()
+        if status is not None:
+            delta = StatsDelta()
+            delta.remove({**get_row(status, instance), **changed})
+            delta.add(get_row(status, instance))
+            delta.apply()
+
+    # The saved values are the loaded ones of the next save
+    instance._loaded_values = {**loaded, **{name: getattr(instance, name) for name in APPLICANT_FIELDS
+                                            if name not in deferred}}
+
+
+# Response cache invalidation (see psycho.cache). The generations are bumped once the transaction is committed, so
+# that a concurrent request cannot cache the data as it was before the commit under the new generation.
+
+@receiver([post_save, post_delete], sender=Application)
+def invalidate_application(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_generations('applications', f'application:{instance.pk}'))
+
+
+@receiver([post_save, post_delete], sender=Application)
+def invalidate_status_lookup(sender, instance, **kwargs):
+    """
+    Forget the cached status lookup of the application (see psycho.lookup): its status changed, or its creation
+    turns a cached unknown tracking id into a known one.
+    """
+    transaction.on_commit(lambda: forget(instance.tracking_id))
+
+
+@receiver([post_save, post_delete], sender=ApplicationStatusHistory)
+def invalidate_application_status_history(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_generations('applications', f'application:{instance.application_id}'))
+
+
+@receiver([post_save, post_delete], sender=ApplicantProfile)
+def invalidate_applicant_profile(sender, instance, **kwargs):
+    application_ids = list(Application.objects.filter(applicant_id=instance.pk).values_list('pk', flat=True))
+    transaction.on_commit(lambda: bump_generations(
+        'applicants', f'applicant:{instance.pk}', 'applications', *[f'application:{pk}' for pk in application_ids]))
+
+
+@receiver([post_save, post_delete], sender=University)
+def invalidate_university(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_generations('global'))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return  # Logging in does not change any cached payload
+    transaction.on_commit(lambda: bump_generations('global'))
@@ -0,0 +1,215 @@
+"""
+Application statistics maintained incrementally.
+
+ApplicationStats counts the applications of each bucket: every application ("total"), then the applications by status
+and by degree, baccalaureate series and gender of their applicant. A bucket counts its applications and sums their
+applicants' baccalaureate averages, so that the totals and the means are read from a handful of rows whatever the
+number of applications (get_stats). The paginated application lists read their unfiltered count from the "total"
+bucket too (count_applications).
+
+Every write moving an application between buckets applies a StatsDelta in its transaction: the handlers in
+psycho.signals for the saves and deletes, and the bulk paths bypassing the signals (bulk_status, import_applications).
+Every submission changes the "total" bucket, and most of them the same status, degree and gender buckets: a single row
+per bucket would queue the concurrent submissions on its row lock until each commits. A bucket is therefore spread
+over SHARDS rows, and each delta increments the rows of one shard picked at random; the readers sum the shards.
+
+The rebuild_application_stats command recomputes the buckets from the applications, to reconcile them after writes
+made behind the ORM's back (raw SQL, QuerySet.update()...), and gathers the shards of the buckets it fixes.
+"""
+import random
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+
+from psycho.models import ApplicantProfile, Application, ApplicationStats
+from psycho.paginators import MAINTAINED_COUNTS
+
+TOTAL = ('total', '')
+
+# Rows per bucket: up to SHARDS transactions update a same bucket without waiting for each other
+SHARDS = 16
+
+# Dimension -> Application lookup
+DIMENSIONS = {
+    'status': 'status',
+    'degree': 'applicant__degree',
+    'baccalaureate_series': 'applicant__baccalaureate_series',
+    'gender': 'applicant__gender',
+}
+AVERAGE_LOOKUP = 'applicant__baccalaureate_average'
+
+# The ApplicantProfile fields a row depends on
+APPLICANT_FIELDS = ['degree', 'baccalaureate_series', 'gender', 'baccalaureate_average']
+
+# Dimension -> values always listed by get_stats, even when no application has them
+CHOICES = {
+    'status': Application.ApplicationStatus.values,
+    'degree': ApplicantProfile.Degree.values,
+    'baccalaureate_series': ApplicantProfile.BaccalaureateSeries.values,
+    'gender': [value for value, _ in ApplicantProfile._meta.get_field('gender').choices],
+}
+
+
+def get_row(status, applicant):
+    """
+    Return the stats row of an application with the given status and applicant profile.
+    """
+    return {'status': status, **{name: getattr(applicant, name) for name in APPLICANT_FIELDS}}
+
+
+def get_rows(applications):
+    """
+    Return the stats rows of an applications queryset, with one query.
+    """
+    return [
+        {'status': status, **dict(zip(APPLICANT_FIELDS, applicant_values))}
+        for status, *applicant_values in applications.values_list(*DIMENSIONS.values(), AVERAGE_LOOKUP)
+    ]
+
+
+class StatsDelta:
+    """
+    Changes to the buckets, accumulated with add/remove then written with a single UPDATE by apply.
+    """
+
+    def __init__(self):
+        self.changes = defaultdict(lambda: [0, 0.0])  # Bucket -> [count, baccalaureate average sum]
+
+    def add(self, row, sign=1):
+        average = float(row['baccalaureate_average'] or 0)
+        for bucket in [TOTAL, *((dimension, row[dimension] or '') for dimension in DIMENSIONS)]:
+            change = self.changes[bucket]
+            change[0] += sign
+            change[1] += sign * average
+
+    def remove(self, row):
+        self.add(row, sign=-1)
+
+    def apply(self):
+        changes = {bucket: (count, round(average_sum, 9)) for bucket, (count, average_sum) in self.changes.items()}
+        changes = {bucket: change for bucket, change in changes.items() if change != (0, 0)}
+        self.changes.clear()
+        if not changes:
+            return
+        shard = random.randrange(SHARDS)
+        with transaction.atomic():
+            if increment(changes, shard) < len(changes):
+                # Shards written for the first time (the migration creates shard 0 of the choices)
+                existing = set(ApplicationStats.objects.filter(get_filter(changes), shard=shard).values_list(
+                    'dimension', 'value'))
+                missing = {bucket: change for bucket, change in changes.items() if bucket not in existing}
+                ApplicationStats.objects.bulk_create([
+                    ApplicationStats(dimension=dimension, value=value, shard=shard) for dimension, value in missing
+                ], ignore_conflicts=True)
+                increment(missing, shard)
+
+
+def get_filter(buckets):
+    return Q(*[Q(dimension=dimension, value=value) for dimension, value in buckets], _connector=Q.OR)
+
+
+def increment(changes, shard):
+    """
+    Increment a shard of the buckets in one statement, without reading it first. Return the number of buckets updated.
+    """
+
+    def case(index, default):
+        return Case(*[When(Q(dimension=dimension, value=value), then=Value(change[index]))
+                      for (dimension, value), change in changes.items()], default=Value(default))
+
+    return ApplicationStats.objects.filter(get_filter(changes), shard=shard).update(
+        count=F('count') + case(0, 0), baccalaureate_average_sum=F('baccalaureate_average_sum') + case(1, 0.0))
+
+
+def sum_shards(stats):
+    """
+    Return {bucket: (count, baccalaureate average sum)} for a queryset of ApplicationStats rows, with one query.
+    """
+    return {
+        (dimension, value): (count, average_sum)
+        for dimension, value, count, average_sum in stats.order_by().values('dimension', 'value').annotate(
+            total_count=Sum('count'), total_average_sum=Sum('baccalaureate_average_sum')).values_list(
+            'dimension', 'value', 'total_count', 'total_average_sum')
+    }
+
+
+def compute_buckets():
+    """
+    Return the (count, baccalaureate average sum) of every bucket, computed from the applications.
+    """
+    applications = Application.objects.order_by()
+    aggregates = {'application_count': Count('pk'), 'average_sum': Sum(AVERAGE_LOOKUP)}
+    total = applications.aggregate(**aggregates)
+    buckets = {TOTAL: (total['application_count'], total['average_sum'] or 0.0)}
+    for dimension, lookup in DIMENSIONS.items():
+        for value, count, average_sum in applications.values(lookup).annotate(**aggregates).values_list(
+                lookup, 'application_count', 'average_sum'):
+            buckets[(dimension, value or '')] = (count, average_sum or 0.0)
+    return buckets
+
+
+def rebuild_stats(dry_run=False):
+    """
+    Recompute every bucket from the applications and return the ones which were off, as {bucket: (stored, computed)}.
+
+    The stored rows are locked first: a write running meanwhile is counted either by the rebuild (committed before
+    the aggregation) or by its own increment (made after the rebuild commits), never by both. A bucket which was off
+    is written to its shard 0, its other shards are reset.
+    """
+    with transaction.atomic():
+        locked = list(ApplicationStats.objects.select_for_update().values_list('pk', flat=True))
+        stored = sum_shards(ApplicationStats.objects.filter(pk__in=locked))
+        computed = compute_buckets()
+        for dimension, values in CHOICES.items():
+            for value in values:
+                computed.setdefault((dimension, value), (0, 0.0))
+        for bucket in stored:
+            computed.setdefault(bucket, (0, 0.0))
+
+        drift = {}
+        for bucket, (count, average_sum) in computed.items():
+            current = stored.get(bucket)
+            if current is None or current[0] != count or abs(current[1] - average_sum) > 1e-6:
+                drift[bucket] = (current, (count, average_sum))
+        if drift and not dry_run:
+            # Not the shards created meanwhile, by writes the aggregation did not see
+            ApplicationStats.objects.filter(get_filter(drift), pk__in=locked).exclude(shard=0).update(
+                count=0, baccalaureate_average_sum=0)
+            ApplicationStats.objects.bulk_create([
+                ApplicationStats(dimension=dimension, value=value, shard=0, count=count,
+                                 baccalaureate_average_sum=average_sum)
+                for (dimension, value), (_, (count, average_sum)) in drift.items()
+            ], update_conflicts=True, unique_fields=['dimension', 'value', 'shard'],
+                update_fields=['count', 'baccalaureate_average_sum'])
+    return drift
+
+
+def count_applications(using=None):
+    """
+    Return the number of applications from the shards of the "total" bucket, or None when they are missing (the
+    paginated application lists count with it: see psycho.paginators.EstimatedCountPaginator).
+    """
+    return ApplicationStats.objects.using(using).filter(dimension=TOTAL[0], value=TOTAL[1]).aggregate(
+        count=Sum('count'))['count']
+
+
+MAINTAINED_COUNTS[Application] = count_applications
+
+
+def get_stats():
+    """
+    Return the applications count and mean baccalaureate average, overall and by bucket. Reads the few stats rows only.
+    """
+    buckets = sum_shards(ApplicationStats.objects.all())
+
+    def summary(bucket):
+        count, average_sum = buckets.get(bucket, (0, 0.0))
+        mean = round(average_sum / count, 2) if count else None
+        return {'count': count, 'baccalaureate_average': mean}
+
+    data = summary(TOTAL)
+    for dimension, values in CHOICES.items():
+        values = [*values, *(value for d, value in buckets if d == dimension and value not in values)]
+        data[f'by_{dimension}'] = {value: summary((dimension, value)) for value in values}
+    return data
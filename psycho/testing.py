@@ -0,0 +1,118 @@
+"""
+Test helpers.
+"""
+import json
+import re
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.urls import reverse
+
+from psycho.instrumentation import QueryRecorder
+from psycho.models import AdminProfile, Application, User
+
+# SQLite reports a full table scan as "SCAN <table>" (or "SCAN TABLE <table>" before 3.36), and an index walk as
+# "SCAN <table> USING [COVERING] INDEX <index>".
+SQLITE_FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+( AS \w+)?$', re.MULTILINE)
+
+
+@contextmanager
+def assert_query_budget(route_name, budget=None):
+    """
+    Context manager failing with an AssertionError if the block runs more SQL queries than the budget of the route
+    (psycho.urls.QUERY_BUDGETS), listing the queries so that the N+1 is easy to spot.
+
+    Usage:
+        with assert_query_budget('application-list'):
+            client.get(reverse('psycho:application-list'))
+    """
+    from psycho.urls import QUERY_BUDGETS
+
+    if budget is None:
+        budget = QUERY_BUDGETS[route_name]
+    with QueryRecorder() as recorder:
+        yield recorder
+    if recorder.count > budget:
+        queries = '\n'.join(f'  {count} x {sql}' for sql, count in recorder.fingerprints.most_common())
+        raise AssertionError(f'{route_name}: {recorder.count} queries, over its budget of {budget}:\n{queries}')
+
+
+def sample_requests():
+    """
+    Yield (route name, url) for every route with a query budget, using the first objects found in the database.
+    """
+    from psycho.urls import app_name
+
+    application = Application.objects.select_related('applicant').order_by('date_submitted').first()
+    admin_profile = AdminProfile.objects.order_by('date_created').first()
+    user = User.objects.order_by('pk').first()
+
+    yield 'application-list', reverse(f'{app_name}:application-list')
+    yield 'application-list', reverse(f'{app_name}:application-list') + '?cursor='
+    yield 'applicant-list', reverse(f'{app_name}:applicant-list')
+    yield 'adminprofile-list', reverse(f'{app_name}:adminprofile-list')
+    yield 'application-stats', reverse(f'{app_name}:application-stats')
+    if application:
+        yield 'application-list', reverse(f'{app_name}:application-list') + f'?tracking_id={application.tracking_id}'
+        yield 'application-track', reverse(f'{app_name}:application-track', args=[application.tracking_id])
+        yield 'application-detail', reverse(f'{app_name}:application-detail', args=[application.pk])
+        yield 'application-status-history', reverse(f'{app_name}:application-status-history', args=[application.pk])
+        yield 'applicant-detail', reverse(f'{app_name}:applicant-detail', args=[application.applicant_id])
+        yield 'applicant-search', reverse(f'{app_name}:applicant-search') + f'?q={application.applicant.last_name}'
+        yield 'async-application-list', reverse(f'{app_name}:async-application-list') + '?page_size=100'
+        yield 'async-application-list', (reverse(f'{app_name}:async-application-list')
+                                         + f'?tracking_id={application.tracking_id}')
+        yield 'async-application-detail', reverse(f'{app_name}:async-application-detail', args=[application.pk])
+        yield 'async-application-status-history', reverse(f'{app_name}:async-application-status-history',
+                                                          args=[application.pk])
+    if admin_profile:
+        yield 'adminprofile-detail', reverse(f'{app_name}:adminprofile-detail', args=[admin_profile.pk])
+    if user:
+        yield 'user-detail', reverse(f'{app_name}:user-detail', args=[user.pk])
+
+
+def get_plan_queryset(params, using='default'):
+    """
+    First page of the applications list for the query parameters of a plan (psycho.plans.APPLICATION_PLANS), filtered
+    and sorted as ApplicationViewSet does.
+    """
+    from psycho.api.views import ApplicationViewSet
+
+    queryset = ApplicationViewSet.filter_queryset(Application.objects.using(using).select_related('applicant'), params)
+    ordering = ApplicationViewSet.get_ordering(params)
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return queryset[:10]
+
+
+def reads_whole_table(node, sorted_above=False):
+    """
+    Whether a PostgreSQL plan node (EXPLAIN (FORMAT JSON)) or one of its children reads a whole table: a sequential
+    scan, or an index scan without any condition feeding a sort, which walks the whole index only to sort it again.
+    """
+    if node['Node Type'] == 'Seq Scan':
+        return True
+    if sorted_above and node['Node Type'] in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in node:
+        return True
+    sorted_above = sorted_above or node['Node Type'] == 'Sort'
+    return any(reads_whole_table(child, sorted_above) for child in node.get('Plans', ()))
+
+
+def explain(queryset):
+    """
+    EXPLAIN the queryset and tell whether the plan falls back to a sequential scan, as (plan, sequential).
+
+    On PostgreSQL, sequential scans are disabled for the EXPLAIN so that the answer does not depend on the table
+    statistics; the planner then walks a whole index instead, which reads_whole_table also reports. Only PostgreSQL
+    and SQLite are supported.
+    """
+    connection = transaction.get_connection(queryset.db)
+    with transaction.atomic(using=queryset.db):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            tree = json.loads(queryset.explain(format='json'))[0]['Plan']
+        plan = queryset.explain()
+    if connection.vendor == 'postgresql':
+        return plan, reads_whole_table(tree)
+    return plan, bool(SQLITE_FULL_SCAN.search(plan))
@@ -0,0 +1,23 @@
+"""
+Test data: applicants and applications built by psycho.seeding, saved through the ORM so that the signal handlers
+(status history, application stats, response cache) run as they do for the API writes.
+"""
+from psycho.models import Application
+from psycho.seeding import ApplicantGenerator, get_universities
+
+
+def create_applicants(count, seed=0, graduates=False):
+    generator = ApplicantGenerator(seed, universities=get_universities())
+    applicants = generator.unique_applicants(count, graduates=graduates)
+    for applicant in applicants:
+        applicant.save()
+    return applicants
+
+
+def create_applications(count, seed=0, status=Application.ApplicationStatus.PENDING, graduates=False):
+    applications = []
+    for applicant in create_applicants(count, seed, graduates):
+        application = Application(applicant=applicant, status=status)
+        application.save()
+        applications.append(application)
+    return applications
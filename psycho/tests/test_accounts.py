@@ -0,0 +1,203 @@
+import csv
+import datetime
+import io
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from psycho.accounts import AccountProvisioner
+from psycho.models import HRManagerProfile, User
+from psycho.tests.factories import create_applicants
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])  # Fast hashing
+class AccountProvisionerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.applicants = create_applicants(4)
+        cls.manager = HRManagerProfile.objects.create(
+            first_name='Ada', last_name='Lovelace', date_of_birth=datetime.date(1985, 12, 10),
+            email='ada.lovelace@example.com', phone='+2290197000001')
+
+    def provision(self, rows):
+        with AccountProvisioner(processes=1) as provisioner:
+            return provisioner.provision(rows)
+
+    def row(self, profile, username, role='applicant', **kwargs):
+        return {'role': role, 'email': profile.email, 'username': username, 'password': f'{username}-password',
+                **kwargs}
+
+    def assertAccount(self, profile, username):
+        profile.refresh_from_db()
+        user = profile.user
+        self.assertIsNotNone(user)
+        self.assertEqual((user.username, user.email), (username, profile.email))
+        self.assertTrue(user.check_password(f'{username}-password'))
+        return user
+
+    def test_accounts(self):
+        applicant = self.applicants[0]
+        reasons = self.provision([self.row(applicant, 'applicant0'),
+                                  self.row(self.manager, 'ada', role='hr_manager')])
+        self.assertEqual(reasons, [None, None])
+
+        user = self.assertAccount(applicant, 'applicant0')
+        self.assertEqual((user.first_name, user.last_name), (applicant.first_name, applicant.last_name))
+        self.assertFalse(user.is_staff)
+        self.assertEqual(list(user.groups.values_list('name', flat=True)), ['Applicant'])
+
+        manager = self.assertAccount(self.manager, 'ada')
+        self.assertEqual(list(manager.groups.values_list('name', flat=True)), ['HR Manager'])
+        self.assertTrue(manager.has_perm('psycho.can_review_applications'))
+        self.assertEqual(Group.objects.get(name='HR Manager').permissions.count(), 3)
+
+    def test_invalid_rows(self):
+        applicant = self.applicants[0]
+        reasons = self.provision([
+            'not a row',
+            self.row(applicant, 'applicant0', role='student'),
+            self.row(applicant, ''),
+            self.row(applicant, 'applicant0', password=''),
+            {'role': 'applicant', 'email': 'nobody@example.com', 'username': 'nobody', 'password': 'password'},
+            self.row(applicant, 'applicant0', role='hr_manager'),  # Not an HR manager's email
+        ])
+        self.assertEqual(reasons, [
+            'not a row',
+            'role: "student" is not one of applicant, hr_manager, admin.',
+            'username: This field is required.',
+            'password: This field is required.',
+            'No applicant profile with this email.',
+            'No hr_manager profile with this email.',
+        ])
+        self.assertFalse(User.objects.exists())
+
+    def test_email_is_normalized(self):
+        applicant = self.applicants[0]
+        self.assertEqual(self.provision([self.row(applicant, 'applicant0', email=f' {applicant.email.upper()} ')]),
+                         [None])
+        self.assertAccount(applicant, 'applicant0')
+
+    def test_conflicts_with_the_database(self):
+        first, second, third = self.applicants[:3]
+        User.objects.create_user(username='taken', email='someone@example.com', password='password')
+        User.objects.create_user(username='owner', email=second.email, password='password')
+        self.assertEqual(self.provision([self.row(first, 'applicant0')]), [None])
+
+        reasons = self.provision([
+            self.row(first, 'applicant0-again'),
+            self.row(second, 'applicant1'),
+            self.row(third, 'taken'),
+        ])
+        self.assertEqual(reasons, [
+            'This profile is already linked to a user.',
+            'Email is already taken.',
+            'Username is already taken.',
+        ])
+        for applicant in (second, third):
+            applicant.refresh_from_db()
+            self.assertIsNone(applicant.user)
+
+    def test_conflicts_within_a_batch(self):
+        first, second = self.applicants[:2]
+        reasons = self.provision([
+            self.row(first, 'applicant'),
+            self.row(second, 'applicant'),  # Same username
+            self.row(first, 'applicant0'),  # Same email
+        ])
+        self.assertEqual(reasons, [None, 'Username is already taken.', 'Email is already taken.'])
+        self.assertAccount(first, 'applicant')
+        second.refresh_from_db()
+        self.assertIsNone(second.user)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_concurrent_conflict(self):
+        """
+        A value taken after the conflicts check fails the bulk insert: the batch is inserted again account by account,
+        only the conflicting one is rejected.
+        """
+        applicants = self.applicants[:3]
+        User.objects.create_user(username='applicant1', email='someone@example.com', password='password')
+        with mock.patch.object(AccountProvisioner, 'find_conflicts', return_value=(set(), set())):
+            reasons = self.provision([self.row(applicant, f'applicant{i}') for i, applicant in enumerate(applicants)])
+
+        self.assertIsNone(reasons[0])
+        self.assertTrue(reasons[1].startswith('Database error while creating the account: '))
+        self.assertIsNone(reasons[2])
+        for i in (0, 2):
+            user = self.assertAccount(applicants[i], f'applicant{i}')
+            self.assertEqual(list(user.groups.values_list('name', flat=True)), ['Applicant'])
+        applicants[1].refresh_from_db()
+        self.assertIsNone(applicants[1].user)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(User.groups.through.objects.count(), 2)
+
+    def test_history(self):
+        applicant = self.applicants[0]
+        records = applicant.history.count()
+        self.provision([self.row(applicant, 'applicant0')])
+        self.assertEqual(applicant.history.count(), records + 1)
+        self.assertEqual(applicant.history.first().user_id, applicant.history.first().instance.user_id)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ProvisionAccountsCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.applicants = create_applicants(3)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def call(self, name, content, *args):
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        call_command('provision_accounts', str(path), '--processes', '1', '--batch-size', '2', *args,
+                     stdout=io.StringIO())
+        return path
+
+    def test_csv(self):
+        first, second, third = self.applicants
+        accounts = [
+            (first.email, 'applicant0'),
+            (second.email, 'applicant0'),  # Same username, in another batch
+            (third.email, 'applicant2'),
+        ]
+        lines = [f'{email},{username},{username}-password\n' for email, username in accounts]
+        content = 'email,username,password\n' + ''.join(lines)
+        path = self.call('accounts.csv', content, '--role', 'applicant')
+
+        for applicant, username in ((first, 'applicant0'), (third, 'applicant2')):
+            applicant.refresh_from_db()
+            self.assertTrue(applicant.user.check_password(f'{username}-password'))
+            self.assertEqual(applicant.user.username, username)
+        with open(f'{path}.rejects.csv', newline='', encoding='utf-8') as rejects:
+            self.assertEqual(list(csv.DictReader(rejects)), [
+                {'email': second.email, 'username': 'applicant0', 'reject_reason': 'Username is already taken.'},
+            ])
+
+    def test_jsonl(self):
+        first, second, _ = self.applicants
+        content = '\n'.join([
+            json.dumps({'role': 'applicant', 'email': first.email, 'username': 'applicant0', 'password': 'secret-1'}),
+            '{not json',
+            json.dumps({'role': 'admin', 'email': second.email, 'username': 'applicant1', 'password': 'secret-2'}),
+        ])
+        path = self.call('accounts.jsonl', content)
+
+        first.refresh_from_db()
+        self.assertTrue(first.user.check_password('secret-1'))
+        with open(f'{path}.rejects.jsonl', encoding='utf-8') as rejects:
+            rejected = [json.loads(line) for line in rejects]
+        self.assertEqual([(row['line'], row['row']) for row in rejected], [
+            (2, {}),
+            (3, {'role': 'admin', 'email': second.email, 'username': 'applicant1'}),  # Without the password
+        ])
+        self.assertTrue(rejected[0]['reject_reason'].startswith('Invalid JSON: '))
+        self.assertEqual(rejected[1]['reject_reason'], 'No admin profile with this email.')
@@ -0,0 +1,52 @@
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.models import Application
+from psycho.tests.factories import create_applications
+
+PENDING = Application.ApplicationStatus.PENDING
+REJECTED = Application.ApplicationStatus.REJECTED
+
+
+class BulkStatusTests(APITestCase):
+    url = reverse('psycho:application-bulk-status')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.applications = create_applications(5)
+
+    def assertNothingChanged(self):
+        self.assertFalse(Application.objects.exclude(status=PENDING).exists())
+
+    def test_empty_filter_is_rejected(self):
+        response = self.client.post(self.url, {'filter': {}, 'status': REJECTED}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('filter', response.data)
+        self.assertNothingChanged()
+
+    def test_empty_ids_are_rejected(self):
+        response = self.client.post(self.url, {'ids': [], 'status': REJECTED}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.data)
+        self.assertNothingChanged()
+
+    def test_ids_or_filter_is_required(self):
+        response = self.client.post(self.url, {'status': REJECTED}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNothingChanged()
+
+    def test_ids(self):
+        ids = [str(application.pk) for application in self.applications[:2]]
+        response = self.client.post(self.url, {'ids': ids, 'status': REJECTED}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(set(Application.objects.filter(status=REJECTED).values_list('pk', flat=True)),
+                         {application.pk for application in self.applications[:2]})
+
+    def test_filter(self):
+        degree = self.applications[0].applicant.degree
+        response = self.client.post(self.url, {'filter': {'degree': degree}, 'status': REJECTED}, format='json')
+        self.assertEqual(response.status_code, 200)
+        expected = {application.pk for application in self.applications if application.applicant.degree == degree}
+        self.assertEqual(response.data['updated'], len(expected))
+        self.assertEqual(set(Application.objects.filter(status=REJECTED).values_list('pk', flat=True)), expected)
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho import cache, lookup
+from psycho.replicas import read_alias
+from psycho.tests.factories import create_applications
+
+RESPONSE_CACHE = {'ENABLED': True, 'ALIAS': 'default', 'COUNTERS_ALIAS': 'counters', 'TIMEOUT': 300,
+                  'STATS_FLUSH_INTERVAL': 3600}
+
+
+@override_settings(PSYCHO_RESPONSE_CACHE=RESPONSE_CACHE)
+class ResponseCacheTests(APITestCase):
+    url = reverse('psycho:application-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.applications = create_applications(2)
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['counters'].clear()
+        cache.pending_stats.clear()
+
+    def test_write_invalidates(self):
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):  # The generations are bumped on commit
+            self.applications[0].save()
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+    def test_counters_outlive_the_responses(self):
+        cache.bump_generations('applications')
+        caches['default'].clear()  # As a full cache culling or evicting the responses would
+        self.assertEqual(cache.get_generations(['applications']), [1])
+
+    def test_stats_are_flushed(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(cache.get_stats(['application-list']), {'application-list': (0, 0)})
+        cache.flush_stats()
+        self.assertEqual(cache.get_stats(['application-list']), {'application-list': (1, 1)})
+
+    @override_settings(PSYCHO_RESPONSE_CACHE={**RESPONSE_CACHE, 'STATS_FLUSH_INTERVAL': 0})
+    def test_stats_flush_interval(self):
+        self.client.get(self.url)
+        self.assertEqual(cache.get_stats(['application-list']), {'application-list': (0, 1)})
+
+
+@override_settings(PSYCHO_RESPONSE_CACHE=RESPONSE_CACHE, PSYCHO_READ_REPLICAS={'ALIASES': ['replica']})
+class ReplicaFillTests(APITestCase):
+    def setUp(self):
+        caches['default'].clear()
+        caches['counters'].clear()
+        token = read_alias.set('replica')  # As the ReplicaMiddleware does for an unpinned GET
+        self.addCleanup(read_alias.reset, token)
+
+    def test_no_fill_after_a_bump(self):
+        self.assertTrue(cache.replica_may_fill(['global', 'applications']))
+        cache.bump_generations('applications')
+        self.assertFalse(cache.replica_may_fill(['global', 'applications']))
+        self.assertTrue(cache.replica_may_fill(['global', 'applicants']))
+        read_alias.set(None)
+        self.assertTrue(cache.replica_may_fill(['global', 'applications']))  # The primary has the write
+
+    def test_lookup_no_fill_after_a_write(self):
+        stale = {'tracking_id': 'PSY-2025-0100', 'status': 'Pending'}
+        with patch('psycho.lookup.fetch_status', return_value=stale) as fetch_status:
+            lookup.forget('PSY-2025-0100')  # On the commit of a status change
+            self.assertEqual(lookup.lookup_status('PSY-2025-0100'), stale)
+            self.assertEqual(lookup.lookup_status('PSY-2025-0100'), stale)
+            self.assertEqual(fetch_status.call_count, 2)
+
+            caches['counters'].clear()  # MAX_LAG_SECONDS later
+            lookup.lookup_status('PSY-2025-0100')
+            lookup.lookup_status('PSY-2025-0100')
+            self.assertEqual(fetch_status.call_count, 3)
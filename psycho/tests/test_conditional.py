@@ -0,0 +1,69 @@
+import threading
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from psycho.models import Application
+from psycho.tests.factories import create_applications
+
+
+class ConditionalUpdateTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.application = create_applications(1)[0]
+        cls.url = reverse('psycho:application-detail', args=[cls.application.pk])
+
+    def patch(self, status, etag):
+        return self.client.patch(self.url, {'status': status}, format='json', headers={'If-Match': etag})
+
+    def test_update_returns_the_new_etag(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.patch('Accepted', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response['ETag'], self.client.get(self.url)['ETag'])
+        self.assertIn('Last-Modified', response)
+
+        self.assertEqual(self.patch('Rejected', response['ETag']).status_code, 200)  # No GET in between
+
+    def test_stale_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.patch('Accepted', etag).status_code, 200)
+        self.assertEqual(self.patch('Rejected', etag).status_code, 412)
+        self.application.refresh_from_db()
+        self.assertEqual(self.application.status, 'Accepted')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SQLite has no row locks')
+class ConcurrentUpdateTests(TransactionTestCase):
+    def test_same_etag_updates_one_after_the_other(self):
+        application = create_applications(1)[0]
+        url = reverse('psycho:application-detail', args=[application.pk])
+        etag = APIClient().get(url)['ETag']
+        responses = []
+
+        def patch():
+            try:
+                responses.append(APIClient().patch(url, {'status': 'Rejected'}, format='json',
+                                                   headers={'If-Match': etag}))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            # Another update holding the row: the PATCH below checks its precondition once it is committed
+            Application.objects.select_for_update().get(pk=application.pk)
+            thread = threading.Thread(target=patch)
+            thread.start()
+            thread.join(timeout=0.5)
+            self.assertTrue(thread.is_alive())  # Waiting for the lock
+            application.status = 'Accepted'
+            application.save()
+        thread.join()
+
+        self.assertEqual(responses[0].status_code, 412)
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'Accepted')
@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.api.views import EXPORT_COLUMNS, ApplicationViewSet
+from psycho.tests.factories import create_applications
+
+
+class ExportTests(APITestCase):
+    url = reverse('psycho:application-export')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.applications = create_applications(7, graduates=True)
+
+    def setUp(self):
+        ApplicationViewSet.export_chunk_size = 3  # Several batches of rows
+        self.addCleanup(setattr, ApplicationViewSet, 'export_chunk_size', 2000)
+
+    def assertCSV(self, content):
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual({row['tracking_id'] for row in rows},
+                         {application.tracking_id for application in self.applications})
+
+    def test_csv(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertCSV(b''.join(response.streaming_content))
+
+    def test_ndjson(self):
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), len(self.applications))
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+
+    def test_errors_are_json(self):
+        response = self.client.get(self.url, {'sort_by': 'first_name'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('sort_by', json.loads(response.content))
+
+    async def test_asgi_streams_an_async_iterator(self):
+        response = await AsyncClient().get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)  # Not read whole by the ASGI handler
+        self.assertCSV(b''.join([chunk async for chunk in response.streaming_content]))
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from psycho.fastpath import Unsupported, compile_row_serializer, get_base_url, get_row_serializer
+from psycho.fieldsets import get_fieldsets, optimize_queryset
+from psycho.models import ApplicantProfile, Application
+from psycho.serializers import ApplicantProfileSerializer, ApplicationSerializer
+from psycho.tests.factories import create_applications
+
+APPLICATION_FIELDSETS = [
+    {},
+    {'fields': 'tracking_id,status,applicant.last_name,applicant.baccalaureate_average'},
+    {'fields': 'url,applicant.url,applicant.user,applicant.username,applicant.university'},
+    {'fields': 'status_history_ids,applicant.university.name,applicant.university_average'},
+    {'exclude': 'status_history_ids,applicant.university'},
+    {'exclude': 'applicant'},
+]
+APPLICANT_FIELDSETS = [
+    {},
+    {'fields': 'url,first_name,user,user_id,university.name'},
+    {'fields': 'username,university_field_of_study,university_average'},
+    {'exclude': 'university,date_registered'},
+]
+
+
+class FastPathTests(APITestCase):
+    """
+    The RowSerializer of a serializer renders the same JSON as the serializer itself.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # No university (high school), a university with its optional fields, then without them
+        create_applications(3, seed=1)
+        applications = create_applications(4, seed=2, graduates=True)
+        applicant = applications[0].applicant
+        applicant.university_field_of_study = applicant.university_average = None
+        applicant.save()
+        # A user account: user, user_id and username are not null
+        applications[1].applicant.create_user_account('fastpath', 'a-long-password')
+        # More transitions than the status history embedded in the payloads
+        application = applications[2]
+        for status in [Application.ApplicationStatus.INCOMPLETE, Application.ApplicationStatus.PENDING] * 4:
+            application.status = status
+            application.save()
+
+    def assertSameOutput(self, serializer_class, queryset, params):
+        request = Request(APIRequestFactory().get('/', params))
+        fields, exclude = get_fieldsets(request.query_params)
+        serializer = serializer_class(context={'request': request}, fields=fields, exclude=exclude)
+        regular = serializer_class(optimize_queryset(queryset, serializer), many=True, context={'request': request},
+                                   fields=fields, exclude=exclude).data
+
+        row_serializer = get_row_serializer(serializer_class, request)
+        self.assertIsNotNone(row_serializer)
+        fast = row_serializer.serialize(row_serializer.values(queryset), get_base_url(request))
+
+        self.assertEqual(JSONRenderer().render(fast).decode(), JSONRenderer().render(regular).decode())
+
+    def test_applications(self):
+        for params in APPLICATION_FIELDSETS:
+            with self.subTest(**params):
+                self.assertSameOutput(ApplicationSerializer, Application.objects.order_by('pk'), params)
+
+    def test_applicants(self):
+        for params in APPLICANT_FIELDSETS:
+            with self.subTest(**params):
+                self.assertSameOutput(ApplicantProfileSerializer, ApplicantProfile.objects.order_by('pk'), params)
+
+    @override_settings(ALLOWED_HOSTS=['a.example.com', 'b.example.com'], PSYCHO_RESPONSE_CACHE={'ENABLED': False})
+    def test_hosts_share_the_row_serializer(self):
+        compile_row_serializer.cache_clear()
+        self.addCleanup(compile_row_serializer.cache_clear)
+        for host in ('a.example.com', 'b.example.com'):
+            with self.subTest(host=host):
+                response = self.client.get(reverse('psycho:application-list'), {'fields': 'url'}, HTTP_HOST=host)
+                self.assertTrue(all(result['url'].startswith(f'http://{host}/') for result in response.data['results']))
+        self.assertEqual(compile_row_serializer.cache_info().currsize, 1)
+
+
+@override_settings(PSYCHO_RESPONSE_CACHE={'ENABLED': False})  # Not applied by the async views
+class AsyncViewTests(APITestCase):
+    """
+    The async views render the same JSON as the sync ones, through the fast path or the regular serializer.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.application = create_applications(3, seed=3, graduates=True)[0]
+        cls.application.status = Application.ApplicationStatus.ACCEPTED
+        cls.application.save()
+
+    def assertSameOutput(self, name, async_name, *args, params=None):
+        sync_response = self.client.get(reverse(f'psycho:{name}', args=args), params)
+        async_response = self.client.get(reverse(f'psycho:{async_name}', args=args), params)
+        self.assertEqual(async_response.status_code, sync_response.status_code)
+        links = ('next', 'previous')  # Links to the list they paginate
+        self.assertEqual({key: value for key, value in async_response.json().items() if key not in links},
+                         {key: value for key, value in sync_response.json().items() if key not in links})
+
+    def assertSameOutputs(self):
+        pk = self.application.pk
+        for params in [*APPLICATION_FIELDSETS, {'cursor': '', 'page_size': 2}]:
+            with self.subTest(**params):
+                self.assertSameOutput('application-list', 'async-application-list', params=params)
+                self.assertSameOutput('application-detail', 'async-application-detail', pk, params=params)
+        self.assertSameOutput('application-status-history', 'async-application-status-history', pk)
+
+    def test_fast_path(self):
+        self.assertSameOutputs()
+
+    def test_fast_path_disabled(self):
+        with self.settings(PSYCHO_FAST_READ_PATH=False):
+            self.assertSameOutputs()
+
+    def test_unsupported_serializer(self):
+        with mock.patch('psycho.fastpath.RowSerializer', side_effect=Unsupported):
+            compile_row_serializer.cache_clear()
+            self.addCleanup(compile_row_serializer.cache_clear)
+            self.assertSameOutputs()
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from psycho.history import find_commit_callback
+from psycho.models import ApplicantProfile
+from psycho.tests.factories import create_applicants
+
+
+class DeferredHistoryTests(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.applicant = create_applicants(1)[0]
+        self.history = self.applicant.history.order_by('history_id')
+
+    def save(self, **fields):
+        for name, value in fields.items():
+            setattr(self.applicant, name, value)
+        self.applicant.save()
+
+    def test_one_record_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.save(first_name='Ada')
+                self.save(first_name='Grace')
+        self.assertEqual([record.first_name for record in self.history], [self.history[0].first_name, 'Grace'])
+        self.assertEqual(self.history.last().history_changed_fields, ['first_name'])
+
+    def test_rolled_back_savepoint_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.save(first_name='Ada')
+                try:
+                    with transaction.atomic():
+                        self.save(first_name='Grace', last_name='Hopper')
+                        raise IntegrityError
+                except IntegrityError:
+                    pass
+                self.applicant.refresh_from_db()
+        self.assertEqual(self.history.count(), 2)
+        self.assertEqual((self.history.last().first_name, self.history.last().last_name),
+                         ('Ada', ApplicantProfile.objects.get().last_name))
+        self.assertEqual(self.history.last().history_changed_fields, ['first_name'])
+
+    def test_released_savepoint_is_merged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.save(first_name='Ada')
+                with transaction.atomic():
+                    self.save(first_name='Grace')
+                self.save(last_name='Hopper')
+                try:
+                    with transaction.atomic():
+                        self.save(last_name='Lovelace')
+                        raise IntegrityError
+                except IntegrityError:
+                    pass
+        self.assertEqual(self.history.count(), 2)
+        self.assertEqual((self.history.last().first_name, self.history.last().last_name), ('Grace', 'HOPPER'))
+
+    def test_creation_in_rolled_back_savepoint(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        create_applicants(1, seed=1)
+                        raise IntegrityError
+                except IntegrityError:
+                    pass
+                self.save(first_name='Ada')
+        self.assertEqual(ApplicantProfile.history.count(), 2)
+
+
+class CommitCallbacksLayoutTests(TestCase):
+    """
+    TransactionHistory reorders and looks up its on_commit callback in the private run_on_commit list of the connection
+    (see find_commit_callback): these tests fail if a Django upgrade changes its layout.
+    """
+
+    def test_layout(self):
+        def callback():
+            pass
+
+        with transaction.atomic():
+            transaction.on_commit(callback, robust=True)
+            connection = transaction.get_connection()
+            savepoint_ids, func, robust = connection.run_on_commit[-1]
+            self.assertEqual((savepoint_ids, func, robust), (set(connection.savepoint_ids), callback, True))
+            self.assertIs(find_commit_callback(connection, callback), connection.run_on_commit[-1])
+            self.assertIsNone(find_commit_callback(connection, lambda: None))
+
+    def test_rolled_back_callback_is_discarded(self):
+        def callback():
+            pass
+
+        with transaction.atomic():
+            connection = transaction.get_connection()
+            try:
+                with transaction.atomic():
+                    transaction.on_commit(callback)
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+            self.assertIsNone(find_commit_callback(connection, callback))
+
+    def test_unexpected_layout_fails(self):
+        connection = transaction.get_connection()
+        with mock.patch.object(connection, 'run_on_commit', [(lambda: None,)]):
+            with self.assertRaisesMessage(RuntimeError, 'Unexpected on_commit callback entry'):
+                find_commit_callback(connection, print)
+
+    def test_flush_runs_after_the_batches(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with transaction.atomic():
+                applicant = create_applicants(1)[0]
+                with transaction.atomic():
+                    applicant.first_name = 'Ada'
+                    applicant.save()
+                applicant.first_name = 'Grace'
+                applicant.save()
+        history = transaction.get_connection().psycho_history
+        self.assertEqual(len(history.batches), 3)
+        flush = callbacks.index(history.flush)
+        self.assertTrue(all(callbacks.index(batch.commit) < flush for batch in history.batches))
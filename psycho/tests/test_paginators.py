@@ -0,0 +1,123 @@
+import base64
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.models import Application
+from psycho.tests.factories import create_applications
+
+
+def encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@override_settings(PSYCHO_RESPONSE_CACHE={'ENABLED': False})  # The writes of a TestCase never commit
+class KeysetPaginationTests(APITestCase):
+    url = reverse('psycho:application-list')
+
+    @classmethod
+    def setUpTestData(cls):
+        # Many ties on the status
+        create_applications(5, seed=1, status=Application.ApplicationStatus.PENDING)
+        create_applications(3, seed=2, status=Application.ApplicationStatus.ACCEPTED)
+        create_applications(2, seed=3, status=Application.ApplicationStatus.REJECTED)
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def walk_forward(self, params):
+        """
+        Return the pages (lists of application ids) from the first one, following the next links, and the last page.
+        """
+        data = self.get_page(self.url, {**params, 'cursor': ''})
+        self.assertIsNone(data['previous'])
+        pages = [[result['application_id'] for result in data['results']]]
+        while data['next'] is not None:
+            data = self.get_page(data['next'])
+            pages.append([result['application_id'] for result in data['results']])
+        return pages, data
+
+    def walk_backward(self, data):
+        pages = []
+        while data['previous'] is not None:
+            data = self.get_page(data['previous'])
+            pages.insert(0, [result['application_id'] for result in data['results']])
+        return pages
+
+    def get_expected(self, *ordering):
+        return [str(pk) for pk in Application.objects.order_by(*ordering).values_list('pk', flat=True)]
+
+    def assertWalks(self, params, ordering):
+        expected = self.get_expected(*ordering)
+        pages, last = self.walk_forward({**params, 'page_size': 3})
+        self.assertEqual([len(page) for page in pages], [3, 3, 3, 1])
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(self.walk_backward(last), pages[:-1])
+
+    def test_ties_on_the_sort_key(self):
+        self.assertWalks({'sort_by': 'status'}, ['status', 'pk'])
+
+    def test_descending(self):
+        self.assertWalks({'sort_by': '-status'}, ['-status', '-pk'])
+
+    def test_several_keys(self):
+        Application.objects.update(date_submitted=Application.objects.earliest('date_submitted').date_submitted)
+        self.assertWalks({'sort_by': 'status,-date_submitted'}, ['status', '-date_submitted', '-pk'])
+
+    def test_default_ordering(self):
+        self.assertEqual(Application._meta.ordering, ['date_submitted'])
+        self.assertWalks({}, ['date_submitted', 'pk'])
+
+    def test_insert_while_paging(self):
+        """
+        The rows inserted before the cursor do not shift the next pages: nothing is repeated nor skipped.
+        """
+        expected = self.get_expected('-date_submitted', '-pk')
+        data = self.get_page(self.url, {'sort_by': '-date_submitted', 'cursor': '', 'page_size': 4})
+        seen = [result['application_id'] for result in data['results']]
+        create_applications(1, seed=4)  # The most recent
+        while data['next'] is not None:
+            data = self.get_page(data['next'])
+            seen += [result['application_id'] for result in data['results']]
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursors(self):
+        application = Application.objects.order_by('pk').first()
+        date = application.date_submitted.isoformat()
+        cursors = {
+            'not base64': '!!!',
+            'not json': base64.urlsafe_b64encode(b'{not json').decode(),
+            'not an object': encode([1, 2]),
+            'no position': encode({'r': 0}),
+            'wrong length': encode({'p': [str(application.pk), 1], 'r': 0}),
+            'invalid uuid': encode({'p': [date, 'not-a-uuid'], 'r': 0}),
+            'list for a uuid': encode({'p': [date, ['a']], 'r': 0}),
+            'invalid date': encode({'p': ['yesterday', str(application.pk)], 'r': 0}),
+            'object for a date': encode({'p': [{}, str(application.pk)], 'r': 0}),
+            'not ascii': 'é',
+        }
+        for name, cursor in cursors.items():
+            for url in (self.url, reverse('psycho:async-application-list')):
+                with self.subTest(name, url=url):
+                    response = self.client.get(url, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.json(), {'cursor': 'Invalid cursor'})
+
+    def test_status_history_cursor(self):
+        application = Application.objects.first()
+        for status in [Application.ApplicationStatus.ACCEPTED, Application.ApplicationStatus.REJECTED] * 3:
+            application.status = status
+            application.save()
+        url = reverse('psycho:application-status-history', args=[application.pk])
+        data = self.get_page(url, {'page_size': 2})
+        ids = [result['id'] for result in data['results']]
+        while data['next'] is not None:
+            data = self.get_page(data['next'])
+            ids += [result['id'] for result in data['results']]
+        self.assertEqual(ids, list(application.status_history.order_by('-date_changed', '-pk')
+                                   .values_list('pk', flat=True)))
+        self.assertEqual(self.client.get(url, {'cursor': 'e30='}).status_code, 400)
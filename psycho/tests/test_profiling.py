@@ -0,0 +1,34 @@
+import tempfile
+
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.profiling import HEADER, ID_HEADER, list_profiles, make_token
+
+
+class ProfilingTests(APITestCase):
+    url = reverse('psycho:application-list')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PSYCHO_PROFILING={'ENABLED': True, 'DIRECTORY': directory.name,
+                                                       'TRACEMALLOC': False})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.headers = {HEADER: make_token()}
+
+    def test_wsgi_request_is_profiled(self):
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([profile['id'] for profile in list_profiles()], [response[ID_HEADER]])
+        self.assertEqual(list_profiles()[0]['route'], 'psycho:application-list')
+
+    async def test_asgi_request_is_not_profiled(self):
+        with self.assertLogs('psycho.profiling', 'WARNING') as logs:
+            response = await AsyncClient().get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(ID_HEADER, response)
+        self.assertEqual(list_profiles(), [])
+        self.assertIn(f'Not profiling GET {self.url}', logs.output[-1])
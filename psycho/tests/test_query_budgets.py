@@ -0,0 +1,62 @@
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.instrumentation import QueryRecorder
+from psycho.models import AdminProfile, Application, University
+from psycho.seeding import ApplicantGenerator, get_payload, get_universities
+from psycho.testing import assert_query_budget, sample_requests
+from psycho.tests.factories import create_applications
+from psycho.urls import QUERY_BUDGETS
+
+
+@override_settings(PSYCHO_RESPONSE_CACHE={'ENABLED': False}, PSYCHO_STATUS_LOOKUP={'ENABLED': False})
+class QueryBudgetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Enough rows for a N+1 to show on a page, some with a status history of several transitions
+        applications = create_applications(8, graduates=True)
+        for application in applications[:3]:
+            application.status = Application.ApplicationStatus.ACCEPTED
+            application.save()
+        admin_profile = AdminProfile(first_name='Ada', last_name='Admin', email='ada.admin@example.com',
+                                     phone='+2290197000000')
+        admin_profile.create_superuser_account('ada', 'a-long-password')
+
+    def test_every_budget_is_checked(self):
+        self.assertEqual({route_name for route_name, url in sample_requests()}, set(QUERY_BUDGETS))
+
+    def test_budgets(self):
+        for route_name, url in sample_requests():
+            with self.subTest(url=url):
+                with assert_query_budget(route_name):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(PSYCHO_QUERY_INSTRUMENTATION={'HEADERS': True})
+    def test_writes_have_no_budget(self):
+        applicant = ApplicantGenerator(1, universities=get_universities()).unique_applicants(1, graduates=True)[0]
+        with self.assertNoLogs('psycho.queries', 'WARNING'):
+            response = self.client.post(reverse('psycho:application-list'), {'applicant': get_payload(applicant)},
+                                        format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('X-DB-Query-Budget', response)
+        self.assertIn('X-DB-Query-Budget', self.client.get(reverse('psycho:application-list')))
+
+    def test_over_budget(self):
+        with self.assertRaisesMessage(AssertionError, 'over its budget of 0'):
+            with assert_query_budget('application-list', budget=0):
+                Application.objects.count()
+
+
+class RepeatedQueryTests(TestCase):
+    def test_bulk_insert_chunks_are_not_reported(self):
+        with QueryRecorder() as recorder:
+            University.objects.bulk_create([University(name=f'U{i}') for i in range(25)], batch_size=5)
+        self.assertEqual(recorder.repeated(), [])
+
+    def test_repeated_inserts_are_reported(self):
+        with QueryRecorder() as recorder:
+            for i in range(5):
+                University.objects.create(name=f'U{i}')
+        self.assertEqual([count for sql, count in recorder.repeated()], [5])
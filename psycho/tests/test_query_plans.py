@@ -0,0 +1,35 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.models import Application
+from psycho.plans import APPLICATION_PLANS
+from psycho.testing import explain, get_plan_queryset
+from psycho.tests.factories import create_applications
+
+
+@skipUnless(connection.vendor in ('postgresql', 'sqlite'), 'EXPLAIN is only parsed for PostgreSQL and SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_applications(20, graduates=True)
+
+    def test_plans_use_an_index(self):
+        for params in APPLICATION_PLANS:
+            with self.subTest(**params):
+                plan, sequential = explain(get_plan_queryset(params))
+                self.assertFalse(sequential, f'Sequential scan for {params}:\n{plan}')
+
+    def test_unindexed_sort_is_a_sequential_scan(self):
+        plan, sequential = explain(Application.objects.order_by('applicant__first_name')[:10])
+        self.assertTrue(sequential, plan)
+
+
+class UnsupportedSortTests(APITestCase):
+    def test_unsupported_sort_is_rejected(self):
+        response = self.client.get(reverse('psycho:application-list'), {'sort_by': 'first_name'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sort_by', response.data)
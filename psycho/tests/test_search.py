@@ -0,0 +1,113 @@
+from unittest import SkipTest, mock, skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.models import ApplicantProfile, Application
+from psycho.search import SQLITE_SEARCH_TABLE, fold, search_applicants
+from psycho.tests.factories import create_applicants
+
+
+class SearchTestsMixin:
+    """
+    The search endpoint behaviour, the same whichever index serves it.
+    """
+    url = reverse('psycho:applicant-search')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.akindes, cls.curie, cls.curieux = create_applicants(3)
+        cls.set_names(cls.akindes, 'Sèna', 'Akindès', 'sena.akindes@example.com')
+        cls.set_names(cls.curie, 'Marie', 'Curie', 'marie.curie@example.com')
+        cls.set_names(cls.curieux, 'Pierre', 'Dupont', 'pierre.curieux@example.com')
+
+    @staticmethod
+    def set_names(applicant, first_name, last_name, email):
+        applicant.first_name, applicant.last_name, applicant.email = first_name, last_name, email
+        applicant.save()
+
+    def search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [result['applicant_id'] for result in response.data['results']]
+
+    def test_accents_are_ignored(self):
+        for q in ('akindes', 'AKINDÈS', 'akìndês', 'Sena'):
+            with self.subTest(q=q):
+                self.assertEqual(self.search(q), [str(self.akindes.pk)])
+
+    def test_accented_query_finds_plain_names(self):
+        self.assertEqual(self.search('mârie'), [str(self.curie.pk)])
+
+    def test_more_matching_fields_rank_first(self):
+        self.assertEqual(self.search('curie'), [str(self.curie.pk), str(self.curieux.pk)])
+
+    def test_limit(self):
+        self.assertEqual(self.search('curie', limit=1), [str(self.curie.pk)])
+
+    def test_empty_query(self):
+        for q in ('', '   '):
+            with self.subTest(q=q):
+                self.assertEqual(self.search(q), [])
+
+    def test_short_query(self):
+        self.assertEqual(self.search('sè'), [str(self.akindes.pk)])
+
+    def test_tracking_id(self):
+        application = Application(applicant=self.curie)
+        application.save()
+        self.assertEqual(self.search(application.tracking_id.lower()), [str(self.curie.pk)])
+
+    def test_updates_are_searchable(self):
+        self.set_names(self.curieux, 'Pierre', 'Ngolò', 'pierre.ngolo@example.com')
+        self.assertEqual(self.search('ngolo'), [str(self.curieux.pk)])
+        self.assertEqual(self.search('curie'), [str(self.curie.pk)])
+
+    def test_reads_from_the_routed_database(self):
+        with mock.patch('psycho.search.router.db_for_read', return_value='default') as db_for_read:
+            search_applicants('curie')
+        db_for_read.assert_called_with(ApplicantProfile)
+
+
+def has_sqlite_search_table():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SQLITE_SEARCH_TABLE])
+        return cursor.fetchone() is not None
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 search is specific to SQLite')
+class SQLiteSearchTests(SearchTestsMixin, APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not has_sqlite_search_table():
+            raise SkipTest('SQLite built without FTS5')
+        super().setUpClass()
+
+    def test_search_table_is_folded(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT last_name FROM {SQLITE_SEARCH_TABLE} WHERE applicant_id = %s',
+                           [self.akindes.pk.hex])
+            self.assertEqual(cursor.fetchone()[0], fold(self.akindes.last_name))
+
+
+def has_pg_trgm():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Trigram search is specific to PostgreSQL')
+class PostgreSQLSearchTests(SearchTestsMixin, APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not has_pg_trgm():
+            raise SkipTest('pg_trgm is not installed')
+        super().setUpClass()
+
+
+class FoldTests(SimpleTestCase):
+    def test_fold(self):
+        self.assertEqual(fold('Akindès Ngolò Ŝœur ĲSSEL'), 'Akindes Ngolo Sœur ĲSSEL')
+        self.assertIsNone(fold(None))
@@ -0,0 +1,78 @@
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+
+from psycho.models import ApplicantProfile, Application, ApplicationStats
+from psycho.stats import TOTAL, StatsDelta, count_applications, get_stats, rebuild_stats
+from psycho.tests.factories import create_applications
+
+ROW = {'status': 'Pending', 'degree': 'BACHELOR', 'baccalaureate_series': 'D', 'gender': 'M',
+       'baccalaureate_average': 12.5}
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.applications = create_applications(12, graduates=True)
+
+    def test_shards_add_up(self):
+        self.assertGreater(ApplicationStats.objects.filter(dimension=TOTAL[0]).count(), 1)  # Spread over shards
+        self.assertEqual(rebuild_stats(dry_run=True), {})
+        self.assertEqual(count_applications(), 12)
+        self.assertEqual(get_stats()['by_status']['Pending']['count'], 12)
+
+    def test_rebuild_gathers_the_shards(self):
+        applicant = self.applications[0].applicant
+        gender = 'F' if applicant.gender == 'M' else 'M'
+        # Behind the ORM's back
+        ApplicantProfile.objects.filter(applicant_id=applicant.applicant_id).update(gender=gender)
+        Application.objects.filter(pk=self.applications[1].pk).update(status='Accepted')
+
+        drift = rebuild_stats()
+
+        self.assertEqual(set(drift), {('gender', 'M'), ('gender', 'F'), ('status', 'Pending'), ('status', 'Accepted')})
+        self.assertEqual(rebuild_stats(dry_run=True), {})
+        self.assertFalse(ApplicationStats.objects.filter(dimension='status', value='Pending', count__gt=0)
+                         .exclude(shard=0).exists())
+        self.assertEqual(get_stats()['by_status']['Accepted']['count'], 1)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'SQLite locks the whole database for a write')
+class ConcurrentDeltaTests(TransactionTestCase):
+    def apply_in_thread(self, shard):
+        """
+        Apply a delta to the shard from another connection, giving up on a lock wait. Return the error, if any.
+        """
+        errors = []
+
+        def worker():
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET lock_timeout = '500ms'")
+                delta = StatsDelta()
+                delta.add(ROW)
+                delta.apply()
+            except OperationalError as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        with patch('psycho.stats.random.randrange', return_value=shard):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+        return errors[0] if errors else None
+
+    def test_other_shard_does_not_wait(self):
+        with transaction.atomic():
+            with patch('psycho.stats.random.randrange', return_value=0):
+                delta = StatsDelta()
+                delta.add(ROW)
+                delta.apply()
+            # The same buckets, locked by this transaction until it commits
+            self.assertIsNone(self.apply_in_thread(shard=1))
+            self.assertIsNotNone(self.apply_in_thread(shard=0))
+        self.assertEqual(count_applications(), 2)
@@ -0,0 +1,117 @@
+import datetime
+import re
+import threading
+
+from django.db import IntegrityError, connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from psycho.models import ApplicantProfile, Application, TrackingIdCounter
+from psycho.seeding import ApplicantGenerator, get_payload, get_universities
+from psycho.tests.factories import create_applications
+from psycho.tracking import TOKEN_ALPHABET, CounterTrackingIdAllocator, TrackingIdsExhausted
+
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    """
+    Threads allocating on one prefix, each with its own connection, as concurrent requests do.
+    """
+    threads = 8
+    count = 25
+    prefix = 'ZZ-010100-'
+
+    def get_suffix(self, tracking_id):
+        suffix, token = tracking_id.removeprefix(self.prefix).split('-')
+        return int(suffix)
+
+    def allocate_concurrently(self, allocate):
+        barrier = threading.Barrier(self.threads)
+        allocated, errors = [], []
+
+        def worker():
+            try:
+                barrier.wait()  # Start together
+                allocated.extend(allocate() for _ in range(self.count))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        self.assertEqual(errors, [])
+        return allocated
+
+    def test_no_duplicate(self):
+        allocator = CounterTrackingIdAllocator()
+        applicant = ApplicantProfile(last_name='ZZ', date_of_birth=datetime.date(2000, 1, 1))  # Never saved
+
+        allocated = self.allocate_concurrently(lambda: allocator.allocate(applicant))
+
+        total = self.threads * self.count
+        first_value = allocator.first_value
+        self.assertEqual(sorted(self.get_suffix(tracking_id) for tracking_id in allocated),
+                         list(range(first_value, first_value + total)))
+        self.assertEqual(TrackingIdCounter.objects.get(prefix=self.prefix).last_value, first_value + total - 1)
+
+    def test_blocks_do_not_overlap(self):
+        allocator = CounterTrackingIdAllocator()
+        applicants = [ApplicantProfile(last_name='ZZ', date_of_birth=datetime.date(2000, 1, 1))] * 3
+
+        blocks = self.allocate_concurrently(lambda: tuple(allocator.allocate_many(applicants)))
+
+        allocated = [tracking_id for block in blocks for tracking_id in block]
+        self.assertEqual(len(set(allocated)), len(allocated))
+        for block in blocks:  # allocate_many reserves consecutive suffixes
+            suffixes = [self.get_suffix(tracking_id) for tracking_id in block]
+            self.assertEqual(suffixes, list(range(suffixes[0], suffixes[0] + len(applicants))))
+
+
+class ExhaustedPrefixTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generator = ApplicantGenerator(0, universities=get_universities())
+        cls.applicant = generator.unique_applicants(1, graduates=True)[0]
+        cls.prefix = CounterTrackingIdAllocator.get_prefix(cls.applicant)
+        TrackingIdCounter.objects.create(prefix=cls.prefix, last_value=CounterTrackingIdAllocator.max_value)
+
+    def test_allocation(self):
+        with self.assertRaises(TrackingIdsExhausted):
+            CounterTrackingIdAllocator().allocate(self.applicant)
+
+    def test_submission_is_rejected(self):
+        response = self.client.post(reverse('psycho:application-list'), {'applicant': get_payload(self.applicant)},
+                                    format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(self.prefix, response.data['non_field_errors'][0])
+        self.assertFalse(Application.objects.exists())
+        self.assertFalse(ApplicantProfile.objects.exists())
+
+
+class TrackingIdTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.application = create_applications(1, graduates=True)[0]
+        cls.prefix = CounterTrackingIdAllocator.get_prefix(cls.application.applicant)
+
+    def test_format(self):
+        self.assertRegex(self.application.tracking_id, rf'^{re.escape(self.prefix)}100-[{TOKEN_ALPHABET}]{{5}}$')
+        applicant = self.application.applicant
+        self.assertNotEqual(CounterTrackingIdAllocator().allocate(applicant).split('-')[-1],
+                            CounterTrackingIdAllocator().allocate(applicant).split('-')[-1])
+
+    def test_failed_insert_gives_the_suffix_back(self):
+        with self.assertRaises(IntegrityError):  # One application per applicant
+            Application(applicant=self.application.applicant).save()
+        self.assertEqual(TrackingIdCounter.objects.get(prefix=self.prefix).last_value, 100)
+
+    def test_list_by_tracking_id_has_no_applicant_data(self):
+        url = reverse('psycho:application-list')
+        response = self.client.get(url, {'tracking_id': self.application.tracking_id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {'tracking_id', 'status', 'date_submitted', 'date_updated'})
+        self.assertEqual(self.client.get(url, {'tracking_id': self.prefix + '100'}).status_code, 404)
@@ -0,0 +1,120 @@
+"""
+Tracking ID allocation.
+
+A tracking ID reads "{last_name[:2]}-{ddmmyy_of_birth}-{suffix}-{token}", e.g. "DO-200501-100-K7QX2". The allocator
+in use is set by the PSYCHO_TRACKING_ID_ALLOCATOR setting (a dotted path to a TrackingIdAllocator subclass).
+
+The suffix makes the tracking ID unique. The prefix is known to whoever knows the applicant's name and date of birth,
+and the suffixes are handed out in order: the random token (TOKEN_LENGTH characters of TOKEN_ALPHABET, about 33
+million values) keeps the tracking IDs from being guessed. The tracking IDs handed out before it have no token.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+from psycho.models import TrackingIdCounter
+
+DEFAULT_TRACKING_ID_ALLOCATOR = 'psycho.tracking.CounterTrackingIdAllocator'
+TOKEN_ALPHABET = '23456789ABCDEFGHJKMNPQRSTUVWXYZ'  # No 0/O, 1/I/L to misread
+TOKEN_LENGTH = 5
+
+
+class TrackingIdsExhausted(ValidationError):
+    """
+    Every suffix of a tracking ID prefix is taken: the application cannot be given a tracking ID.
+    """
+
+    def __init__(self, prefix):
+        super().__init__(f"No tracking ID left for the prefix {prefix}: too many applicants share the first letters "
+                         f"of this last name and this date of birth.", code='tracking_ids_exhausted')
+        self.prefix = prefix
+
+
+class TrackingIdAllocator:
+    """
+    Base class for tracking ID allocators. Subclasses implement allocate_many.
+    """
+
+    @staticmethod
+    def get_prefix(applicant):
+        return f"{applicant.last_name[:2]}-{applicant.date_of_birth.strftime('%d%m%y')}-"
+
+    @staticmethod
+    def make_tracking_id(prefix, suffix):
+        token = ''.join(secrets.choice(TOKEN_ALPHABET) for _ in range(TOKEN_LENGTH))
+        return f'{prefix}{suffix}-{token}'
+
+    def allocate(self, applicant):
+        """
+        Return a free tracking ID for the applicant, or raise TrackingIdsExhausted.
+        """
+        return self.allocate_many([applicant])[0]
+
+    def allocate_many(self, applicants):
+        """
+        Return one free tracking ID per applicant, in the same order, or raise TrackingIdsExhausted.
+        """
+        raise NotImplementedError
+
+
+class CounterTrackingIdAllocator(TrackingIdAllocator):
+    """
+    Hand out suffixes from a per prefix counter (TrackingIdCounter).
+
+    On PostgreSQL and SQLite, a block of suffixes is reserved with a single INSERT ... ON CONFLICT DO UPDATE ...
+    RETURNING statement: there is no read-then-write, so concurrent submissions can neither collide nor retry.
+    Other backends lock the counter row instead.
+    """
+    first_value = 100
+    max_value = 9999  # Application.tracking_id is 20 characters long at most
+
+    def reserve(self, prefix, count=1):
+        """
+        Reserve count consecutive suffixes for the prefix and return the last one.
+        """
+        if connection.vendor in ('postgresql', 'sqlite') and connection.features.can_return_columns_from_insert:
+            table = connection.ops.quote_name(TrackingIdCounter._meta.db_table)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (prefix, last_value) VALUES (%s, %s) "
+                    f"ON CONFLICT (prefix) DO UPDATE SET last_value = {table}.last_value + %s "
+                    f"RETURNING last_value",
+                    [prefix, self.first_value - 1 + count, count],
+                )
+                last_value = cursor.fetchone()[0]
+        else:
+            with transaction.atomic():
+                counter, created = TrackingIdCounter.objects.select_for_update().get_or_create(
+                    prefix=prefix, defaults={'last_value': self.first_value - 1 + count})
+                if not created:
+                    TrackingIdCounter.objects.filter(prefix=prefix).update(last_value=F('last_value') + count)
+                    counter.refresh_from_db()
+                last_value = counter.last_value
+
+        if last_value > self.max_value:
+            raise TrackingIdsExhausted(prefix)
+        return last_value
+
+    def allocate_many(self, applicants):
+        prefixes = [self.get_prefix(applicant) for applicant in applicants]
+        counts = {}
+        for prefix in prefixes:
+            counts[prefix] = counts.get(prefix, 0) + 1
+
+        next_values = {prefix: self.reserve(prefix, count) - count + 1 for prefix, count in counts.items()}
+        tracking_ids = []
+        for prefix in prefixes:
+            tracking_ids.append(self.make_tracking_id(prefix, next_values[prefix]))
+            next_values[prefix] += 1
+        return tracking_ids
+
+
+def get_tracking_id_allocator():
+    """
+    Return an instance of the allocator configured by PSYCHO_TRACKING_ID_ALLOCATOR.
+    """
+    return import_string(getattr(settings, 'PSYCHO_TRACKING_ID_ALLOCATOR', DEFAULT_TRACKING_ID_ALLOCATOR))()
@@ -1,6 +1,6 @@
 from django.urls import path
 from psycho import views
-from psycho.api import views as api_views
+from psycho.api import async_views, views as api_views
 from rest_framework.routers import DefaultRouter
 
 app_name = 'psycho'
@@ -24,6 +24,7 @@ urlpatterns += [
 # ApplicantProfile URLs
 urlpatterns += [
     path('api/applicants/', api_views.ApplicantProfileListCreateView.as_view(), name='applicant-list'),
+    path('api/applicants/search', api_views.ApplicantSearchView.as_view(), name='applicant-search'),
     path('api/applicant/<uuid:pk>/', api_views.ApplicantProfileRetrieveUpdateDestroyView.as_view(),
          name='applicant-detail'),
 ]
@@ -33,6 +34,35 @@ router = DefaultRouter()
 router.register(r'api/applications', api_views.ApplicationViewSet, basename='application')
 urlpatterns += router.urls
 urlpatterns += [
+    path('api/applications/stats', api_views.application_stats, name='application-stats'),
+    path('api/applications/track/<str:tracking_id>', api_views.application_track, name='application-track'),
     path('api/applications/<uuid:pk>/status_history', api_views.application_status_history,
          name='application-status-history')
 ]
+
+# Async (ASGI) read-only Application URLs
+urlpatterns += [
+    path('api/async/applications/', async_views.application_list, name='async-application-list'),
+    path('api/async/applications/<uuid:pk>/', async_views.application_detail, name='async-application-detail'),
+    path('api/async/applications/<uuid:pk>/status_history', async_views.application_status_history,
+         name='async-application-status-history'),
+]
+
+# Maximum number of SQL queries per GET/HEAD request, by route name (see psycho/instrumentation.py and the
+# check_query_budgets command). A route going over its budget most likely has a N+1 query.
+QUERY_BUDGETS = {
+    'user-detail': 1,
+    'adminprofile-list': 2,
+    'adminprofile-detail': 2,
+    'applicant-list': 2,
+    'applicant-search': 3,
+    'applicant-detail': 2,
+    'application-list': 3,
+    'application-detail': 3,
+    'application-status-history': 1,
+    'application-stats': 1,
+    'application-track': 1,
+    'async-application-list': 3,
+    'async-application-detail': 2,
+    'async-application-status-history': 1,
+}